@@ -46,37 +46,111 @@ chrome.runtime.onMessage.addListener((message, sender, sendResponse) => {
     return asyncHandled;
 });
 
+// Status updates are queued and sent in batches instead of one request per job
+const STATUS_FLUSH_ALARM = 'flushStatusUpdates';
+const STATUS_FLUSH_INTERVAL_MINUTES = 0.5;
+const STATUS_FLUSH_BATCH_SIZE = 20;
+
+chrome.alarms.create(STATUS_FLUSH_ALARM, { periodInMinutes: STATUS_FLUSH_INTERVAL_MINUTES });
+chrome.alarms.onAlarm.addListener((alarm) => {
+    if (alarm.name === STATUS_FLUSH_ALARM) {
+        flushStatusUpdates();
+    }
+});
+
 // Handle job application completion
 async function handleJobApplied(message) {
     try {
         const { jobId, status } = message;
         
-        // Get current session ID
-        const result = await chrome.storage.local.get('sessionId');
-        const sessionId = result.sessionId;
+        // Queue the update; it is sent with the next batch
+        const queued = await withStatusQueue(async () => {
+            const result = await chrome.storage.local.get(['sessionId', 'pendingStatusUpdates']);
+            const sessionId = result.sessionId;
+            if (!sessionId) {
+                return 0;
+            }
+            const pending = result.pendingStatusUpdates || [];
+            pending.push({ session_id: sessionId, job_id: jobId, status: status, at: new Date().toISOString() });
+            await chrome.storage.local.set({ pendingStatusUpdates: pending });
+            console.log(`JobFlow: Queued status ${status} for job ${jobId}`);
+            return pending.length;
+        });
         
-        if (sessionId) {
-            // Update status in backend
-            const response = await fetch(`${BACKEND_URL}/chrome-extension/update-status/${sessionId}`, {
+        if (queued >= STATUS_FLUSH_BATCH_SIZE) {
+            await flushStatusUpdates();
+        }
+    } catch (error) {
+        console.error('JobFlow: Error handling job applied:', error);
+    }
+}
+
+// Serializes read-modify-write cycles on pendingStatusUpdates so none overwrites another
+let statusQueueTail = Promise.resolve();
+
+function withStatusQueue(mutate) {
+    const run = statusQueueTail.then(mutate);
+    statusQueueTail = run.catch(() => {});
+    return run;
+}
+
+let flushInProgress = null;
+
+// Send queued status updates, one batch request per session
+function flushStatusUpdates() {
+    if (!flushInProgress) {
+        flushInProgress = sendQueuedStatusUpdates().finally(() => { flushInProgress = null; });
+    }
+    return flushInProgress;
+}
+
+async function sendQueuedStatusUpdates() {
+    const result = await chrome.storage.local.get('pendingStatusUpdates');
+    const pending = result.pendingStatusUpdates || [];
+    if (pending.length === 0) {
+        return;
+    }
+    
+    const bySession = {};
+    for (const update of pending) {
+        (bySession[update.session_id] = bySession[update.session_id] || []).push(update);
+    }
+    
+    const updateKey = (update) => `${update.session_id}|${update.job_id}|${update.at}`;
+    const sent = new Set();
+    for (const [sessionId, updates] of Object.entries(bySession)) {
+        try {
+            const response = await fetch(`${BACKEND_URL}/chrome-extension/update-status/${sessionId}/batch`, {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json'
                 },
                 body: JSON.stringify({
-                    job_id: jobId,
-                    status: status
+                    updates: updates.map(({ job_id, status, at }) => ({ job_id, status, at }))
                 })
             });
             
             if (response.ok) {
-                console.log(`JobFlow: Successfully updated job ${jobId} status to ${status}`);
+                updates.forEach(update => sent.add(updateKey(update)));
+                console.log(`JobFlow: Sent ${updates.length} status updates for session ${sessionId}`);
+            } else if (response.status < 500) {
+                // 4xx (expired session, rejected batch): resending can't succeed, so drop it
+                updates.forEach(update => sent.add(updateKey(update)));
+                console.error(`JobFlow: Dropped ${updates.length} status updates for session ${sessionId} (HTTP ${response.status})`);
             } else {
-                console.error(`JobFlow: Failed to update job ${jobId} status`);
+                console.error(`JobFlow: Failed to send status updates for session ${sessionId}, will retry`);
             }
+        } catch (error) {
+            console.error('JobFlow: Error sending status updates:', error);
         }
-    } catch (error) {
-        console.error('JobFlow: Error handling job applied:', error);
     }
+    
+    // Keep batches that hit a network error or 5xx, plus updates queued while we were sending
+    await withStatusQueue(async () => {
+        const latest = (await chrome.storage.local.get('pendingStatusUpdates')).pendingStatusUpdates || [];
+        const remaining = latest.filter(update => !sent.has(updateKey(update)));
+        await chrome.storage.local.set({ pendingStatusUpdates: remaining });
+    });
 }
 
 // Handle get jobs request
@@ -195,6 +269,7 @@ chrome.runtime.onStartup.addListener(() => {
 // Handle extension shutdown
 chrome.runtime.onSuspend.addListener(() => {
     console.log('JobFlow: Extension suspended');
+    flushStatusUpdates();
 });
 
 // Utility function to check if we're connected
@@ -0,0 +1,103 @@
+"""
+Structured, non-blocking logging for the job automation backend.
+
+Request handlers log through the standard `logging` module. Records are put
+on an in-memory queue by a QueueHandler and written to stdout by a single
+background QueueListener thread, so request handling never waits on console
+I/O. Debug records from noisy loggers can be sampled.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+
+# Attributes present on every LogRecord; anything else was passed via `extra=`
+_STANDARD_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line, including `extra=` fields"""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class DebugSamplingFilter(logging.Filter):
+    """
+    Keep only a fraction of DEBUG records from the given logger prefixes.
+    Records at INFO and above always pass.
+    """
+
+    def __init__(self, rate: float, logger_prefixes=()):
+        super().__init__()
+        self.rate = max(0.0, min(1.0, rate))
+        self.logger_prefixes = tuple(logger_prefixes)
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or self.rate >= 1.0:
+            return True
+        if not record.name.startswith(self.logger_prefixes):
+            return True
+        return random.random() < self.rate
+
+
+def setup_logging(root_level=logging.INFO, logger_levels=None, json_output=True,
+                  debug_sample_rate=1.0, sampled_loggers=()):
+    """
+    Route all logging through a queue drained by a background thread.
+    Safe to call more than once; the previous listener is replaced.
+    """
+    global _listener
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    if json_output:
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(DebugSamplingFilter(debug_sample_rate, sampled_loggers))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(root_level)
+
+    for name, level in (logger_levels or {}).items():
+        logging.getLogger(name).setLevel(level)
+
+    if _listener is not None:
+        _listener.stop()
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,109 @@
+"""
+Application status tracking for the Chrome extension / desktop app.
+
+The extension queues status transitions and sends them in batches. A batch
+is coalesced to the last transition per job and written in one transaction:
+one query for the affected jobs, one for their existing applications, then
+a single commit for all inserts and updates.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import select
+
+from database import Job
+from job_lookup import IN_CLAUSE_CHUNK_SIZE
+from models import Application
+
+APPLICATION_STATUSES = ("pending", "processing", "applied", "error", "interviewed", "rejected")
+# Statuses after which the extension is done with a job
+FINAL_STATUSES = ("applied", "error", "interviewed", "rejected")
+
+
+def coalesce_status_updates(updates) -> dict:
+    """Latest (status, at) per job_id; later entries win over earlier ones"""
+    latest = {}
+    for update in updates:
+        latest[update["job_id"]] = (update["status"], update.get("at"))
+    return latest
+
+
+def _in_chunks(query_for, values):
+    for start in range(0, len(values), IN_CLAUSE_CHUNK_SIZE):
+        yield from query_for(values[start:start + IN_CLAUSE_CHUNK_SIZE])
+
+
+def record_status_updates(db, user_id: int, session_id: str, updates, session_job_ids=None) -> dict:
+    """
+    Apply status `updates` ([{"job_id", "status", "at"?}, ...]) for `user_id` in
+    one transaction. Returns counts of created/updated applications, the
+    status changes actually written, the ids of jobs that don't exist and,
+    when `session_job_ids` is given, the ids of jobs outside the session
+    (which are not written).
+    """
+    latest = coalesce_status_updates(updates)
+    outside_session = []
+    if session_job_ids is not None:
+        session_job_ids = set(session_job_ids)
+        outside_session = [job_id for job_id in latest if job_id not in session_job_ids]
+        for job_id in outside_session:
+            del latest[job_id]
+    job_ids = list(latest)
+    known = set(_in_chunks(lambda chunk: db.scalars(select(Job.id).where(Job.id.in_(chunk))), job_ids))
+    existing = {
+        application.job_id: application
+        for application in _in_chunks(
+            lambda chunk: db.query(Application).filter(Application.user_id == user_id, Application.job_id.in_(chunk)),
+            [job_id for job_id in job_ids if job_id in known],
+        )
+    }
+
+    created = updated = 0
+    changes = []
+    try:
+        for job_id, (status, at) in latest.items():
+            if job_id not in known:
+                continue
+            application = existing.get(job_id)
+            if application is None:
+                application = Application(user_id=user_id, job_id=job_id)
+                db.add(application)
+                created += 1
+            elif application.status == status:
+                continue
+            else:
+                updated += 1
+            application.status = status
+            application.session_id = session_id
+            changes.append({"job_id": job_id, "status": status})
+            if status == "applied" and application.applied_at is None:
+                application.applied_at = at or datetime.utcnow()
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return {
+        "received": len(updates),
+        "created": created,
+        "updated": updated,
+        "unknown_jobs": [job_id for job_id in job_ids if job_id not in known],
+        "outside_session": outside_session,
+        "changes": changes,
+    }
+
+
+def session_status(db, user_id: int, job_ids) -> str:
+    """
+    Status of a session over `job_ids`: "completed" once every job has a final
+    application status, otherwise "in_progress". A session without any
+    (resolvable) job stays "pending".
+    """
+    job_ids = list(dict.fromkeys(job_ids))
+    if not job_ids:
+        return "pending"
+    finished = set(_in_chunks(
+        lambda chunk: db.scalars(select(Application.job_id).where(
+            Application.user_id == user_id, Application.job_id.in_(chunk), Application.status.in_(FINAL_STATUSES))),
+        job_ids,
+    ))
+    return "completed" if len(finished) == len(job_ids) else "in_progress"
@@ -1,14 +1,50 @@
+import asyncio
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
 from passlib.context import CryptContext
-from jose import JWTError, jwt
-from datetime import datetime, timedelta
+from datetime import timedelta
 from typing import Optional
 
-# Secret key for JWT (in production, use a secure random key and keep it secret!)
-SECRET_KEY = "your_secret_key_here"
+import config
+from metrics import PASSWORD_HASH_DURATION
+from ttl_cache import TTLCache
+
+# Secret key for JWT (in production, set JWT_SECRET_KEY to a secure random key and keep it secret!)
+SECRET_KEY = config.JWT_SECRET_KEY
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 1 day
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Signing keys by key id: the active key signs new tokens, retired keys still verify
+# tokens issued before a rotation. Tokens without a `kid` predate key ids and
+# were signed with the "default" key.
+ACTIVE_KEY_ID = config.JWT_KEY_ID
+LEGACY_KEY_ID = "default"
+JWT_KEYS = {**config.JWT_RETIRED_KEYS, ACTIVE_KEY_ID: SECRET_KEY}
+
+# One keyed HMAC per key, built once; signing copies it instead of re-deriving the key pads
+_hmac_keys = {kid: hmac.new(secret.encode(), digestmod=hashlib.sha256) for kid, secret in JWT_KEYS.items()}
+
+# Verified tokens, each kept until its `exp`
+_verified_tokens = TTLCache("jwt", max_entries=config.JWT_CACHE_MAX_ENTRIES, ttl_seconds=0)
+
+# min/max rounds pin the cost factor, so hashes made with any other cost
+# are flagged for rehashing by verify_and_update on the next login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=config.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=config.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=config.BCRYPT_ROUNDS,
+)
+
+# bcrypt releases the GIL while hashing, so a small dedicated pool runs hashes
+# in parallel without letting a login burst occupy the request threadpool
+_password_executor = ThreadPoolExecutor(max_workers=config.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
 
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
@@ -16,19 +52,86 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+def verify_and_update_password(plain_password, hashed_password):
+    """Returns (valid, new_hash); new_hash is set when the stored hash uses an outdated cost factor"""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+def _timed(operation, fn, *args):
+    started = time.perf_counter()
+    try:
+        return fn(*args)
+    finally:
+        PASSWORD_HASH_DURATION.observe(time.perf_counter() - started, operation=operation)
+
+async def get_password_hash_async(password):
+    """get_password_hash on the password pool, without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_executor, _timed, "hash", get_password_hash, password)
+
+async def verify_and_update_password_async(plain_password, hashed_password):
+    """verify_and_update_password on the password pool, without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_executor, _timed, "verify", verify_and_update_password,
+                                      plain_password, hashed_password)
+
+def shutdown_password_pool():
+    _password_executor.shutdown(wait=False, cancel_futures=True)
+
+def _b64url_encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+def _b64url_decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+def _sign(kid: str, signing_input: bytes) -> bytes:
+    mac = _hmac_keys[kid].copy()
+    mac.update(signing_input)
+    return mac.digest()
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
+    expires_in = expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    to_encode.update({"exp": int(time.time() + expires_in.total_seconds())})
+    header = {"alg": ALGORITHM, "typ": "JWT", "kid": ACTIVE_KEY_ID}
+    signing_input = ".".join(
+        _b64url_encode(json.dumps(part, separators=(",", ":")).encode()) for part in (header, to_encode)
+    )
+    signature = _sign(ACTIVE_KEY_ID, signing_input.encode("ascii"))
+    return f"{signing_input}.{_b64url_encode(signature)}"
 
-def decode_access_token(token: str):
+def _verify_token(token: str):
+    """Check signature, algorithm and expiry; returns the claims or None"""
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        header_b64, payload_b64, signature_b64 = token.split(".")
+        header = json.loads(_b64url_decode(header_b64))
+        if header.get("alg") != ALGORITHM:
+            return None
+        kid = header.get("kid", LEGACY_KEY_ID)
+        if kid not in _hmac_keys:
+            return None
+        expected = _sign(kid, f"{header_b64}.{payload_b64}".encode("ascii"))
+        if not hmac.compare_digest(expected, _b64url_decode(signature_b64)):
+            return None
+        payload = json.loads(_b64url_decode(payload_b64))
+    except (ValueError, TypeError, AttributeError, binascii.Error):
+        return None
+    if not isinstance(payload, dict):
+        return None
+    now = time.time()
+    exp = payload.get("exp")
+    if not isinstance(exp, (int, float)) or exp <= now:
+        return None
+    nbf = payload.get("nbf")
+    if nbf is not None and (not isinstance(nbf, (int, float)) or nbf > now):
+        return None
+    return payload
+
+def decode_access_token(token: str):
+    """Claims of a valid token, or None. Verified tokens are cached until they expire."""
+    payload = _verified_tokens.get(token)
+    if payload is not None:
         return payload
-    except JWTError:
-        return None 
\ No newline at end of file
+    payload = _verify_token(token)
+    if payload is not None:
+        _verified_tokens.set(token, payload, ttl_seconds=payload["exp"] - time.time())
+    return payload
@@ -0,0 +1,99 @@
+"""
+Benchmark login throughput under concurrency.
+
+Drives the app in-process over ASGI against a temporary SQLite database
+(via a get_db override, so job_automation.db is left alone): registers a user, fires
+`--logins` logins with `--concurrency` in flight, and meanwhile pings `/`
+to show whether the event loop stays responsive while bcrypt runs.
+The cost factor comes from BCRYPT_ROUNDS and the hashing pool size
+from PASSWORD_HASH_WORKERS:
+
+    BCRYPT_ROUNDS=12 PASSWORD_HASH_WORKERS=4 python benchmark_login.py --logins 64 --concurrency 16
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+import httpx
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database import Base
+from main import app, get_db
+
+
+async def timed(coro):
+    started = time.perf_counter()
+    response = await coro
+    response.raise_for_status()
+    return time.perf_counter() - started
+
+
+async def run(args):
+    email = "bench@example.com"
+    password = "benchmark-password"
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        (await client.post("/register", json={"email": email, "password": password})).raise_for_status()
+        semaphore = asyncio.Semaphore(args.concurrency)
+        done = asyncio.Event()
+
+        async def login():
+            async with semaphore:
+                return await timed(client.post("/login", data={"username": email, "password": password}))
+
+        async def ping():
+            latencies = []
+            while not done.is_set():
+                latencies.append(await timed(client.get("/")))
+                await asyncio.sleep(0.01)
+            return latencies
+
+        pinger = asyncio.create_task(ping())
+        started = time.perf_counter()
+        durations = sorted(await asyncio.gather(*(login() for _ in range(args.logins))))
+        elapsed = time.perf_counter() - started
+        done.set()
+        pings = sorted(await pinger)
+
+    p95 = durations[min(len(durations) - 1, int(len(durations) * 0.95))]
+    print(f"{args.logins} logins, concurrency {args.concurrency}: {elapsed:.2f}s, {args.logins / elapsed:.1f} logins/s")
+    print(f"login latency mean {statistics.mean(durations) * 1000:.0f}ms, p95 {p95 * 1000:.0f}ms")
+    if pings:
+        print(f"GET / during the burst: {len(pings)} requests, max {pings[-1] * 1000:.1f}ms, "
+              f"median {pings[len(pings) // 2] * 1000:.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--logins", type=int, default=32)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}",
+                               connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        BenchSession = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+        def bench_db():
+            db = BenchSession()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = bench_db
+        try:
+            asyncio.run(run(args))
+        finally:
+            app.dependency_overrides.pop(get_db, None)
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark the resume pipeline offline with the stub LLM backend.
+
+Builds a small DOCX resume in memory and runs parse_resume on it repeatedly,
+optionally from several threads at once, without a model server:
+
+    python benchmark_resume_pipeline.py --runs 50 --concurrency 4 --latency 0.5
+"""
+
+import argparse
+import io
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import docx
+
+import config
+import llm_client
+from resume_parser import parse_resume
+
+SAMPLE_RESUME = [
+    "Jane Doe",
+    "jane.doe@example.com | +1 555 0100 | Springfield, USA",
+    "Experience",
+    "Software Engineer, Example Corp (2020 - present)",
+    "Built and maintained the job ingestion pipeline.",
+    "Education",
+    "BSc Computer Science, Example University (2015 - 2019)",
+    "Skills",
+    "Python, SQL, FastAPI",
+]
+
+
+def sample_docx() -> bytes:
+    document = docx.Document()
+    for line in SAMPLE_RESUME:
+        document.add_paragraph(line)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated LLM latency per call in seconds")
+    parser.add_argument("--mode", choices=("single", "sectioned"), default=config.LLM_EXTRACTION_MODE)
+    parser.add_argument("--no-streaming", action="store_true")
+    args = parser.parse_args()
+
+    config.LLM_EXTRACTION_MODE = args.mode
+    config.LLM_STREAMING = not args.no_streaming
+    llm_client.set_backend(llm_client.StubBackend(latency=args.latency))
+    content = sample_docx()
+
+    def run(_):
+        started = time.perf_counter()
+        parse_resume(content, "resume.docx", title="Benchmark")
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        durations = sorted(executor.map(run, range(args.runs)))
+    elapsed = time.perf_counter() - started
+
+    p95 = durations[min(len(durations) - 1, int(len(durations) * 0.95))]
+    print(f"mode={args.mode} streaming={config.LLM_STREAMING} runs={args.runs} concurrency={args.concurrency}")
+    print(f"total {elapsed:.2f}s, {args.runs / elapsed:.1f} resumes/s")
+    print(f"latency mean {statistics.mean(durations) * 1000:.1f}ms, p50 {durations[len(durations) // 2] * 1000:.1f}ms, "
+          f"p95 {p95 * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
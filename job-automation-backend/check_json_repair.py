@@ -0,0 +1,179 @@
+"""
+Corpus of malformed LLM outputs for json_repair.
+
+Each case is model output seen (or closely modelled on output seen) from
+resume extraction, with the value we expect to recover. Run after changing
+json_repair.py:
+
+    python check_json_repair.py
+"""
+
+import sys
+
+from json_repair import JSONRepairError, repair_loads
+
+CASES = [
+    (
+        "valid json",
+        '{"full_name": "Jane Doe", "skills": [{"name": "Python", "years": 5}]}',
+        {"full_name": "Jane Doe", "skills": [{"name": "Python", "years": 5}]},
+    ),
+    (
+        "prose and code fence around the object",
+        'Here is the extracted JSON:\n```json\n{"full_name": "Jane Doe", "languages": ["English"]}\n```\nLet me know if you need anything else.',
+        {"full_name": "Jane Doe", "languages": ["English"]},
+    ),
+    (
+        "trailing commas",
+        '{"languages": ["English", "Spanish",], "education": [],}',
+        {"languages": ["English", "Spanish"], "education": []},
+    ),
+    (
+        "comments between members",
+        '{\n  // personal details\n  "full_name": "Jane Doe", /* from header */\n  "email": "jane@example.com"\n}',
+        {"full_name": "Jane Doe", "email": "jane@example.com"},
+    ),
+    (
+        "missing comma between members on separate lines",
+        '{\n  "full_name": "Jane Doe"\n  "email": "jane@example.com"\n}',
+        {"full_name": "Jane Doe", "email": "jane@example.com"},
+    ),
+    (
+        "single quotes and python literals",
+        "{'full_name': 'Jane Doe', 'willing_to_relocate': True, 'image_url': None}",
+        {"full_name": "Jane Doe", "willing_to_relocate": True, "image_url": None},
+    ),
+    (
+        "apostrophe inside single-quoted string",
+        "{'company': 'O'Reilly Media', 'title': 'Editor'}",
+        {"company": "O'Reilly Media", "title": "Editor"},
+    ),
+    (
+        "unescaped inner quotes",
+        '{"description": "Led the "Phoenix" migration to AWS"}',
+        {"description": 'Led the "Phoenix" migration to AWS'},
+    ),
+    (
+        "raw newlines inside a string",
+        '{"description": "Built the API\nOwned on-call"}',
+        {"description": "Built the API\nOwned on-call"},
+    ),
+    (
+        "unquoted keys",
+        '{full_name: "Jane Doe", gpa: 3.8}',
+        {"full_name": "Jane Doe", "gpa": 3.8},
+    ),
+    (
+        "unquoted value with units",
+        '{"skills": [{"name": "Go", "years": 3 years}]}',
+        {"skills": [{"name": "Go", "years": "3 years"}]},
+    ),
+    (
+        "invalid escape",
+        '{"school": "Universit\\é de Montr\\éal"}',
+        {"school": "Université de Montréal"},
+    ),
+    (
+        "truncated inside a string",
+        '{"full_name": "Jane Doe", "work_experience": [{"title": "Engineer", "description": "Built pipel',
+        {"full_name": "Jane Doe", "work_experience": [{"title": "Engineer", "description": "Built pipel"}]},
+    ),
+    (
+        "truncated after a key",
+        '{"full_name": "Jane Doe", "education": [{"degree": "BSc", "school":',
+        {"full_name": "Jane Doe", "education": [{"degree": "BSc"}]},
+    ),
+    (
+        "truncated inside a key",
+        '{"full_name": "Jane Doe", "educ',
+        {"full_name": "Jane Doe"},
+    ),
+    (
+        "truncated literal",
+        '{"full_name": "Jane Doe", "current": tru',
+        {"full_name": "Jane Doe"},
+    ),
+    (
+        "truncated number keeps the digits read",
+        '{"skills": [{"name": "SQL", "years": 1',
+        {"skills": [{"name": "SQL", "years": 1}]},
+    ),
+    (
+        "mismatched closing bracket",
+        '{"languages": ["English", "French"}, "skills": []}',
+        {"languages": ["English", "French"], "skills": []},
+    ),
+    (
+        "text after the object",
+        '{"full_name": "Jane Doe"}\n\nNote: phone number was not found.',
+        {"full_name": "Jane Doe"},
+    ),
+    (
+        "doubled commas",
+        '{"languages": ["English",, "German"],, "certificates": []}',
+        {"languages": ["English", "German"], "certificates": []},
+    ),
+]
+
+# Parsed with expect="object", as resume_parser.loads_llm_json does
+OBJECT_CASES = [
+    (
+        "bracketed prose before the object",
+        'Note [1]: here {"full_name": "Jane Doe"}',
+        {"full_name": "Jane Doe"},
+    ),
+    (
+        "array before the object",
+        'Sections found: ["skills"]\n{"skills": []}',
+        {"skills": []},
+    ),
+]
+
+FAILING_CASES = [
+    ("no json at all", "I could not find a resume in the provided text."),
+    ("only an opening brace cut off before any member", "Sure! ```json\n{"),
+]
+
+
+def main():
+    failures = 0
+    for name, text, expected in CASES:
+        repairs = []
+        try:
+            result = repair_loads(text, repairs)
+        except JSONRepairError as e:
+            result = f"<error: {e}>"
+        ok = result == expected
+        failures += not ok
+        print(f"{'PASS' if ok else 'FAIL'}  {name}" + (f"  [{', '.join(repairs)}]" if repairs else ""))
+        if not ok:
+            print(f"      expected {expected!r}\n      got      {result!r}")
+
+    for name, text, expected in OBJECT_CASES:
+        try:
+            result = repair_loads(text, expect="object")
+        except JSONRepairError as e:
+            result = f"<error: {e}>"
+        ok = result == expected
+        failures += not ok
+        print(f"{'PASS' if ok else 'FAIL'}  {name}")
+        if not ok:
+            print(f"      expected {expected!r}\n      got      {result!r}")
+
+    for name, text in FAILING_CASES:
+        try:
+            result = repair_loads(text)
+        except JSONRepairError:
+            print(f"PASS  {name} (rejected)")
+            continue
+        # An empty object is an acceptable answer for a cut-off opening brace
+        ok = result == {}
+        failures += not ok
+        print(f"{'PASS' if ok else 'FAIL'}  {name} -> {result!r}")
+
+    print(f"\n{len(CASES) + len(OBJECT_CASES) + len(FAILING_CASES) - failures}/{len(CASES) + len(OBJECT_CASES) + len(FAILING_CASES)} cases passed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
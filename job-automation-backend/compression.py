@@ -0,0 +1,259 @@
+"""
+Response compression for the job automation backend.
+
+Search results and profiles are large JSON payloads, so responses are
+compressed with Brotli (when the `brotli` package is installed) or gzip,
+depending on what the client advertises in Accept-Encoding. Static assets
+can also be pre-compressed once on startup and served as-is.
+"""
+
+import gzip
+import os
+import stat
+import zlib
+from mimetypes import guess_type
+
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.staticfiles import StaticFiles
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+# Media types that are already compressed (or must not be buffered) and are
+# never worth running through a compressor again
+DEFAULT_EXCLUDED_MEDIA_TYPES = (
+    "image/png",
+    "image/jpeg",
+    "image/gif",
+    "image/webp",
+    "image/x-icon",
+    "application/zip",
+    "application/gzip",
+    "application/pdf",
+    "text/event-stream",
+)
+
+# File extensions worth pre-compressing when serving static directories
+PRECOMPRESS_EXTENSIONS = (".svg", ".css", ".js", ".json", ".html", ".txt")
+
+ENCODING_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+
+def supported_encodings():
+    """Encodings this process can produce, in order of preference"""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def choose_encoding(accept_encoding: str, available=None):
+    """
+    Pick the best content coding from an Accept-Encoding header.
+    Returns None when the client accepts none of the available codings.
+    """
+    available = available or supported_encodings()
+    weights = {}
+    for part in accept_encoding.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        coding, _, params = part.partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[coding.strip().lower()] = q
+
+    best, best_q = None, 0.0
+    for coding in available:
+        q = weights.get(coding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compress_bytes(data: bytes, encoding: str, gzip_level: int = 6, brotli_quality: int = 5) -> bytes:
+    """Compress a complete body in one shot"""
+    if encoding == "br":
+        return brotli.compress(data, quality=brotli_quality)
+    return gzip.compress(data, compresslevel=gzip_level)
+
+
+class _StreamCompressor:
+    """Incremental compressor used for streaming (chunked) responses"""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=brotli_quality)
+        else:
+            # wbits=31 produces a gzip container instead of raw zlib
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, chunk: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.process(chunk) + self._compressor.flush()
+        return self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing responses with Brotli or gzip.
+
+    Bodies smaller than `minimum_size`, responses that already carry a
+    Content-Encoding and media types in `excluded_media_types` are passed
+    through untouched.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 5,
+                 excluded_media_types=DEFAULT_EXCLUDED_MEDIA_TYPES):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.excluded_media_types = tuple(excluded_media_types)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.downstream_send = send
+        self.start_message = None
+        self.passthrough = False
+        self.compressor = None
+
+    def _should_skip(self, headers: MutableHeaders) -> bool:
+        if "content-encoding" in headers:
+            return True
+        if self.start_message["status"] in (204, 304):
+            return True
+        media_type = headers.get("content-type", "").split(";")[0].strip().lower()
+        return media_type in self.middleware.excluded_media_types
+
+    async def send(self, message):
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            # Hold the start message until we know the body size
+            self.start_message = message
+            return
+        if message_type != "http.response.body" or self.passthrough:
+            await self.downstream_send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None:
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            if self._should_skip(headers) or (not more_body and len(body) < self.middleware.minimum_size):
+                self.passthrough = True
+                await self.downstream_send(self.start_message)
+                await self.downstream_send(message)
+                return
+
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if not more_body:
+                compressed = compress_bytes(body, self.encoding, self.middleware.gzip_level,
+                                            self.middleware.brotli_quality)
+                headers["Content-Length"] = str(len(compressed))
+                await self.downstream_send(self.start_message)
+                await self.downstream_send({"type": "http.response.body", "body": compressed})
+                self.passthrough = True
+                return
+
+            # Streaming response: length is unknown once compressed
+            del headers["Content-Length"]
+            self.compressor = _StreamCompressor(self.encoding, self.middleware.gzip_level,
+                                                self.middleware.brotli_quality)
+            await self.downstream_send(self.start_message)
+
+        chunk = self.compressor.compress(body)
+        if not more_body:
+            chunk += self.compressor.finish()
+        await self.downstream_send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+
+def precompress_static_assets(directory: str, extensions=PRECOMPRESS_EXTENSIONS,
+                              gzip_level: int = 9, brotli_quality: int = 11) -> int:
+    """
+    Write .gz (and .br when brotli is installed) siblings for compressible
+    files in `directory`. Files whose compressed copy is already up to date
+    are skipped. Returns the number of files written.
+    """
+    written = 0
+    if not os.path.isdir(directory):
+        return written
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if not name.lower().endswith(extensions):
+                continue
+            source = os.path.join(root, name)
+            source_mtime = os.path.getmtime(source)
+            data = None
+            for encoding in supported_encodings():
+                target = source + ENCODING_SUFFIXES[encoding]
+                if os.path.exists(target) and os.path.getmtime(target) >= source_mtime:
+                    continue
+                if data is None:
+                    with open(source, "rb") as f:
+                        data = f.read()
+                compressed = compress_bytes(data, encoding, gzip_level, brotli_quality)
+                if len(compressed) >= len(data):
+                    continue
+                with open(target, "wb") as f:
+                    f.write(compressed)
+                written += 1
+    return written
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    StaticFiles that serves a pre-compressed `.br`/`.gz` sibling when one
+    exists and the client accepts that encoding. If the preferred encoding
+    has no sibling (e.g. no `.br` because brotli isn't installed), the next
+    accepted one is tried before falling back to the plain file.
+    """
+
+    async def get_response(self, path: str, scope):
+        if scope["method"] in ("GET", "HEAD"):
+            accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+            candidates = list(ENCODING_SUFFIXES)
+            while candidates:
+                encoding = choose_encoding(accept_encoding, available=tuple(candidates))
+                if encoding is None:
+                    break
+                candidates.remove(encoding)
+                try:
+                    full_path, stat_result = await anyio.to_thread.run_sync(
+                        self.lookup_path, path + ENCODING_SUFFIXES[encoding])
+                except OSError:
+                    stat_result = None
+                if stat_result is not None and stat.S_ISREG(stat_result.st_mode):
+                    response = self.file_response(full_path, stat_result, scope)
+                    response.headers["Content-Type"] = guess_type(path)[0] or "text/plain"
+                    response.headers["Content-Encoding"] = encoding
+                    response.headers.add_vary_header("Accept-Encoding")
+                    return response
+        return await super().get_response(path, scope)
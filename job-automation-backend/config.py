@@ -8,10 +8,27 @@ import os
 import logging
 import warnings
 
+from app_logging import setup_logging
+
 # Debug settings
 DEBUG_LLM = os.getenv("DEBUG_LLM", "false").lower() == "true"
 DEBUG_SERVER = os.getenv("DEBUG_SERVER", "false").lower() == "true"
 
+# Structured logging settings
+LOG_JSON = os.getenv("LOG_JSON", "true").lower() == "true"  # one JSON object per line
+DEBUG_LOG_SAMPLE_RATE = float(os.getenv("DEBUG_LOG_SAMPLE_RATE", "0.1"))  # fraction of sampled debug traces kept
+SAMPLED_LOGGERS = ("jobapp.http",)  # per-request traces, sampled when DEBUG_SERVER is on
+LOGGER_LEVELS = {
+    "jobapp.http": logging.DEBUG if DEBUG_SERVER else logging.WARNING,
+    "jobapp.auth": logging.DEBUG if DEBUG_SERVER else logging.INFO,
+    "jobapp.profiles": logging.DEBUG if DEBUG_SERVER else logging.INFO,
+    "jobapp.search": logging.DEBUG if DEBUG_SERVER else logging.INFO,
+    "jobapp.fetcher": logging.INFO,
+    "jobapp.scraper": logging.DEBUG if DEBUG_SERVER else logging.INFO,
+    "jobapp.extension": logging.DEBUG if DEBUG_SERVER else logging.INFO,
+    "jobapp.llm": logging.DEBUG if DEBUG_LLM else logging.INFO,
+}
+
 # Logging configuration
 def configure_logging():
     """Configure logging to suppress unwanted output"""
@@ -25,11 +42,14 @@ def configure_logging():
     logging.getLogger("urllib3").setLevel(logging.WARNING)
     logging.getLogger("requests").setLevel(logging.WARNING)
     
-    # Configure root logger
-    if DEBUG_SERVER:
-        logging.basicConfig(level=logging.DEBUG)
-    else:
-        logging.basicConfig(level=logging.INFO)
+    # Route everything through the queue-backed async handler
+    setup_logging(
+        root_level=logging.DEBUG if DEBUG_SERVER else logging.INFO,
+        logger_levels=LOGGER_LEVELS,
+        json_output=LOG_JSON,
+        debug_sample_rate=DEBUG_LOG_SAMPLE_RATE,
+        sampled_loggers=SAMPLED_LOGGERS,
+    )
     
     # Suppress specific warnings
     warnings.filterwarnings("ignore", message=".*control token.*")
@@ -44,11 +64,101 @@ MODEL_GPU_LAYERS = 25  # Optimized for RTX 2080 8GB VRAM
 
 # LLM processing settings
 LLM_TIMEOUT_SECONDS = int(os.getenv("LLM_TIMEOUT_SECONDS", "300"))  # 5 minutes default timeout
+LLM_BACKEND = os.getenv("LLM_BACKEND", "ollama")  # "ollama", "llamacpp" (in-process, MODEL_PATH) or "stub"
+LLM_STUB_LATENCY_SECONDS = float(os.getenv("LLM_STUB_LATENCY_SECONDS", "0"))  # simulated generation time of the stub backend
+OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434")
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3")
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")  # keep the model (and its prompt cache) loaded between calls
+LLM_PREFIX_WARMUP = os.getenv("LLM_PREFIX_WARMUP", "true").lower() == "true"  # pre-fill the fixed prompt prefix on startup
+LLM_STREAMING = os.getenv("LLM_STREAMING", "true").lower() == "true"  # stream tokens, emit sections early, stop at the closing brace
+LLM_CONSTRAINED_DECODING = os.getenv("LLM_CONSTRAINED_DECODING", "true").lower() == "true"  # decode against the ResumeExtraction JSON schema
+
+# "single" sends one large prompt; "sectioned" runs one short prompt per profile section concurrently.
+# Sectioned mode only helps when the model server handles parallel requests (OLLAMA_NUM_PARALLEL > 1).
+LLM_EXTRACTION_MODE = os.getenv("LLM_EXTRACTION_MODE", "single")
+LLM_SECTION_CONCURRENCY = int(os.getenv("LLM_SECTION_CONCURRENCY", "4"))  # section calls in flight per process, across all resumes
+LLM_SECTION_TOKEN_BUDGETS = {}  # per-section max tokens overriding resume_sections.DEFAULT_SECTION_TOKEN_BUDGETS
+
+# Resume parse cache (content-addressed by document hash, model and prompt version)
+RESUME_CACHE_ENABLED = os.getenv("RESUME_CACHE_ENABLED", "true").lower() == "true"
+RESUME_CACHE_DIR = os.getenv("RESUME_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "resume_cache"))
+RESUME_CACHE_MAX_BYTES = int(os.getenv("RESUME_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+
+# Resume text extraction (process pool; 0 workers extracts inline on the calling thread)
+TEXT_EXTRACTION_WORKERS = int(os.getenv("TEXT_EXTRACTION_WORKERS", "2"))
+TEXT_EXTRACTION_TIMEOUT_SECONDS = float(os.getenv("TEXT_EXTRACTION_TIMEOUT_SECONDS", "30"))
+RESUME_MAX_PAGES = int(os.getenv("RESUME_MAX_PAGES", "10"))  # pages read from a PDF; the rest is ignored
+PDF_TEXT_BACKEND = os.getenv("PDF_TEXT_BACKEND", "auto")  # "auto" (pypdfium2, PyMuPDF, then pdfminer), "pdfium", "pymupdf" or "pdfminer"
+
+# Resume text preprocessing (whitespace, repeated headers/footers, token budget) before the LLM prompt
+RESUME_PREPROCESS = os.getenv("RESUME_PREPROCESS", "true").lower() == "true"
+RESUME_MAX_PROMPT_TOKENS = int(os.getenv("RESUME_MAX_PROMPT_TOKENS", "6000"))  # resume text budget; the instructions come on top
+
+# Resume job queue settings (background resume parsing)
+RESUME_JOB_WORKERS = int(os.getenv("RESUME_JOB_WORKERS", "2"))  # concurrent resume parses
+RESUME_JOB_MAX_PENDING = int(os.getenv("RESUME_JOB_MAX_PENDING", "20"))  # queued + running before rejecting with 503
+RESUME_JOB_TTL_SECONDS = int(os.getenv("RESUME_JOB_TTL_SECONDS", "3600"))  # how long finished jobs stay pollable
+
+# Batch resume import (/upload_resume_llm/batch)
+RESUME_BATCH_CONCURRENCY = int(os.getenv("RESUME_BATCH_CONCURRENCY", "4"))  # resumes parsed at once across all batches
+RESUME_BATCH_MAX_FILES = int(os.getenv("RESUME_BATCH_MAX_FILES", "500"))
+RESUME_BATCH_MAX_FILE_BYTES = int(os.getenv("RESUME_BATCH_MAX_FILE_BYTES", str(10 * 1024 * 1024)))
+RESUME_BATCH_MAX_UPLOAD_BYTES = int(os.getenv("RESUME_BATCH_MAX_UPLOAD_BYTES", str(100 * 1024 * 1024)))  # all files of one batch request
+RESUME_BATCH_INSERT_SIZE = int(os.getenv("RESUME_BATCH_INSERT_SIZE", "25"))  # profiles per bulk INSERT
 
 # Server settings
 HOST = "0.0.0.0"
 PORT = 8000
 
+# Response compression settings (Brotli is used when the `brotli` package is installed)
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))  # bytes; smaller bodies are sent as-is
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))
+PRECOMPRESS_STATIC_ASSETS = os.getenv("PRECOMPRESS_STATIC_ASSETS", "true").lower() == "true"
+
+# Metrics settings (Prometheus text format on /metrics)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+# Profiling settings (opt-in; send `X-Profile: cprofile|sampling` on a request)
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN", "")  # if set, requests must also send X-Profile-Token
+PROFILING_DIR = os.getenv("PROFILING_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiling_results"))
+PROFILING_MAX_RESULTS = int(os.getenv("PROFILING_MAX_RESULTS", "100"))
+PROFILE_INGESTION = os.getenv("PROFILE_INGESTION", "false").lower() == "true"
+
+# Password hashing (bcrypt). Changing the rounds rehashes each user's password on their next login.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# JWT signing. To rotate: move the current key into JWT_RETIRED_KEYS as "kid:secret"
+# (comma-separated), then set a new JWT_KEY_ID and JWT_SECRET_KEY.
+JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your_secret_key_here")
+JWT_KEY_ID = os.getenv("JWT_KEY_ID", "default")
+JWT_RETIRED_KEYS = dict(
+    item.strip().split(":", 1) for item in os.getenv("JWT_RETIRED_KEYS", "").split(",") if ":" in item
+)
+JWT_CACHE_MAX_ENTRIES = int(os.getenv("JWT_CACHE_MAX_ENTRIES", "4096"))  # verified tokens kept until they expire
+
+# Authenticated-user cache: skips the user lookup for recently seen token subjects.
+# It is per process and only invalidated in the worker that changed the user, so with
+# several workers a deleted or renamed user stays visible elsewhere for up to the TTL.
+AUTH_USER_CACHE_TTL_SECONDS = float(os.getenv("AUTH_USER_CACHE_TTL_SECONDS", "5"))  # keep short
+AUTH_USER_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_USER_CACHE_MAX_ENTRIES", "1024"))  # 0 disables the cache
+
+# Chrome extension / desktop app application sessions
+SESSION_STORE_BACKEND = os.getenv("SESSION_STORE_BACKEND", "sql")  # "sql" (app database) or "redis"
+SESSION_REDIS_URL = os.getenv("SESSION_REDIS_URL", "redis://localhost:6379/0")  # redis backend only; needs the redis package
+SESSION_TTL_SECONDS = float(os.getenv("SESSION_TTL_SECONDS", str(24 * 3600)))
+SESSION_SWEEP_INTERVAL_SECONDS = float(os.getenv("SESSION_SWEEP_INTERVAL_SECONDS", "300"))  # 0 disables the sweeper
+
+# Server-Sent Events push (/events, /chrome-extension/events/{session_id}, /jobs/events)
+EVENTS_HEARTBEAT_SECONDS = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15"))  # keep-alive comment interval
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "100"))  # per subscriber; slower clients lose events
+
+# Comma-separated list of user emails allowed to use /admin endpoints
+ADMIN_EMAILS = [e.strip().lower() for e in os.getenv("ADMIN_EMAILS", "").split(",") if e.strip()]
+
 # CORS settings
 ALLOWED_ORIGINS = [
     "http://localhost:3000",
@@ -0,0 +1,107 @@
+"""
+In-process publish/subscribe bus behind the Server-Sent Events endpoints.
+
+Publishers (request handlers, the resume job workers, the ingestion thread)
+call `publish(topic, event)` from any thread. Each subscriber owns a bounded
+asyncio queue on its event loop; a subscriber that falls behind loses events
+rather than growing memory. Topics used by the app:
+
+- user:{user_id}        sessions created/progressing, application statuses, resume parses
+- session:{session_id}  application status and session status changes of one extension session
+- jobs                  batches of newly ingested jobs
+
+Events only reach subscribers of the same process, so with several uvicorn
+workers a client sees the events produced by the worker it is connected to.
+"""
+
+import asyncio
+import json
+import threading
+
+from metrics import EVENT_SUBSCRIBERS, EVENTS_DROPPED
+
+
+class Subscription:
+    def __init__(self, bus, topics, kind: str, max_queue: int, transform=None):
+        self.bus = bus
+        self.topics = tuple(topics)
+        self.kind = kind
+        self.transform = transform
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.active = True
+
+    def offer(self, event: dict):
+        """Runs on the subscriber's loop"""
+        if self.transform is not None:
+            event = self.transform(event)
+            if event is None:
+                return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            EVENTS_DROPPED.inc(kind=self.kind)
+
+    async def sse(self, heartbeat_seconds: float = 15):
+        """
+        Yield events as Server-Sent Events (event name = the event's `type`),
+        with a comment line every `heartbeat_seconds` of silence to keep proxies
+        from closing the connection. Unsubscribes when the client goes away.
+        """
+        try:
+            yield ": connected\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(self.queue.get(), heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+        finally:
+            self.bus.unsubscribe(self)
+
+
+class EventBus:
+    def __init__(self, max_queue: int = 100):
+        self.max_queue = max_queue
+        self._subscriptions = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, *topics, kind: str = "events", transform=None) -> Subscription:
+        """
+        Subscribe to `topics`; call from the event loop. `transform(event)` may
+        rewrite or filter (return None) events before they are queued.
+        """
+        subscription = Subscription(self, topics, kind, self.max_queue, transform)
+        with self._lock:
+            for topic in subscription.topics:
+                self._subscriptions.setdefault(topic, []).append(subscription)
+        EVENT_SUBSCRIBERS.inc(kind=kind)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            if not subscription.active:
+                return
+            subscription.active = False
+            for topic in subscription.topics:
+                remaining = [s for s in self._subscriptions.get(topic, []) if s is not subscription]
+                if remaining:
+                    self._subscriptions[topic] = remaining
+                else:
+                    self._subscriptions.pop(topic, None)
+        EVENT_SUBSCRIBERS.dec(kind=subscription.kind)
+
+    def publish(self, topic: str, event: dict):
+        """Deliver `event` (a dict with a `type`) to the topic's subscribers; safe from any thread"""
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(topic, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, event)
+            except RuntimeError:
+                # The subscriber's loop is closed
+                self.unsubscribe(subscription)
+
+    def has_subscribers(self, topic: str) -> bool:
+        return bool(self._subscriptions.get(topic))
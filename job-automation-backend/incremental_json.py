@@ -0,0 +1,94 @@
+"""
+Incremental parser for a streamed top-level JSON object.
+
+The LLM emits the profile as one JSON object token by token. Rather than
+waiting for the whole completion, SectionStreamParser tracks nesting as
+chunks arrive and hands back each top-level member (personal_information,
+work_experience, education, ...) as soon as its value is complete. Once the
+closing brace of the object arrives `done` is set, so the caller can stop
+generation instead of paying for trailing tokens.
+"""
+
+from json_repair import JSONRepairError, repair_loads
+
+
+def _parse_member(segment: str):
+    """Parse `"key": value` into (key, value); None if nothing usable can be recovered"""
+    segment = segment.strip()
+    if not segment:
+        return None
+    try:
+        parsed = repair_loads("{" + segment + "}")
+    except JSONRepairError:
+        return None
+    if isinstance(parsed, dict) and len(parsed) == 1:
+        return next(iter(parsed.items()))
+    return None
+
+
+class SectionStreamParser:
+    def __init__(self):
+        self.started = False
+        self.done = False
+        self.sections = {}
+        self.failed_segments = []
+        self._chars = []
+        self._member_start = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    @property
+    def text(self) -> str:
+        """Everything received from the opening brace onwards"""
+        return "".join(self._chars)
+
+    def feed(self, chunk: str):
+        """Consume a chunk of model output; returns the (key, value) members completed by it"""
+        completed = []
+        for ch in chunk:
+            if self.done:
+                break
+            if not self.started:
+                # Skip any preamble or code fence before the object
+                if ch == "{":
+                    self.started = True
+                    self._depth = 1
+                    self._chars.append(ch)
+                    self._member_start = 1
+                continue
+
+            self._chars.append(ch)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._finish_member(len(self._chars) - 1, completed)
+                    self.done = True
+            elif ch == "," and self._depth == 1:
+                self._finish_member(len(self._chars) - 1, completed)
+                self._member_start = len(self._chars)
+        return completed
+
+    def _finish_member(self, end: int, completed: list):
+        segment = "".join(self._chars[self._member_start:end])
+        member = _parse_member(segment)
+        if member is None:
+            if segment.strip():
+                self.failed_segments.append(segment)
+            return
+        key, value = member
+        self.sections[key] = value
+        completed.append(member)
@@ -0,0 +1,30 @@
+"""
+Bulk job lookups by id or link.
+
+One `WHERE column IN (...)` query per chunk replaces a query per job; chunks
+stay below SQLite's bound-parameter limit (999 on older builds).
+"""
+
+from database import Job
+
+IN_CLAUSE_CHUNK_SIZE = 500
+
+# Columns sent to the extension / desktop app for each job
+JOB_PAYLOAD_COLUMNS = ("id", "title", "company", "location", "description", "link", "source")
+
+
+def fetch_job_payloads(db, key: str, values, chunk_size: int = IN_CLAUSE_CHUNK_SIZE) -> list:
+    """
+    Job dicts for `values` of Job.<key> ("id" or "link"), in the order of
+    `values`. Values without a job are skipped; repeated values repeat the job.
+    """
+    column = getattr(Job, key)
+    columns = [getattr(Job, name) for name in JOB_PAYLOAD_COLUMNS]
+    unique = list(dict.fromkeys(values))
+    found = {}
+    for start in range(0, len(unique), chunk_size):
+        chunk = unique[start:start + chunk_size]
+        for row in db.query(*columns).filter(column.in_(chunk)):
+            job = dict(row._mapping)
+            found[job[key]] = job
+    return [found[value] for value in values if value in found]
@@ -0,0 +1,132 @@
+"""
+JSON Patch (RFC 6902) and JSON Merge Patch (RFC 7396) for plain JSON documents.
+
+Both return a new document and leave the input untouched, so a patch that
+fails halfway through never leaves a half-applied result behind.
+"""
+
+import copy
+
+JSON_PATCH_CONTENT_TYPE = "application/json-patch+json"
+MERGE_PATCH_CONTENT_TYPE = "application/merge-patch+json"
+
+
+class JSONPatchError(ValueError):
+    """Raised for a malformed patch or an operation that cannot be applied"""
+
+
+class JSONPatchTestFailed(JSONPatchError):
+    """Raised when a `test` operation does not match"""
+
+
+def _parse_pointer(pointer) -> list:
+    if not isinstance(pointer, str) or (pointer and not pointer.startswith("/")):
+        raise JSONPatchError(f"Invalid JSON pointer: {pointer!r}")
+    if pointer == "":
+        return []
+    return [token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")]
+
+
+def _index(container: list, token: str, allow_end: bool = False) -> int:
+    if allow_end and token == "-":
+        return len(container)
+    if not token.isdigit() or (token != "0" and token.startswith("0")):
+        raise JSONPatchError(f"Invalid array index: {token!r}")
+    index = int(token)
+    if index > len(container) or (index == len(container) and not allow_end):
+        raise JSONPatchError(f"Array index out of range: {index}")
+    return index
+
+
+def _resolve(doc, tokens, pointer):
+    """Value at `tokens`; raises JSONPatchError if the path does not exist"""
+    for token in tokens:
+        if isinstance(doc, dict):
+            if token not in doc:
+                raise JSONPatchError(f"Path not found: {pointer}")
+            doc = doc[token]
+        elif isinstance(doc, list):
+            doc = doc[_index(doc, token)]
+        else:
+            raise JSONPatchError(f"Path not found: {pointer}")
+    return doc
+
+
+def _add(doc, tokens, value, pointer):
+    if not tokens:
+        return value
+    parent = _resolve(doc, tokens[:-1], pointer)
+    if isinstance(parent, dict):
+        parent[tokens[-1]] = value
+    elif isinstance(parent, list):
+        parent.insert(_index(parent, tokens[-1], allow_end=True), value)
+    else:
+        raise JSONPatchError(f"Path not found: {pointer}")
+    return doc
+
+
+def _remove(doc, tokens, pointer):
+    if not tokens:
+        raise JSONPatchError("Cannot remove the whole document")
+    parent = _resolve(doc, tokens[:-1], pointer)
+    if isinstance(parent, dict):
+        if tokens[-1] not in parent:
+            raise JSONPatchError(f"Path not found: {pointer}")
+        return parent.pop(tokens[-1])
+    if isinstance(parent, list):
+        return parent.pop(_index(parent, tokens[-1]))
+    raise JSONPatchError(f"Path not found: {pointer}")
+
+
+def apply_json_patch(doc, operations):
+    """Apply a list of RFC 6902 operations to a copy of `doc` and return it"""
+    if not isinstance(operations, list):
+        raise JSONPatchError("A JSON Patch must be an array of operations")
+    doc = copy.deepcopy(doc)
+    for operation in operations:
+        if not isinstance(operation, dict) or "op" not in operation or "path" not in operation:
+            raise JSONPatchError(f"Invalid operation: {operation!r}")
+        op, pointer = operation["op"], operation["path"]
+        tokens = _parse_pointer(pointer)
+        if op in ("add", "replace", "test") and "value" not in operation:
+            raise JSONPatchError(f"'{op}' requires a value")
+        if op == "add":
+            doc = _add(doc, tokens, copy.deepcopy(operation["value"]), pointer)
+        elif op == "remove":
+            _remove(doc, tokens, pointer)
+        elif op == "replace":
+            if not tokens:
+                doc = copy.deepcopy(operation["value"])
+                continue
+            _resolve(doc, tokens, pointer)
+            _remove(doc, tokens, pointer)
+            doc = _add(doc, tokens, copy.deepcopy(operation["value"]), pointer)
+        elif op in ("move", "copy"):
+            source = operation.get("from")
+            source_tokens = _parse_pointer(source)
+            if op == "move":
+                if tokens[:len(source_tokens)] == source_tokens and tokens != source_tokens:
+                    raise JSONPatchError(f"Cannot move {source} into its own child {pointer}")
+                value = _remove(doc, source_tokens, source)
+            else:
+                value = copy.deepcopy(_resolve(doc, source_tokens, source))
+            doc = _add(doc, tokens, value, pointer)
+        elif op == "test":
+            if _resolve(doc, tokens, pointer) != operation["value"]:
+                raise JSONPatchTestFailed(f"Test failed at {pointer}")
+        else:
+            raise JSONPatchError(f"Unknown operation: {op!r}")
+    return doc
+
+
+def apply_merge_patch(target, patch):
+    """Apply an RFC 7396 merge patch to a copy of `target` and return it"""
+    if not isinstance(patch, dict):
+        return copy.deepcopy(patch)
+    result = copy.deepcopy(target) if isinstance(target, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = apply_merge_patch(result.get(key), value)
+    return result
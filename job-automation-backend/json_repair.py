@@ -0,0 +1,339 @@
+"""
+Tolerant JSON parser for LLM output.
+
+Model output is usually almost-JSON: wrapped in prose or code fences, with
+trailing commas, comments, single quotes, unescaped quotes or newlines in
+strings, Python literals, or cut off when the token limit is hit. Instead of
+rewriting the text with regexes and hoping json.loads succeeds, this module
+parses it directly in one pass and repairs problems as it meets them:
+
+- text before the first `{`/`[` and after the top-level value is ignored
+- comments and code fences between tokens are skipped
+- missing or doubled commas, trailing commas and missing colons are tolerated
+- single-quoted strings, unquoted keys and True/False/None are accepted
+- a quote only closes a string when followed by a delimiter, so
+  `"said "hi" twice"` keeps its inner quotes
+- on truncation, open strings and containers are closed; a member whose
+  value was cut off before it began is dropped
+
+Valid JSON takes the json.loads fast path.
+"""
+
+import json
+import re
+
+_NUMBER = re.compile(r"-?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?")
+_IDENTIFIER = re.compile(r"[A-Za-z_$][\w$-]*")
+_LITERALS = {
+    "true": True, "True": True,
+    "false": False, "False": False,
+    "null": None, "None": None, "undefined": None, "NaN": None,
+}
+_ESCAPES = {'"': '"', "'": "'", "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+_WHITESPACE = " \t\r\n\ufeff"
+
+
+class JSONRepairError(ValueError):
+    """Raised when no JSON value can be recovered from the text"""
+
+
+class _Incomplete(Exception):
+    """A value was cut off before anything usable was read"""
+
+
+class _Parser:
+    def __init__(self, text: str):
+        self.text = text
+        self.pos = 0
+        self.n = len(text)
+        self.repairs = []
+
+    def repair(self, note: str):
+        if note not in self.repairs:
+            self.repairs.append(note)
+
+    def at_end(self) -> bool:
+        return self.pos >= self.n
+
+    def skip_whitespace(self):
+        """Skip whitespace, comments and code fences"""
+        text = self.text
+        while self.pos < self.n:
+            ch = text[self.pos]
+            if ch in _WHITESPACE:
+                self.pos += 1
+            elif text.startswith("//", self.pos) or text.startswith("```", self.pos) or ch == "#":
+                self.repair("removed comment or code fence")
+                end = text.find("\n", self.pos)
+                self.pos = self.n if end == -1 else end + 1
+            elif text.startswith("/*", self.pos):
+                self.repair("removed comment or code fence")
+                end = text.find("*/", self.pos + 2)
+                self.pos = self.n if end == -1 else end + 2
+            else:
+                break
+
+    def parse_value(self):
+        self.skip_whitespace()
+        if self.at_end():
+            raise _Incomplete()
+        ch = self.text[self.pos]
+        if ch == "{":
+            return self.parse_object()
+        if ch == "[":
+            return self.parse_array()
+        if ch in "\"'":
+            if ch == "'":
+                self.repair("converted single-quoted string")
+            return self.parse_string(ch)
+        if ch == "-" or ch == "." or ch.isdigit():
+            return self.parse_number()
+        return self.parse_bare_word()
+
+    def parse_object(self) -> dict:
+        self.pos += 1
+        result = {}
+        after_value = False
+        while True:
+            self.skip_whitespace()
+            if self.at_end():
+                self.repair("closed truncated object")
+                return result
+            ch = self.text[self.pos]
+            if ch == "}":
+                if result and not after_value:
+                    self.repair("removed extra comma")
+                self.pos += 1
+                return result
+            if ch == "]":
+                self.repair("fixed mismatched bracket")
+                self.pos += 1
+                return result
+            if ch == ",":
+                if not after_value:
+                    self.repair("removed extra comma")
+                self.pos += 1
+                after_value = False
+                continue
+            try:
+                key = self.parse_key()
+            except _Incomplete:
+                self.repair("closed truncated object")
+                return result
+            if key is None:
+                # Not a key at all; skip the character so parsing can move on
+                self.repair("skipped stray text")
+                self.pos += 1
+                continue
+            self.skip_whitespace()
+            if not self.at_end() and self.text[self.pos] in ":=":
+                self.pos += 1
+            elif not self.at_end() and self.text[self.pos] in ",}":
+                # A key with no value at all
+                self.repair("dropped key without value")
+                continue
+            else:
+                self.repair("inserted missing colon")
+            try:
+                result[key] = self.parse_value()
+            except _Incomplete:
+                self.repair("dropped truncated member")
+                return result
+            after_value = True
+            self.skip_to_delimiter("}")
+
+    def parse_array(self) -> list:
+        self.pos += 1
+        result = []
+        after_value = False
+        while True:
+            self.skip_whitespace()
+            if self.at_end():
+                self.repair("closed truncated array")
+                return result
+            ch = self.text[self.pos]
+            if ch == "]":
+                if result and not after_value:
+                    self.repair("removed extra comma")
+                self.pos += 1
+                return result
+            if ch == "}":
+                self.repair("fixed mismatched bracket")
+                self.pos += 1
+                return result
+            if ch == ",":
+                if not after_value:
+                    self.repair("removed extra comma")
+                self.pos += 1
+                after_value = False
+                continue
+            try:
+                result.append(self.parse_value())
+            except _Incomplete:
+                self.repair("dropped truncated element")
+                return result
+            after_value = True
+            self.skip_to_delimiter("]")
+
+    def skip_to_delimiter(self, closer: str):
+        """After a value: expect `,` or the closer; skip stray text up to the next delimiter"""
+        self.skip_whitespace()
+        if self.at_end():
+            return
+        ch = self.text[self.pos]
+        if ch in ",}]":
+            return
+        if ch in "\"'{[":
+            self.repair("inserted missing comma")
+            return
+        self.repair("skipped stray text")
+        while self.pos < self.n and self.text[self.pos] not in ",}]\n":
+            self.pos += 1
+
+    def parse_key(self):
+        """Quoted or bare key; None if the text here cannot start a key"""
+        ch = self.text[self.pos]
+        if ch in "\"'":
+            key = self.parse_string(ch)
+            if self.at_end():
+                raise _Incomplete()
+            return key
+        match = _IDENTIFIER.match(self.text, self.pos)
+        if not match:
+            return None
+        self.repair("quoted bare key")
+        self.pos = match.end()
+        if self.at_end():
+            raise _Incomplete()
+        return match.group(0)
+
+    def _closes_string(self, index: int) -> bool:
+        """Whether the quote at `index` ends the string: it must be followed by a delimiter"""
+        j = index + 1
+        saw_newline = False
+        while j < self.n and self.text[j] in _WHITESPACE:
+            saw_newline = saw_newline or self.text[j] == "\n"
+            j += 1
+        if j >= self.n:
+            return True
+        nxt = self.text[j]
+        if nxt in ",:}]":
+            return True
+        # `"a": "x"\n  "b": ...` is a missing comma, not an inner quote
+        return saw_newline and nxt in "\"'"
+
+    def parse_string(self, quote: str) -> str:
+        self.pos += 1
+        text = self.text
+        chunks = []
+        start = self.pos
+        while self.pos < self.n:
+            ch = text[self.pos]
+            if ch == "\\":
+                chunks.append(text[start:self.pos])
+                self.pos += 1
+                if self.at_end():
+                    break
+                esc = text[self.pos]
+                if esc == "u":
+                    code = text[self.pos + 1:self.pos + 5]
+                    if len(code) == 4 and all(c in "0123456789abcdefABCDEF" for c in code):
+                        chunks.append(chr(int(code, 16)))
+                        self.pos += 5
+                    else:
+                        self.repair("fixed invalid escape")
+                        chunks.append("u")
+                        self.pos += 1
+                else:
+                    if esc not in _ESCAPES:
+                        self.repair("fixed invalid escape")
+                    chunks.append(_ESCAPES.get(esc, esc))
+                    self.pos += 1
+                start = self.pos
+            elif ch == quote:
+                if self._closes_string(self.pos):
+                    chunks.append(text[start:self.pos])
+                    self.pos += 1
+                    return "".join(chunks)
+                self.repair("kept unescaped quote")
+                self.pos += 1
+            else:
+                if ch == "\n":
+                    self.repair("escaped newline in string")
+                self.pos += 1
+        chunks.append(text[start:self.pos])
+        self.repair("closed truncated string")
+        return "".join(chunks)
+
+    def parse_number(self):
+        match = _NUMBER.match(self.text, self.pos)
+        if not match:
+            # A lone "-" or "." (usually a cut-off number)
+            if self.pos + 1 >= self.n:
+                raise _Incomplete()
+            return self.parse_bare_word()
+        self.pos = match.end()
+        number = match.group(0)
+        rest = self.text[self.pos:self.pos + 32].lstrip(" \t")
+        if rest and (rest[0].isalpha() or rest[0] == "_"):
+            # "5 years" style values written without quotes
+            self.pos = match.start()
+            return self.parse_bare_word()
+        if number.startswith(".") or number.startswith("-.") or number.endswith("."):
+            self.repair("fixed number format")
+        if any(c in number for c in ".eE"):
+            return float(number)
+        return int(number)
+
+    def parse_bare_word(self):
+        match = _IDENTIFIER.match(self.text, self.pos)
+        if match and match.group(0) in _LITERALS:
+            self.pos = match.end()
+            return _LITERALS[match.group(0)]
+        if match and match.end() >= self.n and any(lit.startswith(match.group(0)) for lit in _LITERALS):
+            # "tru" at the very end: a cut-off literal
+            raise _Incomplete()
+        start = self.pos
+        while self.pos < self.n and self.text[self.pos] not in ",}]\n":
+            self.pos += 1
+        self.repair("quoted bare value")
+        return self.text[start:self.pos].strip()
+
+
+def repair_loads(text: str, repairs: list = None, expect: str = None):
+    """
+    Parse `text` leniently; `repairs`, if given, collects a note for each
+    kind of fix applied. With `expect="object"` (or "array") parsing starts
+    at the first '{' (or '['), so bracketed prose before the JSON such as
+    "Note [1]:" is skipped. Raises JSONRepairError if there is no JSON
+    object or array in the text.
+    """
+    openers = {None: "{[", "object": "{", "array": "["}
+    if expect not in openers:
+        raise ValueError(f"expect must be 'object', 'array' or None, not {expect!r}")
+    try:
+        value = json.loads(text)
+        if expect is None or isinstance(value, dict if expect == "object" else list):
+            return value
+    except (ValueError, TypeError):
+        pass
+    if not isinstance(text, str):
+        raise JSONRepairError("Expected text to parse")
+
+    starts = [i for i in (text.find(opener) for opener in openers[expect]) if i != -1]
+    if not starts:
+        raise JSONRepairError(f"No JSON {expect or 'object or array'} found")
+    parser = _Parser(text)
+    parser.pos = min(starts)
+    if parser.pos > 0:
+        parser.repair("skipped text before JSON")
+    try:
+        value = parser.parse_value()
+    except (_Incomplete, RecursionError) as e:
+        raise JSONRepairError(f"Could not recover JSON: {type(e).__name__}")
+    parser.skip_whitespace()
+    if not parser.at_end():
+        parser.repair("ignored text after JSON")
+    if repairs is not None:
+        repairs.extend(parser.repairs)
+    return value
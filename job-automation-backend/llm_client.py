@@ -0,0 +1,393 @@
+"""
+LLM client used by the resume pipeline.
+
+Calls go through an LLMBackend selected by `config.LLM_BACKEND`:
+
+- "ollama": HTTP calls to an Ollama server (default)
+- "llamacpp": the GGUF model at `config.MODEL_PATH`, loaded in-process with llama-cpp-python
+- "stub": deterministic canned output, for benchmarks and load tests without a model
+
+Backends return Ollama-shaped dicts (`response`, `done`, `prompt_eval_count`)
+so the metrics and parsing code here work the same for all of them.
+
+Resume prompts are split into a fixed system prompt (schema and rules) and
+a short per-resume prompt. Because the system prompt is identical on every
+call and comes first, the model server can reuse its KV cache for that
+prefix instead of re-encoding ~4 KB of instructions each time; `keep_alive`
+keeps the model, and with it the cache, resident between uploads.
+
+Prefill savings are measured from `prompt_eval_count`: the prefix size is
+learned once by `warm_prefix`, and each call's evaluated token count is
+compared against prefix + estimated per-call tokens.
+"""
+
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+
+import requests
+
+import config
+from metrics import (
+    LLM_REQUEST_DURATION, LLM_PROMPT_EVAL_TOKENS, LLM_PROMPT_TOKENS_SAVED, LLM_TIME_TO_FIRST_TOKEN,
+)
+
+llm_logger = logging.getLogger("jobapp.llm")
+
+# Rough size of a token in characters, only used to estimate per-call prompt size
+CHARS_PER_TOKEN = 4
+
+_prefix_tokens = {}
+_prefix_lock = threading.Lock()
+
+
+class LLMBackend:
+    """Interface every backend implements"""
+
+    name = "base"
+
+    @property
+    def model(self) -> str:
+        """Identifier of the loaded model, used in metrics and cache keys"""
+        raise NotImplementedError
+
+    def generate(self, prompt: str, system: str = None, options=None, schema=None) -> dict:
+        """
+        Run one completion; returns {"response": text, "prompt_eval_count": int or None}.
+        With a JSON `schema`, backends that support it constrain decoding to match it.
+        """
+        raise NotImplementedError
+
+    def stream(self, prompt: str, system: str = None, options=None, schema=None):
+        """
+        Yield {"response": text, "done": bool} chunks; the final chunk has
+        done=True and may carry prompt_eval_count. Closing the generator
+        must stop generation.
+        """
+        raise NotImplementedError
+
+
+class OllamaBackend(LLMBackend):
+    name = "ollama"
+
+    def __init__(self, url: str = None, model: str = None, keep_alive: str = None):
+        self.url = url or config.OLLAMA_URL
+        self._model = model or config.OLLAMA_MODEL
+        self.keep_alive = keep_alive or config.OLLAMA_KEEP_ALIVE
+
+    @property
+    def model(self) -> str:
+        return self._model
+
+    def _payload(self, prompt, system, options, stream, schema):
+        payload = {
+            "model": self._model,
+            "prompt": prompt,
+            "stream": stream,
+            "keep_alive": self.keep_alive,
+            "options": {"temperature": 0, **(options or {})},
+        }
+        if system:
+            payload["system"] = system
+        if schema:
+            # Structured outputs: Ollama turns the schema into a sampling grammar
+            payload["format"] = schema
+        return payload
+
+    def generate(self, prompt, system=None, options=None, schema=None):
+        response = requests.post(
+            f"{self.url}/api/generate",
+            json=self._payload(prompt, system, options, stream=False, schema=schema),
+            timeout=config.LLM_TIMEOUT_SECONDS,
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def stream(self, prompt, system=None, options=None, schema=None):
+        response = requests.post(
+            f"{self.url}/api/generate",
+            json=self._payload(prompt, system, options, stream=True, schema=schema),
+            stream=True,
+            timeout=config.LLM_TIMEOUT_SECONDS,
+        )
+        try:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                yield chunk
+                if chunk.get("done"):
+                    break
+        finally:
+            response.close()
+
+
+class LlamaCppBackend(LLMBackend):
+    """
+    In-process llama.cpp model. The model is loaded on first use and calls are
+    serialized, since a Llama instance is not thread-safe. llama.cpp reuses
+    the longest prompt prefix shared with the previous call, so the fixed
+    system prompt is only evaluated once as long as it comes first.
+    """
+
+    name = "llamacpp"
+
+    def __init__(self, model_path: str = None):
+        self.model_path = model_path or config.MODEL_PATH
+        self._llm = None
+        self._grammars = {}
+        self._lock = threading.Lock()
+
+    @property
+    def model(self) -> str:
+        return self.model_path.replace("\\", "/").rsplit("/", 1)[-1]
+
+    def _load(self):
+        if self._llm is None:
+            from llama_cpp import Llama
+
+            llm_logger.info(f"Loading llama.cpp model {self.model_path}")
+            self._llm = Llama(
+                model_path=self.model_path,
+                n_ctx=config.MODEL_CONTEXT_SIZE,
+                n_threads=config.MODEL_THREADS,
+                n_gpu_layers=config.MODEL_GPU_LAYERS,
+                verbose=False,
+                n_batch=512,
+                use_mmap=True,
+                use_mlock=False,
+                seed=42,
+            )
+        return self._llm
+
+    @staticmethod
+    def _prompt(prompt, system):
+        return f"{system}\n\n{prompt}" if system else prompt
+
+    def _grammar(self, schema):
+        """llama.cpp grammar for a JSON schema, compiled once per schema"""
+        key = json.dumps(schema, sort_keys=True)
+        if key not in self._grammars:
+            from llama_cpp import LlamaGrammar
+
+            self._grammars[key] = LlamaGrammar.from_json_schema(json.dumps(schema), verbose=False)
+        return self._grammars[key]
+
+    def _kwargs(self, options, schema):
+        options = options or {}
+        kwargs = {
+            "max_tokens": options.get("num_predict", -1),
+            "temperature": options.get("temperature", 0),
+        }
+        if schema:
+            kwargs["grammar"] = self._grammar(schema)
+        return kwargs
+
+    def generate(self, prompt, system=None, options=None, schema=None):
+        with self._lock:
+            output = self._load().create_completion(self._prompt(prompt, system), **self._kwargs(options, schema))
+        # llama.cpp reports the full prompt size, not how much of it was re-evaluated
+        return {"response": output["choices"][0]["text"], "prompt_eval_count": None}
+
+    def stream(self, prompt, system=None, options=None, schema=None):
+        with self._lock:
+            completion = self._load().create_completion(
+                self._prompt(prompt, system), stream=True, **self._kwargs(options, schema))
+            try:
+                for chunk in completion:
+                    yield {"response": chunk["choices"][0]["text"], "done": False}
+            finally:
+                completion.close()
+        yield {"response": "", "done": True}
+
+
+class StubBackend(LLMBackend):
+    """
+    Deterministic stand-in for a model. Every call returns the same complete
+    profile JSON (with name and email taken from the resume text when present),
+    which satisfies both the single-call and the sectioned prompts. `latency`
+    simulates generation time, spread across the streamed chunks.
+    """
+
+    name = "stub"
+    _EMAIL = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+    _RESUME_INTRO = re.compile(r"resume:[ \t]*\n", re.IGNORECASE)
+
+    def __init__(self, latency: float = None, chunk_size: int = 16):
+        self.latency = config.LLM_STUB_LATENCY_SECONDS if latency is None else latency
+        self.chunk_size = chunk_size
+
+    @property
+    def model(self) -> str:
+        return "stub"
+
+    def _output(self, prompt: str) -> str:
+        # Both the single-call and the section prompts introduce the resume with a "...resume:" line
+        resume = self._RESUME_INTRO.split(prompt, 1)[-1]
+        lines = [line.strip() for line in resume.splitlines() if line.strip()]
+        email = self._EMAIL.search(resume)
+        return json.dumps({
+            "personal_information": {
+                "full_name": lines[0][:80] if lines else "Jane Doe",
+                "email": email.group(0) if email else "jane.doe@example.com",
+                "phone": "+1 555 0100",
+                "city": "Springfield",
+                "country": "USA",
+            },
+            "job_preferences": {"linkedin": "", "github": "", "total_experience": "5 years"},
+            "work_experience": [{
+                "title": "Software Engineer",
+                "company": "Example Corp",
+                "location": "Remote",
+                "start_date": "2020-01",
+                "end_date": None,
+                "description": "Built things.\nShipped things.",
+            }],
+            "education": [{
+                "degree": "BSc Computer Science",
+                "school": "Example University",
+                "start_date": "2015-09",
+                "end_date": "2019-06",
+                "gpa": None,
+            }],
+            "skills": [{"name": "Python", "years": 5}, {"name": "SQL", "years": 3}],
+            "languages": ["English"],
+            "achievements": [],
+            "certificates": [],
+        }, indent=2)
+
+    def _prompt_tokens(self, prompt, system):
+        return (len(system or "") + len(prompt)) // CHARS_PER_TOKEN
+
+    def generate(self, prompt, system=None, options=None, schema=None):
+        if self.latency:
+            time.sleep(self.latency)
+        return {"response": self._output(prompt), "prompt_eval_count": self._prompt_tokens(prompt, system)}
+
+    def stream(self, prompt, system=None, options=None, schema=None):
+        output = self._output(prompt)
+        chunks = [output[i:i + self.chunk_size] for i in range(0, len(output), self.chunk_size)]
+        delay = self.latency / len(chunks) if self.latency else 0
+        for chunk in chunks:
+            if delay:
+                time.sleep(delay)
+            yield {"response": chunk, "done": False}
+        yield {"response": "", "done": True, "prompt_eval_count": self._prompt_tokens(prompt, system)}
+
+
+BACKENDS = {
+    OllamaBackend.name: OllamaBackend,
+    LlamaCppBackend.name: LlamaCppBackend,
+    StubBackend.name: StubBackend,
+}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend() -> LLMBackend:
+    """The backend configured by `config.LLM_BACKEND`, created on first use"""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            try:
+                backend_cls = BACKENDS[config.LLM_BACKEND]
+            except KeyError:
+                raise ValueError(f"Unknown LLM_BACKEND {config.LLM_BACKEND!r}, expected one of {sorted(BACKENDS)}")
+            _backend = backend_cls()
+        return _backend
+
+
+def set_backend(backend: LLMBackend):
+    """Replace the active backend (e.g. a StubBackend in benchmarks)"""
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+
+def model_name() -> str:
+    return get_backend().model
+
+
+def _prefix_key(model: str, system: str) -> str:
+    return hashlib.sha256(f"{model}|{system}".encode()).hexdigest()
+
+
+def _record_prompt_stats(operation: str, model: str, system, prompt: str, data: dict):
+    eval_count = data.get("prompt_eval_count")
+    if eval_count is None:
+        return
+    LLM_PROMPT_EVAL_TOKENS.observe(eval_count, operation=operation)
+    if not system:
+        return
+    prefix_tokens = _prefix_tokens.get(_prefix_key(model, system))
+    if prefix_tokens is None:
+        return
+    expected = prefix_tokens + len(prompt) // CHARS_PER_TOKEN
+    saved = min(prefix_tokens, max(0, expected - eval_count))
+    LLM_PROMPT_TOKENS_SAVED.inc(saved, operation=operation)
+    if config.DEBUG_LLM:
+        llm_logger.debug(f"Prompt eval: {eval_count} tokens, ~{saved} prefix tokens reused")
+
+
+def generate(prompt: str, system: str = None, options=None, schema=None,
+             operation: str = "resume_extraction") -> str:
+    """Blocking generation; returns the full response text"""
+    backend = get_backend()
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        data = backend.generate(prompt, system=system, options=options, schema=schema)
+        _record_prompt_stats(operation, backend.model, system, prompt, data)
+        outcome = "ok"
+        return data["response"]
+    finally:
+        LLM_REQUEST_DURATION.observe(time.perf_counter() - started, operation=operation,
+                                     model=backend.model, outcome=outcome)
+
+
+def stream_generate(prompt: str, system: str = None, options=None, schema=None,
+                    operation: str = "resume_extraction_stream"):
+    """
+    Yield response text chunks as the backend produces them.
+    Closing the generator stops generation.
+    """
+    backend = get_backend()
+    started = time.perf_counter()
+    first_token = True
+    stream = backend.stream(prompt, system=system, options=options, schema=schema)
+    try:
+        for chunk in stream:
+            if chunk.get("response"):
+                if first_token:
+                    # Time to first token is dominated by prompt prefill
+                    LLM_TIME_TO_FIRST_TOKEN.observe(time.perf_counter() - started, operation=operation)
+                    first_token = False
+                yield chunk["response"]
+            if chunk.get("done"):
+                _record_prompt_stats(operation, backend.model, system, prompt, chunk)
+                break
+    finally:
+        stream.close()
+
+
+def warm_prefix(system: str):
+    """
+    Evaluate `system` once so the backend caches it, and remember how many
+    tokens it takes. Returns the token count, or None if the backend is unavailable.
+    """
+    backend = get_backend()
+    try:
+        eval_count = backend.generate("Resume:", system=system, options={"num_predict": 1}).get("prompt_eval_count")
+    except Exception as e:
+        llm_logger.warning(f"Prompt prefix warm-up failed: {e}")
+        return None
+    if eval_count is not None:
+        with _prefix_lock:
+            _prefix_tokens[_prefix_key(backend.model, system)] = eval_count
+        llm_logger.info(f"Warmed prompt prefix: {eval_count} tokens cached for {backend.model}")
+    return eval_count
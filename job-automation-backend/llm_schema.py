@@ -0,0 +1,62 @@
+"""
+JSON schemas for constrained LLM decoding, generated from schemas.py.
+
+With a schema the backend only samples tokens that keep the output valid
+(Ollama's `format`, a llama.cpp grammar), so the output parses on the
+first try and types such as `years: int | None` cannot drift into "6+".
+
+Schemas are flattened (no `$ref`s, titles or defaults) because grammar
+converters support only a subset of JSON Schema.
+"""
+
+from functools import lru_cache
+
+from schemas import ResumeExtraction
+
+_DROPPED_KEYS = ("title", "default", "description")
+
+
+def _inline(node, defs):
+    if isinstance(node, list):
+        return [_inline(item, defs) for item in node]
+    if not isinstance(node, dict):
+        return node
+    if "$ref" in node:
+        return _inline(defs[node["$ref"].rsplit("/", 1)[-1]], defs)
+    flat = {}
+    for key, value in node.items():
+        if key in _DROPPED_KEYS or key == "$defs":
+            continue
+        if key == "properties":
+            # Property names are data, not keywords; keep them all
+            flat[key] = {name: _inline(prop, defs) for name, prop in value.items()}
+        else:
+            flat[key] = _inline(value, defs)
+    return flat
+
+
+def model_json_schema(model) -> dict:
+    """Self-contained JSON schema of a Pydantic model"""
+    schema = model.model_json_schema()
+    return _inline(schema, schema.get("$defs", {}))
+
+
+@lru_cache(maxsize=None)
+def resume_extraction_schema() -> dict:
+    """Schema for the single-call extraction output (cached; do not mutate)"""
+    return model_json_schema(ResumeExtraction)
+
+
+@lru_cache(maxsize=None)
+def _section_schema(keys: tuple) -> dict:
+    full = resume_extraction_schema()
+    return {
+        "type": "object",
+        "properties": {key: full["properties"][key] for key in keys},
+        "required": list(keys),
+    }
+
+
+def section_schema(keys) -> dict:
+    """Schema for one sectioned-extraction call returning only `keys`"""
+    return _section_schema(tuple(keys))
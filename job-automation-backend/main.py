@@ -1,15 +1,18 @@
 from fastapi import FastAPI, Depends, HTTPException, status, Query, File, UploadFile, Request
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, load_only, noload, selectinload
 from database import SessionLocal, engine, Job, Base
 import models
 from schemas import UserCreate, UserLogin, UserResponse, Token, UserUpdate, JobResult, ProfileCreate, ProfileUpdate, ProfileResponse
-from auth import get_password_hash, verify_password, create_access_token, decode_access_token
+from auth import (
+    get_password_hash_async, verify_and_update_password_async, create_access_token, decode_access_token,
+    shutdown_password_pool,
+)
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
 import requests
 from bs4 import BeautifulSoup
-from typing import List, Optional
-from pydantic import BaseModel
+from typing import List, Literal, Optional
+from pydantic import BaseModel, Field, ValidationError
 from urllib.parse import urljoin
 import json
 import re
@@ -18,25 +21,50 @@ import time
 from threading import Lock
 import threading
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy import inspect as sa_inspect
 from datetime import datetime, timedelta
 import os
 import shutil
-import tempfile
-from fastapi.staticfiles import StaticFiles
-import json as pyjson
-from pdfminer.high_level import extract_text as extract_pdf_text
-import docx
-import uuid
-from models import Profile
+from compression import CompressionMiddleware, PrecompressedStaticFiles, precompress_static_assets
+from metrics import (
+    MetricsMiddleware, instrument_engine, instrument_scraper, record_ingestion_success, render_metrics,
+    CONTENT_TYPE as METRICS_CONTENT_TYPE,
+)
+from fastapi.responses import Response, FileResponse, StreamingResponse
+from fastapi.encoders import jsonable_encoder
+from fastapi.concurrency import run_in_threadpool
+from resume_parser import ResumeParseError, parse_resume, validate_resume_filename, RESUME_EXTRACTION_INSTRUCTIONS
+from resume_sections import SECTION_SYSTEM_PROMPT
+import llm_client
+from resume_batch import BatchTooLargeError, expand_uploads, import_resumes, read_uploads
+from resume_jobs import ResumeJobQueue, QueueFullError
+from resume_cache import ResumeParseCache
+from ttl_cache import TTLCache
+from session_store import SessionSweeper, create_session_store
+from job_lookup import JOB_PAYLOAD_COLUMNS, fetch_job_payloads
+from applications import APPLICATION_STATUSES, record_status_updates, session_status
+from event_bus import EventBus
+from json_patch import JSON_PATCH_CONTENT_TYPE, JSONPatchError, JSONPatchTestFailed, apply_json_patch, apply_merge_patch
+import profiling
+from profiling import ProfilingMiddleware, profiled, profile_run
+from text_extraction import ExtractionTimeout, get_extraction_service, shutdown_extraction_service
+from models import Profile, ProfileSkill, coerce_section_item, normalize_skill_name
 import torch
 from contextlib import redirect_stdout, redirect_stderr
 import io
 
 # Import configuration (this will configure logging automatically)
 import config
+import logging
 
-# Always enable LLM debug output
-config.DEBUG_LLM = True
+http_logger = logging.getLogger("jobapp.http")
+auth_logger = logging.getLogger("jobapp.auth")
+profiles_logger = logging.getLogger("jobapp.profiles")
+search_logger = logging.getLogger("jobapp.search")
+fetcher_logger = logging.getLogger("jobapp.fetcher")
+scraper_logger = logging.getLogger("jobapp.scraper")
+extension_logger = logging.getLogger("jobapp.extension")
+llm_logger = logging.getLogger("jobapp.llm")
 
 app = FastAPI()
 
@@ -52,9 +80,35 @@ app.add_middleware(
     allow_headers=["*"] ,
 )
 
+# Compress large JSON responses (search results, profiles) for remote clients
+if config.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=config.COMPRESSION_MIN_SIZE,
+        gzip_level=config.GZIP_LEVEL,
+        brotli_quality=config.BROTLI_QUALITY,
+    )
+
+# Opt-in per-request profiling (X-Profile header)
+if config.PROFILING_ENABLED:
+    app.add_middleware(
+        ProfilingMiddleware,
+        directory=config.PROFILING_DIR,
+        token=config.PROFILING_TOKEN,
+        max_results=config.PROFILING_MAX_RESULTS,
+    )
+
+# Per-route latency histograms, exposed on /metrics
+if config.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # Create all tables
 Base.metadata.create_all(bind=engine)  # type: ignore
 
+if config.METRICS_ENABLED:
+    instrument_engine(engine)
+profiling.instrument_engine(engine)
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
 
 def get_db():
@@ -64,41 +118,74 @@ def get_db():
     finally:
         db.close()
 
+# Recently authenticated users by token subject (email). Entries are detached
+# from their session, so handlers must re-query a user they want to modify.
+# invalidate() only reaches this process: other workers keep serving a changed
+# or deleted user until the entry expires, hence the short AUTH_USER_CACHE_TTL_SECONDS.
+user_cache = TTLCache("auth_user", max_entries=config.AUTH_USER_CACHE_MAX_ENTRIES,
+                      ttl_seconds=config.AUTH_USER_CACHE_TTL_SECONDS)
+
+# Pushes session, application status, resume and new-job events to SSE subscribers
+event_bus = EventBus(max_queue=config.EVENTS_QUEUE_SIZE)
+
 def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
     try:
         payload = decode_access_token(token)
         if payload is None or "sub" not in payload:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+        user = user_cache.get(payload["sub"])
+        if user is not None:
+            return user
         user = db.query(models.User).filter(models.User.email == payload["sub"]).first()
         if user is None:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+        db.expunge(user)
+        user_cache.set(payload["sub"], user)
         return user
     except Exception:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
 
+def get_admin_user(current_user: models.User = Depends(get_current_user)):
+    if current_user.email.lower() not in config.ADMIN_EMAILS:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return current_user
+
 @app.post("/register", response_model=UserResponse)
-def register(user: UserCreate, db: Session = Depends(get_db)):
-    db_user = db.query(models.User).filter(models.User.email == user.email).first()
+async def register(user: UserCreate, db: Session = Depends(get_db)):
+    db_user = await run_in_threadpool(lambda: db.query(models.User).filter(models.User.email == user.email).first())
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash_async(user.password)
     new_user = models.User(
         email=user.email, 
         hashed_password=hashed_password
     )  # type: ignore
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-    return new_user
+
+    def save():
+        db.add(new_user)
+        db.commit()
+        db.refresh(new_user)
+        return new_user
+
+    return await run_in_threadpool(save)
 
 @app.post("/login", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    print(f"[LOGIN DEBUG] Received username: {form_data.username}")
-    print(f"[LOGIN DEBUG] Received password: {form_data.password}")
-    user = db.query(models.User).filter(models.User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+    auth_logger.debug("Login attempt", extra={"username": form_data.username})
+    user = await run_in_threadpool(lambda: db.query(models.User).filter(models.User.email == form_data.username).first())
+    if not user:
         raise HTTPException(status_code=401, detail="Incorrect email or password")
-    access_token = create_access_token(data={"sub": user.email})
+    email = user.email
+    valid, new_hash = await verify_and_update_password_async(form_data.password, user.hashed_password)
+    if not valid:
+        raise HTTPException(status_code=401, detail="Incorrect email or password")
+    if new_hash:
+        # Stored with an outdated bcrypt cost; replace it now that we know the password
+        auth_logger.info("Rehashing password with current cost factor", extra={"user_id": user.id})
+        user.hashed_password = new_hash
+        await run_in_threadpool(db.commit)
+        user_cache.invalidate(email)
+    access_token = create_access_token(data={"sub": email})
     return {"access_token": access_token, "token_type": "bearer"}
 
 @app.get("/me", response_model=UserResponse)
@@ -110,20 +197,36 @@ def get_profile(current_user: models.User = Depends(get_current_user)):
     return current_user
 
 @app.put("/profile", response_model=UserResponse)
-def update_profile(update: UserUpdate, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
-    # Only allow updating email and password for User model
-    if update.email is not None:
-        setattr(current_user, 'email', update.email)
-    if update.password is not None:
-        setattr(current_user, 'hashed_password', get_password_hash(update.password))
-    db.commit()
-    db.refresh(current_user)
-    return current_user
+async def update_profile(update: UserUpdate, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+    hashed_password = await get_password_hash_async(update.password) if update.password is not None else None
+
+    def save():
+        # current_user may come from user_cache (detached), so load a session-bound copy to modify
+        user = db.query(models.User).filter(models.User.id == current_user.id).first()
+        if user is None:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+        old_email = user.email
+        # Only allow updating email and password for User model
+        if update.email is not None:
+            setattr(user, 'email', update.email)
+        if hashed_password is not None:
+            setattr(user, 'hashed_password', hashed_password)
+        db.commit()
+        db.refresh(user)
+        user_cache.invalidate(old_email, user.email)
+        return user
+
+    return await run_in_threadpool(save)
 
 @app.get("/")
 def read_root():
     return {"message": "Job Automation Backend is running!"}
 
+@app.get("/metrics", include_in_schema=False)
+def metrics_endpoint():
+    """Prometheus text exposition of request, DB, scraper, ingestion and LLM metrics"""
+    return Response(render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
 TOP_ASHBY_COMPANIES = [
     "openai", "ramp", "linear", "runway", "clever", "vanta", "posthog", "replit", "hex", "carta",
     "mercury", "tome", "arc", "tandem", "twelve", "tango", "census", "tigergraph", "turing", "tulip",
@@ -153,6 +256,7 @@ TOP_RIPPLING_COMPANIES = ["momentumcareers", "rippling", "incredible-health", "f
 CACHE_TTL = 60  # 1 minute for testing
 
 def upsert_job(session: Session, job_dict):
+    """Insert or update a job by link; returns the Job if it was newly inserted"""
     try:
         # First try to find existing job
         job = session.query(Job).filter_by(link=job_dict["link"]).first()
@@ -165,6 +269,7 @@ def upsert_job(session: Session, job_dict):
             job = Job(**job_dict)
             session.add(job)
             session.flush()  # This will raise an error if there's a unique constraint violation
+            return job
     except Exception as e:
         # If we get a unique constraint error, try to update the existing job
         if "UNIQUE constraint failed" in str(e) or "IntegrityError" in str(e):
@@ -176,12 +281,20 @@ def upsert_job(session: Session, job_dict):
                     setattr(job, k, v)
             else:
                 # If we still can't find it, something is wrong - skip this job
-                print(f"Warning: Could not upsert job with link {job_dict['link']}")
+                fetcher_logger.warning(f"Could not upsert job with link {job_dict['link']}")
         else:
             # Re-raise other exceptions
             raise
 
-def background_job_fetcher():
+def background_job_fetcher(profile: bool = False):
+    """Fetch jobs from every source and upsert them; set `profile` to record a profiling run"""
+    if profile or config.PROFILE_INGESTION:
+        with profile_run("ingestion", config.PROFILING_DIR, max_results=config.PROFILING_MAX_RESULTS):
+            return _fetch_and_store_jobs()
+    return _fetch_and_store_jobs()
+
+def _fetch_and_store_jobs():
+    run_started = time.perf_counter()
     all_jobs = []
     all_sources = [
         ("Ashby", TOP_ASHBY_COMPANIES, fetch_ashby_jobs),
@@ -190,9 +303,10 @@ def background_job_fetcher():
         # ("Rippling", TOP_RIPPLING_COMPANIES, lambda c: fetch_rippling_jobs(c, "")),
     ]
     for source, companies, fetch_fn in all_sources:
-        print(f"[Fetcher] Starting {source} job collection...")
+        fetcher_logger.info(f"Starting {source} job collection...")
         total = 0
         with ThreadPoolExecutor(max_workers=8) as executor:
+            fetch_fn = instrument_scraper(source, fetch_fn)
             futures = {executor.submit(fetch_fn, company): company for company in companies}
             for future in as_completed(futures):
                 try:
@@ -203,19 +317,27 @@ def background_job_fetcher():
                         all_jobs.append(job)
                 except Exception:
                     pass
-        print(f"[Fetcher] {source}: {total} jobs found")
+        fetcher_logger.info(f"{source}: {total} jobs found")
 
     # Upsert jobs into DB, silently skip jobs with missing or empty link
     session = SessionLocal()
     try:
+        inserted = []
         for job_dict in all_jobs:
             if not job_dict.get("link"):
                 continue
-            upsert_job(session, job_dict)
+            job = upsert_job(session, job_dict)
+            if job is not None:
+                inserted.append(job)
         session.commit()
+        record_ingestion_success(time.perf_counter() - run_started)
+        # A rollback in upsert_job discards earlier inserts, so only announce rows that were committed
+        new_ids = [job.id for job in inserted if sa_inspect(job).persistent]
+        if new_ids:
+            event_bus.publish("jobs", {"type": "new_jobs", "jobs": fetch_job_payloads(session, "id", new_ids)})
     except Exception as e:
         session.rollback()
-        print(f"DB error: {e}")
+        fetcher_logger.error(f"DB error: {e}")
     finally:
         session.close()
 
@@ -226,6 +348,7 @@ def background_job_fetcher():
 #     t.start()
 
 @app.get("/search", response_model=List[JobResult])
+@profiled
 def search_jobs(title: str, db: Session = Depends(get_db)):
     query = db.query(Job)
     if title:
@@ -244,6 +367,7 @@ def search_jobs(title: str, db: Session = Depends(get_db)):
     ]
 
 @app.get("/search_database", response_model=List[JobResult])
+@profiled
 def search_database_only(title: str, location: str = "", limit: int = 50):
     """
     Fast database-only search (no live scraping)
@@ -270,16 +394,17 @@ def search_database_only(title: str, location: str = "", limit: int = 50):
                 source=str(job.source)
             ))
         
-        print(f"[Search] Database-only search returned {len(results)} jobs")
+        search_logger.info(f"Database-only search returned {len(results)} jobs")
         return results
         
     except Exception as e:
-        print(f"[Search] Database error: {e}")
+        search_logger.error(f"Database error: {e}")
         return []
     finally:
         session.close()
 
 @app.get("/search_all", response_model=List[JobResult])
+@profiled
 def search_all_jobs(title: str, location: str = "", limit: int = 50):
     """
     Search for jobs across all platforms (database + live scraping of Ashby, Greenhouse, Lever)
@@ -305,16 +430,16 @@ def search_all_jobs(title: str, location: str = "", limit: int = 50):
                 source=str(job.source)
             ))
     except Exception as e:
-        print(f"[Search] Database error: {e}")
+        search_logger.error(f"Database error: {e}")
     finally:
         session.close()
     
     # Live scraping of working sources
     try:
-        print(f"[Search] Live scraping for: {title}")
+        search_logger.info(f"Live scraping for: {title}")
         
         # Ashby jobs
-        ashby_jobs = fetch_ashby_jobs("openai")  # Test with OpenAI
+        ashby_jobs = instrument_scraper("Ashby", fetch_ashby_jobs)("openai")  # Test with OpenAI
         for job in ashby_jobs[:limit//6]:
             all_jobs.append(JobResult(
                 id=job.get("id", 0),
@@ -327,7 +452,7 @@ def search_all_jobs(title: str, location: str = "", limit: int = 50):
             ))
         
         # Greenhouse jobs
-        greenhouse_jobs = fetch_greenhouse_jobs("stripe", title)
+        greenhouse_jobs = instrument_scraper("Greenhouse", fetch_greenhouse_jobs)("stripe", title)
         for job in greenhouse_jobs[:limit//6]:
             all_jobs.append(JobResult(
                 id=job.get("id", 0),
@@ -340,7 +465,7 @@ def search_all_jobs(title: str, location: str = "", limit: int = 50):
             ))
             
     except Exception as e:
-        print(f"[Search] Live scraping error: {e}")
+        search_logger.error(f"Live scraping error: {e}")
     
     # Remove duplicates and limit results
     seen_links = set()
@@ -352,7 +477,7 @@ def search_all_jobs(title: str, location: str = "", limit: int = 50):
         if len(unique_jobs) >= limit:
             break
     
-    print(f"[Search] Returning {len(unique_jobs)} unique jobs")
+    search_logger.info(f"Returning {len(unique_jobs)} unique jobs")
     return unique_jobs
 
 def fetch_ashby_jobs(company: str) -> List[dict]:
@@ -448,7 +573,7 @@ def fetch_greenhouse_jobs(company: str, title: str) -> list:
     soup = BeautifulSoup(resp.text, 'html.parser')
     job_rows = soup.select('tr.job-post')
     if not job_rows or len(job_rows) < 1:
-        print(f"[Greenhouse] Skipping {company}: no job rows found (unexpected layout)")
+        scraper_logger.debug(f"[Greenhouse] Skipping {company}: no job rows found (unexpected layout)")
         return []
     nav_titles = [
         'Life at', 'Benefits', 'University', 'See open roles', 'Current job openings at',
@@ -650,7 +775,7 @@ def fetch_lever_jobs(company: str, title: str) -> list:
                         "link": job_link,
                     })
                 if company == "haus":
-                    print(f"[Lever Debug] Found {len(jobs)} jobs for haus via API")
+                    scraper_logger.debug(f"[Lever] Found {len(jobs)} jobs for haus via API")
                 return jobs
             except Exception as e:
                 pass
@@ -661,12 +786,12 @@ def fetch_lever_jobs(company: str, title: str) -> list:
         url = f"https://jobs.lever.co/{company}"
         resp = requests.get(url, headers=headers, timeout=30)
         if resp.status_code != 200:
-            print(f"[Lever Debug] Failed to fetch {url}, status {resp.status_code}")
+            scraper_logger.debug(f"[Lever] Failed to fetch {url}, status {resp.status_code}")
             return []
         soup = BeautifulSoup(resp.text, 'html.parser')
         # Find job postings: links that match /{company}/<job_id>
         job_elements = [elem for elem in soup.find_all('a', href=True) if f'/{company}/' in elem['href'] and len(elem['href'].split('/')) == 4]
-        print(f"[Lever Debug] Found {len(job_elements)} job links for {company}")
+        scraper_logger.debug(f"[Lever] Found {len(job_elements)} job links for {company}")
         for job_elem in job_elements:
             try:
                 job_title = job_elem.get_text(strip=True)
@@ -696,7 +821,7 @@ def fetch_lever_jobs(company: str, title: str) -> list:
                             else:
                                 description = ''
                 except Exception as e:
-                    print(f"[Lever Debug] Error fetching/parsing job detail for {job_link}: {e}")
+                    scraper_logger.debug(f"[Lever] Error fetching/parsing job detail for {job_link}: {e}")
                 jobs.append({
                     "title": job_title,
                     "company": company.title(),
@@ -705,477 +830,170 @@ def fetch_lever_jobs(company: str, title: str) -> list:
                     "link": job_link,
                 })
             except Exception as e:
-                print(f"[Lever Debug] Error processing job element: {e}")
+                scraper_logger.debug(f"[Lever] Error processing job element: {e}")
                 continue
-        print(f"[Lever Debug] Returning {len(jobs)} jobs for {company}")
+        scraper_logger.debug(f"[Lever] Returning {len(jobs)} jobs for {company}")
         return jobs
     except Exception as e:
-        print(f"[Lever Debug] Exception in fetch_lever_jobs for {company}: {e}")
+        scraper_logger.warning(f"[Lever] Exception in fetch_lever_jobs for {company}: {e}")
     return [] 
 
-@app.post("/upload_resume_llm", response_model=ProfileResponse)
-def upload_resume_llm(file: UploadFile = File(...), title: str = Query(None, description="Profile title"), db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
-    """
-    Upload and parse resume using LLM with split extraction approach
-    """
-    if not file:
-        raise HTTPException(status_code=400, detail="No file uploaded")
-    
-    # Validate file type
-    allowed_extensions = {'.pdf', '.doc', '.docx'}
-    file_extension = os.path.splitext(file.filename)[1].lower()
-    if file_extension not in allowed_extensions:
-        raise HTTPException(status_code=400, detail=f"Unsupported file type. Allowed: {', '.join(allowed_extensions)}")
-    
-    # Create temporary file
-    tmp_path = None
+def publish_resume_job_finished(job):
+    event_bus.publish(f"user:{job.user_id}", {
+        "type": "resume_parsed", "job_id": job.id, "status": job.status,
+        "profile_id": (job.result or {}).get("id"), "error": job.error,
+    })
+
+resume_job_queue = ResumeJobQueue(
+    max_workers=config.RESUME_JOB_WORKERS,
+    max_pending=config.RESUME_JOB_MAX_PENDING,
+    ttl_seconds=config.RESUME_JOB_TTL_SECONDS,
+    on_finish=publish_resume_job_finished,
+)
+
+resume_cache = ResumeParseCache(config.RESUME_CACHE_DIR, config.RESUME_CACHE_MAX_BYTES) if config.RESUME_CACHE_ENABLED else None
+
+@app.on_event("startup")
+def warm_llm_prompt_prefix():
+    """Pre-fill the fixed extraction instructions in the background so the first upload reuses them"""
+    if not config.LLM_PREFIX_WARMUP:
+        return
+    system = SECTION_SYSTEM_PROMPT if config.LLM_EXTRACTION_MODE == "sectioned" else RESUME_EXTRACTION_INSTRUCTIONS
+    threading.Thread(target=llm_client.warm_prefix, args=(system,), daemon=True).start()
+
+@app.on_event("shutdown")
+def stop_worker_pools():
+    resume_job_queue.shutdown()
+    resume_batch_executor.shutdown(wait=False, cancel_futures=True)
+    shutdown_password_pool()
+    shutdown_extraction_service()
+    session_sweeper.stop()
+
+@profiled
+def process_resume_job(job, content: bytes, filename: str, title: Optional[str], user_id: int):
+    """Runs on a resume job worker: parse the resume and save it as a new Profile"""
+    profile_data = parse_resume(content, filename, title, progress=job.set_status, cache=resume_cache,
+                                on_section=job.add_section)
+    job.set_status("saving")
+    db = SessionLocal()
     try:
-        # Create a temporary file with the correct extension
-        suffix = file_extension
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp_file:
-            tmp_path = tmp_file.name
-            # Write uploaded file content to temporary file
-            content = file.file.read()
-            tmp_file.write(content)
-            tmp_file.flush()
-        
-        if config.DEBUG_LLM:
-            print(f"[DEBUG] Temporary file created: {tmp_path}")
-            print(f"[DEBUG] File size: {len(content)} bytes")
-        
-        # Extract text from the file
-        resume_text = extract_text_from_file(tmp_path)
-        
-        if not resume_text or len(resume_text.strip()) < 50:
-            raise HTTPException(status_code=400, detail="Could not extract meaningful text from the uploaded file. Please ensure the file contains readable text.")
-        
+        # Use the ProfileCreate schema for validation
+        new_profile = save_new_profile(db, user_id, ProfileCreate(**profile_data))
         if config.DEBUG_LLM:
-            print(f"[DEBUG] Extracted text length: {len(resume_text)} characters")
-            print(f"[DEBUG] First 200 characters: {resume_text[:200]}...")
-        
+            llm_logger.debug(f"New profile created with ID: {new_profile.id}")
+        return jsonable_encoder(ProfileResponse.model_validate(new_profile))
     except Exception as e:
+        db.rollback()
         if config.DEBUG_LLM:
-            print(f"[DEBUG] Error extracting text: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to extract text from file: {str(e)}")
+            llm_logger.warning(f"Error saving profile: {e}")
+        raise ResumeParseError(500, f"Failed to save profile: {str(e)}")
     finally:
-        try:
-            os.remove(tmp_path)
-            print(f"[DEBUG] Temporary file removed: {tmp_path}")
-        except Exception:
-            pass
-    
-    # Check if current_user is valid
-    if not current_user:
-        raise HTTPException(status_code=401, detail="User authentication failed. Please log in again.")
-    
-    if not hasattr(current_user, 'id') or current_user.id is None:
-        raise HTTPException(status_code=401, detail="Invalid user session. Please log in again.")
-    
-    # Extract resume email for comparison and logging
-    resume_email = None
-    
-    if config.DEBUG_LLM:
-        print(f"[DEBUG] Using Ollama for single-call extraction...")
-        print(f"[DEBUG] Resume text length: {len(resume_text)} characters")
-    
-    # Create a comprehensive prompt for Ollama
-    prompt = f"""
-You are an expert data extraction agent. Your task is to extract structured information from the provided resume and return a **strictly valid JSON** object matching the schema defined below. All keys must always be present, even if values are missing.
-
-## Output Format (MUST MATCH EXACTLY):
-
-{{
-  "personal_information": {{
-    "full_name": "string",
-    "email": "string",
-    "phone": "string",
-    "image_url": "string or null",
-    "gender": "string or null",
-    "address": "string or null",
-    "city": "string or null",
-    "state": "string or null",
-    "zip_code": "string or null",
-    "country": "string or null",
-    "citizenship": "string or null"
-  }},
-  "work_experience": [
-    {{
-      "title": "string",
-      "company": "string",
-      "location": "string",
-      "start_date": "string (YYYY-MM or similar)",
-      "end_date": "string or null (use null if current)",
-      "description": "string"
-    }}
-  ],
-  "education": [
-    {{
-      "degree": "string",
-      "school": "string (institution name)",
-      "start_date": "string (YYYY-MM or similar)",
-      "end_date": "string (YYYY-MM or similar) or null if current",
-      "gpa": "string or null"
-    }}
-  ],
-  "skills": [
-    {{
-      "name": "string",
-      "years": "integer or null"
-    }}
-  ],
-  "languages": ["string", "string", "..."],
-  "job_preferences": {{
-    "linkedin": "string",
-    "twitter": "string",
-    "github": "string",
-    "portfolio": "string",
-    "other_url": "string",
-    "notice_period": "string",
-    "total_experience": "string",
-    "default_experience": "string",
-    "highest_education": "string",
-    "companies_to_exclude": "string",
-    "willing_to_relocate": "string",
-    "driving_license": "string",
-    "visa_requirement": "string",
-    "race_ethnicity": "string"
-  }},
-  "achievements": [
-    {{
-      "title": "string",
-      "issuer": "string or null",
-      "date": "string or null",
-      "description": "string or null"
-    }}
-  ],
-  "certificates": [
-    {{
-      "name": "string",
-      "organization": "string or null",
-      "issue_date": "string or null",
-      "expiry_date": "string or null",
-      "credential_id": "string or null",
-      "credential_url": "string or null"
-    }}
-  ]
-}}
-
-## IMPORTANT RULES:
-- Return **only valid JSON**, no additional explanation or text.
-- All fields in `job_preferences` must be **strings**. If a value is numeric, boolean, or a list, convert it to a string. If missing, return an empty string.
-- Dates should be in a consistent format (e.g., `YYYY-MM`). If not available, return `null`.
-- If a field is not mentioned in the resume, fill it with `null`, `""`, or an empty list `[]`, depending on the data type.
-- `skills`, `achievements`, and `certificates` must be returned as structured objects — **not strings**.
-- Assume any structured info (e.g., LinkedIn URLs, GitHub, salary info, visa, notice period) might appear anywhere in the resume — including footers, headers, or sidebars.
-- If the job description is in bullet points, concatenate all bullet points into a single string, separated by newlines. Include all bullet points and narrative text under that job as the description. Do not omit any bullet points, even if there are many.
-
-Example for a work experience:
-
-Software Engineer, Acme Corp
-Jan 2020 – Present
-• Built X
-• Improved Y
-• Led Z
-
-Output:
-{{
-  "work_experience": [
-    {{
-      "title": "Software Engineer",
-      "company": "Acme Corp",
-      "start_date": "2020-01",
-      "end_date": "",
-      "description": "• Built X\\n• Improved Y\\n• Led Z"
-    }}
-  ]
-}}
-
-Now extract the structured data from the following resume:
-{resume_text}
-
-Return only the JSON.
-"""
-    
-    if config.DEBUG_LLM:
-        print(f"\n[DEBUG] ========================================")
-        print(f"[DEBUG] SINGLE CALL WITH OLLAMA")
-        print(f"[DEBUG] ========================================")
-        print(f"[DEBUG] Prompt length: {len(prompt)} characters")
-        print(f"[DEBUG] Starting LLM generation...")
-    
-    # Instead, define a helper to call Ollama
-    def call_ollama(prompt, model="llama3"):
-        response = requests.post(
-            "http://localhost:11434/api/generate",
-            json={
-                "model": model,
-                "prompt": prompt,
-                "stream": False,
-                "temperature": 0
-            }
-        )
-        response.raise_for_status()
-        return response.json()["response"]
+        db.close()
 
+async def enqueue_resume_upload(file: UploadFile, title: Optional[str], current_user: models.User):
+    if not file:
+        raise HTTPException(status_code=400, detail="No file uploaded")
     try:
-        # Call Ollama with comprehensive prompt
-        output = call_ollama(prompt)
-        if config.DEBUG_LLM:
-            print(f"[DEBUG] Raw output length: {len(output)} characters")
-            print(f"[DEBUG] Raw output: {output}")
-        # Extract the JSON object from the output, even if extra text is present
-        start = output.find('{')
-        end = output.rfind('}')
-        if start != -1 and end != -1 and end > start:
-            json_str = output[start:end+1]
-        else:
-            json_str = output  # fallback
-        cleaned_output = json_str.strip()
-        # Remove Markdown code blocks
-        cleaned_output = re.sub(r'```json\s*', '', cleaned_output, flags=re.IGNORECASE)
-        cleaned_output = re.sub(r'```\s*', '', cleaned_output)
-        cleaned_output = re.sub(r'^\s*```\s*$', '', cleaned_output, flags=re.MULTILINE)
-        # Remove comments and trailing commas
-        cleaned_output = re.sub(r'^\s*//.*$', '', cleaned_output, flags=re.MULTILINE)
-        cleaned_output = re.sub(r',\s*([}\]])', r'\1', cleaned_output)
-        # Try to parse the JSON
-        try:
-            profile_json = pyjson.loads(cleaned_output)
-            if config.DEBUG_LLM:
-                print(f"[DEBUG] JSON parsed successfully!")
-                print(f"[DEBUG] Profile keys: {list(profile_json.keys())}")
-            
-            # Extract personal information from the new structure
-            if "personal_information" in profile_json:
-                personal_info = profile_json["personal_information"]
-                # Flatten personal information for database compatibility
-                profile_json.update({
-                    "full_name": personal_info.get("full_name", ""),
-                    "email": personal_info.get("email", ""),
-                    "phone": personal_info.get("phone", ""),
-                    "image_url": personal_info.get("image_url"),
-                    "gender": personal_info.get("gender"),
-                    "address": personal_info.get("address"),
-                    "city": personal_info.get("city"),
-                    "state": personal_info.get("state"),
-                    "zip_code": personal_info.get("zip_code"),
-                    "country": personal_info.get("country"),
-                    "citizenship": personal_info.get("citizenship")
-                })
-                # Remove the personal_information wrapper to avoid confusion
-                del profile_json["personal_information"]
-                
-        except Exception as e:
-            if config.DEBUG_LLM:
-                print(f"[DEBUG] JSON parsing failed: {e}")
-                print(f"[DEBUG] Cleaned output: {cleaned_output}")
-            # Fallback to empty profile
-            profile_json = {
-                "full_name": "",
-                "email": "",
-                "phone": "",
-                "image_url": None,
-                "gender": None,
-                "work_experience": [],
-                "education": [],
-                "skills": [],
-                "languages": [],
-                "job_preferences": {},
-                "achievements": [],
-                "certificates": []
-            }
-
-        # --- PATCH OLLAMA OUTPUT TO MATCH SCHEMA ---
-        def ensure_list_of_dicts(val):
-            if isinstance(val, list):
-                # If it's a list of strings, convert to list of dicts
-                if all(isinstance(x, str) for x in val):
-                    return [{"name": x, "years": None} for x in val]
-                if all(isinstance(x, dict) for x in val):
-                    # Clean up skills years field - convert strings like "6+" to integers
-                    cleaned_skills = []
-                    for skill in val:
-                        cleaned_skill = skill.copy()
-                        if 'years' in cleaned_skill:
-                            years_val = cleaned_skill['years']
-                            if isinstance(years_val, str):
-                                # Extract number from strings like "6+", "4+ years", etc.
-                                import re
-                                match = re.search(r'(\d+)', years_val)
-                                if match:
-                                    cleaned_skill['years'] = int(match.group(1))
-                                else:
-                                    cleaned_skill['years'] = None
-                            elif years_val is None:
-                                cleaned_skill['years'] = None
-                            else:
-                                # Try to convert to int, fallback to None
-                                try:
-                                    cleaned_skill['years'] = int(years_val)
-                                except (ValueError, TypeError):
-                                    cleaned_skill['years'] = None
-                        cleaned_skills.append(cleaned_skill)
-                    return cleaned_skills
-            if isinstance(val, str):
-                items = [x.strip() for x in val.split(",") if x.strip()]
-                return [{"name": x, "years": None} for x in items]
-            return []
+        validate_resume_filename(file.filename)
+    except ResumeParseError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    content = await file.read()
+    try:
+        return resume_job_queue.submit(current_user.id, file.filename, process_resume_job,
+                                       content, file.filename, title, current_user.id)
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
 
-        def ensure_list_of_objs(val, keys):
-            if isinstance(val, list):
-                if all(isinstance(x, dict) for x in val):
-                    # Clean up work experience fields - ensure no None values for required fields
-                    cleaned_items = []
-                    for item in val:
-                        cleaned_item = {}
-                        for key in keys:
-                            value = item.get(key)
-                            if value is None:
-                                cleaned_item[key] = ""  # Convert None to empty string
-                            else:
-                                cleaned_item[key] = str(value)  # Ensure it's a string
-                        cleaned_items.append(cleaned_item)
-                    return cleaned_items
-                if all(isinstance(x, str) for x in val):
-                    return [{keys[0]: x} for x in val]
-            if isinstance(val, str):
-                items = [x.strip() for x in val.split(",") if x.strip()]
-                return [{keys[0]: x} for x in items]
-            return []
+@app.post("/upload_resume_llm", response_model=ProfileResponse)
+async def upload_resume_llm(file: UploadFile = File(...), title: str = Query(None, description="Profile title"), current_user: models.User = Depends(get_current_user)):
+    """
+    Upload and parse resume using LLM, waiting for the result.
+    Parsing runs on the resume job queue, so waiting here does not hold a worker thread.
+    """
+    job = await enqueue_resume_upload(file, title, current_user)
+    await job.wait()
+    if job.status == "failed":
+        raise HTTPException(status_code=job.status_code or 500, detail=job.error)
+    return job.result
 
-        def fix_languages(val):
-            if isinstance(val, list):
-                # If it's a list of dicts with 'name', extract the names
-                if all(isinstance(x, dict) and 'name' in x for x in val):
-                    return [x['name'] for x in val]
-                if all(isinstance(x, str) for x in val):
-                    return val
-            if isinstance(val, str):
-                return [val]
-            return []
+@app.post("/upload_resume_llm/jobs", status_code=202)
+async def submit_resume_job(file: UploadFile = File(...), title: str = Query(None, description="Profile title"), current_user: models.User = Depends(get_current_user)):
+    """
+    Queue a resume for parsing and return its job ID immediately.
+    Follow progress with GET /upload_resume_llm/jobs/{job_id} or its /events SSE stream.
+    """
+    job = await enqueue_resume_upload(file, title, current_user)
+    return {"job_id": job.id, "status": job.status}
 
-        profile_json["skills"] = ensure_list_of_dicts(profile_json.get("skills", []))
-        profile_json["achievements"] = ensure_list_of_objs(profile_json.get("achievements", []), ["title"])
-        profile_json["certificates"] = ensure_list_of_objs(profile_json.get("certificates", []), ["name"])
-        profile_json["languages"] = fix_languages(profile_json.get("languages", []))
-        
-        # Clean up work experience specifically
-        if "work_experience" in profile_json:
-            work_exp = profile_json["work_experience"]
-            if isinstance(work_exp, list):
-                cleaned_work_exp = []
-                for exp in work_exp:
-                    if isinstance(exp, dict):
-                        # Ignore work experience entries without a company value
-                        if not exp.get("company"):
-                            continue
-                        cleaned_exp = {}
-                        for field in ["title", "company", "location", "start_date", "end_date", "description"]:
-                            value = exp.get(field)
-                            if value is None:
-                                cleaned_exp[field] = ""  # Convert None to empty string
-                            else:
-                                cleaned_exp[field] = str(value)  # Ensure it's a string
-                        cleaned_work_exp.append(cleaned_exp)
-                profile_json["work_experience"] = cleaned_work_exp
-        # --- END PATCH ---
-
-        # Extract resume email
-        if "email" in profile_json:
-            resume_email = profile_json["email"]
-    except Exception as e:
-        if config.DEBUG_LLM:
-            print(f"[DEBUG] LLM call failed: {e}")
-        raise HTTPException(status_code=500, detail=f"LLM processing failed: {str(e)}")
-    
-    if config.DEBUG_LLM:
-        print(f"[DEBUG] Final profile contains:")
-        print(f"[DEBUG] - Work experiences: {len(profile_json.get('work_experience', []))}")
-        print(f"[DEBUG] - Education entries: {len(profile_json.get('education', []))}")
-        print(f"[DEBUG] - Skills: {len(profile_json.get('skills', []))}")
-        print(f"[DEBUG] - Languages: {len(profile_json.get('languages', []))}")
-    
-    # Ensure all required fields exist
-    required_fields = [
-        "full_name", "email", "phone", "image_url", "gender", "work_experience", 
-        "education", "skills", "languages", "job_preferences", "achievements", "certificates"
-    ]
-    
-    for field in required_fields:
-        if field not in profile_json:
-            if field in ["work_experience", "education", "skills", "languages", "achievements", "certificates"]:
-                profile_json[field] = []
-            elif field == "job_preferences":
-                profile_json[field] = {}
-            else:
-                profile_json[field] = None
-    
+@app.post("/upload_resume_llm/stream")
+async def upload_resume_llm_stream(file: UploadFile = File(...), title: str = Query(None, description="Profile title"), current_user: models.User = Depends(get_current_user)):
+    """
+    Upload a resume and stream its parse over Server-Sent Events in the same response:
+    status changes, each profile section as soon as the model finishes it, then the saved profile.
+    """
+    job = await enqueue_resume_upload(file, title, current_user)
+
+    async def events():
+        yield f"event: job\ndata: {json.dumps({'job_id': job.id})}\n\n"
+        async for event in job.sse_events():
+            yield event
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+resume_batch_executor = ThreadPoolExecutor(max_workers=config.RESUME_BATCH_CONCURRENCY, thread_name_prefix="resume-batch")
+
+@app.post("/upload_resume_llm/batch")
+async def upload_resume_batch(files: List[UploadFile] = File(...), title: str = Query(None, description="Profile title for every imported resume"), current_user: models.User = Depends(get_current_user)):
+    """
+    Import many resumes at once: upload several files and/or zip archives.
+    Resumes are parsed in parallel (up to RESUME_BATCH_CONCURRENCY at a time),
+    profiles are bulk-inserted, and one NDJSON status line per file is streamed back.
+    """
     try:
-        # Always create a new Profile for each upload
-        from fastapi.encoders import jsonable_encoder
-        from schemas import ProfileCreate
-        # Prepare the profile data
-        profile_data = {
-            'title': title or "Resume Profile",
-            'full_name': profile_json.get('full_name', None),
-            'email': profile_json.get('email', None),
-            'phone': profile_json.get('phone', None),
-            'image_url': profile_json.get('image_url', None),
-            'address': profile_json.get('address', None),
-            'city': profile_json.get('city', None),
-            'state': profile_json.get('state', None),
-            'zip_code': profile_json.get('zip_code', None),
-            'country': profile_json.get('country', None),
-            'citizenship': profile_json.get('citizenship', None),
-            'gender': profile_json.get('gender', None),
-            'skills': profile_json.get('skills', []),
-            'languages': profile_json.get('languages', []),
-            'work_experience': profile_json.get('work_experience', []),
-            'education': profile_json.get('education', []),
-            'job_preferences': profile_json.get('job_preferences', {}),
-            'achievements': profile_json.get('achievements', []),
-            'certificates': profile_json.get('certificates', []),
-        }
-        # Use the ProfileCreate schema for validation
-        profile_create = ProfileCreate(**profile_data)
-        # Call the create_profile endpoint logic directly
-        from fastapi import Request
-        new_profile = create_profile(profile_create, current_user=current_user, db=db)
-        db.commit()
-        db.refresh(new_profile)
-        if config.DEBUG_LLM:
-            print(f"[DEBUG] New profile created with ID: {new_profile.id}")
-        # Return the created profile data
-        return ProfileResponse(
-            id=new_profile.id,
-            user_id=current_user.id,
-            title=new_profile.title,
-            full_name=new_profile.full_name,
-            email=new_profile.email,
-            phone=new_profile.phone,
-            image_url=new_profile.image_url,
-            address=new_profile.address,
-            city=new_profile.city,
-            state=new_profile.state,
-            zip_code=new_profile.zip_code,
-            country=new_profile.country,
-            citizenship=new_profile.citizenship,
-            gender=new_profile.gender,
-            skills=new_profile.skills,
-            languages=new_profile.languages,
-            work_experience=new_profile.work_experience,
-            education=new_profile.education,
-            job_preferences=new_profile.job_preferences,
-            achievements=new_profile.achievements,
-            certificates=new_profile.certificates,
-            created_at=new_profile.created_at,
-            updated_at=new_profile.updated_at
-        )
-    except Exception as e:
-        db.rollback()
-        if config.DEBUG_LLM:
-            print(f"[DEBUG] Error saving profile: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to save profile: {str(e)}")
+        uploads = await read_uploads(files, config.RESUME_BATCH_MAX_FILES, config.RESUME_BATCH_MAX_FILE_BYTES,
+                                     config.RESUME_BATCH_MAX_UPLOAD_BYTES)
+        resume_files, rejected = expand_uploads(uploads, config.RESUME_BATCH_MAX_FILES, config.RESUME_BATCH_MAX_FILE_BYTES)
+    except BatchTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    if not resume_files and not rejected:
+        raise HTTPException(status_code=400, detail="No resumes found in upload")
+    user_id = current_user.id
+
+    def parse(filename, content):
+        # Validate here so one bad resume fails alone instead of its whole insert chunk
+        try:
+            return ProfileCreate(**parse_resume(content, filename, title, cache=resume_cache))
+        except ValidationError as e:
+            raise ResumeParseError(422, f"Parsed resume is not a valid profile: {e}")
+
+    def save_batch(rows):
+        db = SessionLocal()
+        try:
+            return save_new_profiles(db, user_id, [profile for _, profile in rows])
+        finally:
+            db.close()
+
+    lines = import_resumes(resume_files, rejected, parse, save_batch, resume_batch_executor,
+                           insert_batch_size=config.RESUME_BATCH_INSERT_SIZE)
+    return StreamingResponse(lines, media_type="application/x-ndjson",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/upload_resume_llm/jobs/{job_id}")
+def get_resume_job(job_id: str, current_user: models.User = Depends(get_current_user)):
+    job = resume_job_queue.get(job_id, user_id=current_user.id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Resume job not found")
+    return job.to_dict()
+
+@app.get("/upload_resume_llm/jobs/{job_id}/events")
+def stream_resume_job(job_id: str, current_user: models.User = Depends(get_current_user)):
+    """Server-Sent Events stream of a resume job's status changes"""
+    job = resume_job_queue.get(job_id, user_id=current_user.id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Resume job not found")
+    return StreamingResponse(job.sse_events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 class DeleteResponse(BaseModel):
     message: str
@@ -1188,33 +1006,63 @@ def test_pdf_parse(file: UploadFile = File(...)):
     """Test endpoint to extract and return text from a PDF file."""
     if not file.filename or not file.filename.lower().endswith('.pdf'):
         raise HTTPException(status_code=400, detail="Please upload a PDF file.")
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-        tmp.write(file.file.read())
-        tmp_path = tmp.name
     try:
-        text = extract_pdf_text(tmp_path)
-    finally:
-        os.remove(tmp_path)
+        text = get_extraction_service().extract(file.file.read(), ".pdf")
+    except ExtractionTimeout as e:
+        raise HTTPException(status_code=422, detail=str(e))
     return TestPdfResponse(text=text[:1000])  # Return first 1000 chars for preview
 
 LOGOS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logos")
-app.mount("/logos", StaticFiles(directory=LOGOS_DIR), name="logos")
-
-def extract_text_from_file(file_path):
-    ext = file_path.split('.')[-1].lower()
-    if ext == 'pdf':
-        return extract_pdf_text(file_path)
-    elif ext in ('doc', 'docx'):
-        doc = docx.Document(file_path)
-        return '\n'.join([p.text for p in doc.paragraphs])
-    elif ext == 'txt':
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return f.read()
-    else:
-        return '' 
-
-# Store active application sessions
-application_sessions = {}
+if config.PRECOMPRESS_STATIC_ASSETS:
+    precompress_static_assets(LOGOS_DIR)
+app.mount("/logos", PrecompressedStaticFiles(directory=LOGOS_DIR), name="logos")
+
+def event_stream(subscription, first_events=()):
+    """SSE response for `subscription`, optionally starting with `first_events`"""
+    async def events():
+        try:
+            for event in first_events:
+                yield f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+            async for line in subscription.sse(config.EVENTS_HEARTBEAT_SECONDS):
+                yield line
+        finally:
+            event_bus.unsubscribe(subscription)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/events")
+async def stream_user_events(current_user: models.User = Depends(get_current_user)):
+    """
+    Server-Sent Events for the current user: `session_created`, `session_status`,
+    `application_status` and `resume_parsed` (a queued resume finished).
+    """
+    return event_stream(event_bus.subscribe(f"user:{current_user.id}", kind="user"))
+
+@app.get("/jobs/events")
+async def stream_new_jobs(title: str = "", location: str = "", company: str = "", source: str = ""):
+    """
+    Server-Sent Events announcing newly ingested jobs (`new_jobs`) that match a
+    saved search. Filters are case-insensitive substrings, like /search_database.
+    """
+    filters = {name: value.lower() for name, value in
+               {"title": title, "location": location, "company": company, "source": source}.items() if value}
+
+    def matching(event):
+        jobs = [job for job in event["jobs"]
+                if all(value in (job.get(name) or "").lower() for name, value in filters.items())]
+        return {**event, "jobs": jobs} if jobs else None
+
+    return event_stream(event_bus.subscribe("jobs", kind="jobs", transform=matching))
+
+# Active application sessions (shared by all workers, expire after SESSION_TTL_SECONDS)
+session_store = create_session_store(config.SESSION_STORE_BACKEND, SessionLocal, config.SESSION_TTL_SECONDS,
+                                     redis_url=config.SESSION_REDIS_URL)
+session_sweeper = SessionSweeper(session_store, config.SESSION_SWEEP_INTERVAL_SECONDS)
+
+@app.on_event("startup")
+def start_session_sweeper():
+    session_sweeper.start()
 
 class CreateSessionRequest(BaseModel):
     job_ids: List[int]
@@ -1228,16 +1076,13 @@ def create_session(request: CreateSessionRequest, db: Session = Depends(get_db),
     if not request.job_ids:
         raise HTTPException(status_code=400, detail="No jobs selected")
     
-    # Generate a unique session ID
-    session_id = str(uuid.uuid4())
-    
-    # Store the session data with job IDs
-    application_sessions[session_id] = {
-        "user_id": current_user.id,
+    # Store the session data with job IDs, plus a snapshot of the jobs so the app's poll is a single read
+    session_id = session_store.create(current_user.id, {
         "job_ids": request.job_ids,
-        "created_at": datetime.utcnow(),
+        "jobs": fetch_job_payloads(db, "id", request.job_ids),
         "status": "pending"
-    }
+    })
+    event_bus.publish(f"user:{current_user.id}", {"type": "session_created", "session_id": session_id})
     
     return {
         "session_id": session_id,
@@ -1253,110 +1098,206 @@ def setup_chrome_extension(selected_jobs: List[str], db: Session = Depends(get_d
     if not selected_jobs:
         raise HTTPException(status_code=400, detail="No jobs selected")
     
-    # Generate a unique session ID
-    session_id = str(uuid.uuid4())
-    
-    # Store the session data
-    application_sessions[session_id] = {
-        "user_id": current_user.id,
+    # Store the session data, plus a snapshot of the jobs so the extension's poll is a single read
+    session_id = session_store.create(current_user.id, {
         "selected_jobs": selected_jobs,
-        "created_at": datetime.utcnow(),
+        "jobs": fetch_job_payloads(db, "link", selected_jobs),
         "status": "pending"
-    }
+    })
+    event_bus.publish(f"user:{current_user.id}", {"type": "session_created", "session_id": session_id})
     
     return {
         "session_id": session_id,
         "message": "Chrome extension session created successfully"
     }
 
+def session_jobs(session_data: dict) -> list:
+    """The session's job snapshot; sessions created before snapshots were stored are looked up in bulk"""
+    if session_data.get("jobs") is not None:
+        return session_data["jobs"]
+    db = SessionLocal()
+    try:
+        # Handle both job_ids (for desktop app) and selected_jobs (for chrome extension)
+        if "job_ids" in session_data:
+            return fetch_job_payloads(db, "id", session_data["job_ids"])
+        return fetch_job_payloads(db, "link", session_data.get("selected_jobs", []))
+    finally:
+        db.close()
+
 @app.get("/chrome-extension/jobs/{session_id}")
 def get_jobs_for_extension(session_id: str):
     """
     Get job data for Chrome extension or desktop app.
     This endpoint is called by the extension/app to get the selected jobs.
     """
-    if session_id not in application_sessions:
+    session_data = session_store.get(session_id)
+    if session_data is None:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    session_data = application_sessions[session_id]
-    
-    # Get the actual job data from the database
-    db = SessionLocal()
-    try:
-        jobs = []
-        
-        # Handle both job_ids (for desktop app) and selected_jobs (for chrome extension)
-        if "job_ids" in session_data:
-            # Desktop app sends job IDs
-            for job_id in session_data["job_ids"]:
-                job = db.query(Job).filter(Job.id == job_id).first()
-                if job:
-                    jobs.append({
-                        "id": job.id,
-                        "title": job.title,
-                        "company": job.company,
-                        "location": job.location,
-                        "description": job.description,
-                        "link": job.link,
-                        "source": job.source
-                    })
-        elif "selected_jobs" in session_data:
-            # Chrome extension sends job links
-            for job_link in session_data["selected_jobs"]:
-                job = db.query(Job).filter(Job.link == job_link).first()
-                if job:
-                    jobs.append({
-                        "id": job.id,
-                        "title": job.title,
-                        "company": job.company,
-                        "location": job.location,
-                        "description": job.description,
-                        "link": job.link,
-                        "source": job.source
-                    })
-        
-        return {
-            "jobs": jobs,
-            "session_id": session_id,
-            "total_jobs": len(jobs)
-        }
-    finally:
-        db.close()
+    jobs = session_jobs(session_data)
+    return {
+        "jobs": jobs,
+        "session_id": session_id,
+        "total_jobs": len(jobs)
+    }
+
+@app.get("/chrome-extension/events/{session_id}")
+async def stream_session_events(session_id: str):
+    """
+    Server-Sent Events for an extension session: a `session` event with the
+    current jobs and status first, then `application_status` and `session_status`
+    changes, so the extension doesn't need to poll /chrome-extension/jobs/{session_id}.
+    """
+    # Subscribe before reading the snapshot so no change falls in between
+    subscription = event_bus.subscribe(f"session:{session_id}", kind="session")
+    session_data = await run_in_threadpool(session_store.get, session_id)
+    if session_data is None:
+        event_bus.unsubscribe(subscription)
+        raise HTTPException(status_code=404, detail="Session not found")
+    jobs = await run_in_threadpool(session_jobs, session_data)
+    snapshot = {"type": "session", "session_id": session_id, "status": session_data.get("status"), "jobs": jobs}
+    return event_stream(subscription, first_events=[snapshot])
 
 @app.post("/chrome-extension/update-status/{session_id}")
 def update_application_status(session_id: str, job_id: int, status: str):
     """
     Update application status for a specific job.
     Called by the Chrome extension or desktop app when it completes an application.
+    Prefer the batch endpoint below when reporting several jobs.
     """
-    if session_id not in application_sessions:
+    session_data = session_store.get(session_id)
+    if session_data is None:
         raise HTTPException(status_code=404, detail="Session not found")
-    
-    # Update the job status in the database
+    if status not in APPLICATION_STATUSES:
+        raise HTTPException(status_code=422, detail=f"Unknown status: {status}")
+
+    job_ids = [job["id"] for job in session_jobs(session_data)]
+    if job_id not in job_ids:
+        raise HTTPException(status_code=404, detail="Job not found in session")
+
     db = SessionLocal()
     try:
-        job = db.query(Job).filter(Job.id == job_id).first()
-        if job:
-            # You might want to create an Application model to track this
-            # For now, we'll just log it
-            print(f"Job {job_id} application status updated to: {status}")
-        
+        result = record_status_updates(db, session_data["user_id"], session_id, [{"job_id": job_id, "status": status}])
+        if result["unknown_jobs"]:
+            raise HTTPException(status_code=404, detail="Job not found")
+        publish_status_changes(session_id, session_data["user_id"], result["changes"])
+        if result["changes"]:
+            advance_session(db, session_id, session_data, job_ids)
+        extension_logger.info(f"Job {job_id} application status updated to: {status}")
         return {"message": "Status updated successfully"}
     finally:
         db.close()
 
+def publish_status_changes(session_id: str, user_id: int, changes):
+    if changes:
+        event = {"type": "application_status", "session_id": session_id, "changes": changes}
+        event_bus.publish(f"session:{session_id}", event)
+        event_bus.publish(f"user:{user_id}", event)
+
+def advance_session(db, session_id: str, session_data: dict, job_ids):
+    """
+    Move the session to "in_progress", or to "completed" once every job has a
+    final status. A completed session stays readable until its TTL expires.
+    """
+    status = session_status(db, session_data["user_id"], job_ids)
+    if status == session_data.get("status") or not session_store.update(session_id, {"status": status}):
+        return
+    event = {"type": "session_status", "session_id": session_id, "status": status}
+    event_bus.publish(f"session:{session_id}", event)
+    event_bus.publish(f"user:{session_data['user_id']}", event)
+    extension_logger.info(f"Session {session_id} is {status}")
+
+class ApplicationStatusUpdate(BaseModel):
+    job_id: int
+    status: Literal[APPLICATION_STATUSES]
+    at: Optional[datetime] = None  # when the transition happened on the client
+
+class ApplicationStatusBatch(BaseModel):
+    updates: List[ApplicationStatusUpdate] = Field(..., max_length=1000)
+
+@app.post("/chrome-extension/update-status/{session_id}/batch")
+def update_application_statuses(session_id: str, batch: ApplicationStatusBatch):
+    """
+    Record many status transitions in one request and one transaction.
+    Transitions for the same job are coalesced; the last one wins. Jobs that
+    are not part of the session are skipped and listed in `outside_session`.
+    """
+    session_data = session_store.get(session_id)
+    if session_data is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    job_ids = [job["id"] for job in session_jobs(session_data)]
+
+    db = SessionLocal()
+    try:
+        result = record_status_updates(db, session_data["user_id"], session_id,
+                                       [update.model_dump() for update in batch.updates], session_job_ids=job_ids)
+        publish_status_changes(session_id, session_data["user_id"], result["changes"])
+        if result["changes"]:
+            advance_session(db, session_id, session_data, job_ids)
+    finally:
+        db.close()
+    extension_logger.info(f"Session {session_id}: {result['created']} applications created, {result['updated']} updated")
+    return result
+
 @app.middleware("http")
 async def log_cors_headers(request: Request, call_next):
+    if not http_logger.isEnabledFor(logging.DEBUG):
+        return await call_next(request)
     origin = request.headers.get("origin")
-    print(f"[CORS DEBUG] Incoming request from Origin: {origin}")
     response = await call_next(request)
-    print(f"[CORS DEBUG] Response headers: {dict(response.headers)}")
-    return response 
+    http_logger.debug(
+        "CORS request",
+        extra={"path": request.url.path, "origin": origin, "response_headers": dict(response.headers)},
+    )
+    return response
+
+# Returned by GET /profiles?summary=true (enough for the profile picker)
+PROFILE_SUMMARY_FIELDS = ("id", "title", "full_name", "updated_at")
 
-@app.get("/profiles", response_model=List[ProfileResponse])
-def list_profiles(current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
-    profiles = db.query(Profile).filter(Profile.user_id == current_user.id).all()
-    return profiles
+def parse_profile_fields(fields: Optional[str], summary: bool):
+    """Requested ProfileResponse fields (always including id), or None for the full profile"""
+    if summary:
+        return list(PROFILE_SUMMARY_FIELDS)
+    if not fields:
+        return None
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in requested if name not in ProfileResponse.model_fields]
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown profile fields: {', '.join(unknown)}")
+    return ["id"] + [name for name in dict.fromkeys(requested) if name != "id"]
+
+def project_profiles(query, fields: List[str]) -> List[dict]:
+    """
+    Load only `fields`: plain columns are selected directly and only the
+    requested sections' child tables are queried. Rows become dicts without
+    going through ProfileResponse.
+    """
+    sections = {name: relation for name, (relation, _) in Profile.ITEM_SECTIONS.items()}
+    sections["job_preferences"] = "preference_rows"
+    columns = [getattr(Profile, name) for name in fields if name not in sections]
+    wanted = [name for name in fields if name in sections]
+    if not wanted:
+        return [dict(row._mapping) for row in query.with_entities(*columns).all()]
+    if any(name in Profile.ITEM_SECTIONS for name in wanted):
+        columns.append(Profile.null_sections)
+    options = [load_only(*columns)]
+    options += [selectinload(getattr(Profile, relation)) if name in wanted else noload(getattr(Profile, relation))
+                for name, relation in sections.items()]
+    return [{name: getattr(profile, name) for name in fields} for profile in query.options(*options).all()]
+
+@app.get("/profiles", response_model=None)
+@profiled
+def list_profiles(skill: Optional[str] = Query(None, description="Only profiles listing this skill (case-insensitive)"),
+                  fields: Optional[str] = Query(None, description="Comma-separated profile fields to return, e.g. id,title,full_name"),
+                  summary: bool = Query(False, description="Return only id, title, full_name and updated_at"),
+                  current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
+    query = db.query(Profile).filter(Profile.user_id == current_user.id).order_by(Profile.id)
+    if skill:
+        query = query.filter(Profile.skill_rows.any(ProfileSkill.normalized_name == normalize_skill_name(skill)))
+    projection = parse_profile_fields(fields, summary)
+    if projection is not None:
+        return project_profiles(query, projection)
+    return [ProfileResponse.model_validate(profile) for profile in query.all()]
 
 @app.get("/profiles/{profile_id}", response_model=ProfileResponse)
 def get_profile_by_id(profile_id: int, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
@@ -1365,30 +1306,61 @@ def get_profile_by_id(profile_id: int, current_user: models.User = Depends(get_c
         raise HTTPException(status_code=404, detail="Profile not found")
     return profile
 
+def save_new_profile(db: Session, user_id: int, profile: ProfileCreate) -> Profile:
+    profile_data = profile.dict(exclude_unset=True, exclude={"id", "created_at", "updated_at"})
+    new_profile = Profile(user_id=user_id, **profile_data)
+    db.add(new_profile)
+    db.commit()
+    db.refresh(new_profile)
+    return new_profile
+
+def save_new_profiles(db: Session, user_id: int, profiles: List[ProfileCreate]) -> List[int]:
+    """Insert many profiles in one flush; returns their ids in input order"""
+    if not profiles:
+        return []
+    # The unit of work batches each table into multi-row INSERT ... RETURNING statements
+    new_profiles = [
+        Profile(user_id=user_id, **profile.model_dump(exclude={"id", "created_at", "updated_at"}))
+        for profile in profiles
+    ]
+    try:
+        db.add_all(new_profiles)
+        db.flush()
+        ids = [profile.id for profile in new_profiles]
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return ids
+
 @app.post("/profiles", response_model=ProfileResponse)
 def create_profile(profile: ProfileCreate, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
-    print("[DEBUG] /profiles POST called by user:", current_user.email if current_user else None)
-    print("[DEBUG] Incoming profile data:", profile.dict())
+    profiles_logger.debug("/profiles POST called", extra={"user_id": current_user.id if current_user else None})
     try:
-        profile_data = profile.dict(exclude_unset=True, exclude={"id", "created_at", "updated_at"})
-        new_profile = Profile(user_id=current_user.id, **profile_data)
-        db.add(new_profile)
-        db.commit()
-        db.refresh(new_profile)
-        print("[DEBUG] Profile saved successfully, id:", new_profile.id)
+        new_profile = save_new_profile(db, current_user.id, profile)
+        profiles_logger.debug(f"Profile saved successfully, id: {new_profile.id}")
         return new_profile
     except Exception as e:
-        import traceback
-        print(f"[DEBUG] Exception in /profiles POST: {type(e).__name__}: {e}")
-        traceback.print_exc()
+        profiles_logger.exception(f"Exception in /profiles POST: {type(e).__name__}: {e}")
         raise HTTPException(status_code=500, detail=f"Profile save failed: {str(e)}")
 
 @app.put("/profiles/{profile_id}", response_model=ProfileResponse)
 def update_profile_by_id(profile_id: int, update: dict, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
-    print(f"[DEBUG] Updating profile {profile_id} with data: {update}")
+    profiles_logger.debug(f"Updating profile {profile_id}", extra={"fields": list(update.keys())})
     profile = db.query(Profile).filter(Profile.id == profile_id, Profile.user_id == current_user.id).first()
     if not profile:
         raise HTTPException(status_code=404, detail="Profile not found")
+
+    # List sections are stored row by row, so validate their items up front
+    sections = {
+        field: [coerce_section_item(Profile.ITEM_SECTIONS[field][1], item) for item in value]
+        if isinstance(value, list) else value
+        for field, value in update.items() if field in Profile.ITEM_SECTIONS and value is not None
+    }
+    try:
+        update = {**update, **ProfileUpdate.model_validate(sections).model_dump(include=set(sections))}
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     
     try:
         # Handle partial updates by updating only the fields that are provided
@@ -1400,7 +1372,7 @@ def update_profile_by_id(profile_id: int, update: dict, current_user: models.Use
                     if isinstance(value, dict):
                         setattr(profile, field, value)
                     else:
-                        print(f"[DEBUG] Invalid job_preferences format: {type(value)}")
+                        profiles_logger.debug(f"Invalid job_preferences format: {type(value)}")
                 elif field in ["skills", "languages", "work_experience", "education", "achievements", "certificates"]:
                     # Handle list fields
                     if value is not None:
@@ -1409,16 +1381,67 @@ def update_profile_by_id(profile_id: int, update: dict, current_user: models.Use
                     # Handle simple fields
                     setattr(profile, field, value)
             else:
-                print(f"[DEBUG] Field {field} not found in Profile model")
+                profiles_logger.debug(f"Field {field} not found in Profile model")
         
         db.commit()
         db.refresh(profile)
-        print(f"[DEBUG] Profile {profile_id} updated successfully")
+        profiles_logger.debug(f"Profile {profile_id} updated successfully")
+        return profile
+    except Exception as e:
+        profiles_logger.error(f"Error updating profile: {e}")
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Failed to update profile: {str(e)}")
+
+@app.patch("/profiles/{profile_id}", response_model=ProfileResponse)
+async def patch_profile(profile_id: int, request: Request, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
+    """
+    Partially update a profile. Send `application/json-patch+json` for an RFC 6902
+    JSON Patch, or `application/merge-patch+json` (or plain JSON) for an RFC 7396
+    merge patch. Only changed fields and list items are written; a patch that
+    changes nothing does not write at all.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    try:
+        patch = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Request body is not valid JSON")
+    return await run_in_threadpool(apply_profile_patch, db, current_user.id, profile_id, patch,
+                                   content_type == JSON_PATCH_CONTENT_TYPE)
+
+def apply_profile_patch(db: Session, user_id: int, profile_id: int, patch, is_json_patch: bool) -> Profile:
+    profile = db.query(Profile).filter(Profile.id == profile_id, Profile.user_id == user_id).first()
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+    current = ProfileUpdate.model_validate(profile, from_attributes=True).model_dump(mode="json")
+    try:
+        patched = apply_json_patch(current, patch) if is_json_patch else apply_merge_patch(current, patch)
+        if not isinstance(patched, dict):
+            raise JSONPatchError("A patched profile must be an object")
+        unknown = set(patched) - set(current)
+        if unknown:
+            raise JSONPatchError(f"Unknown profile fields: {', '.join(sorted(unknown))}")
+        updated = ProfileUpdate.model_validate(patched).model_dump(mode="json")
+    except JSONPatchTestFailed as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except (JSONPatchError, ValidationError) as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    changed = [field for field, value in updated.items() if value != current[field]]
+    if not changed:
+        profiles_logger.debug(f"Patch on profile {profile_id} changed nothing, skipping write")
         return profile
+    try:
+        for field in changed:
+            setattr(profile, field, updated[field])
+        db.commit()
+        db.refresh(profile)
     except Exception as e:
-        print(f"[DEBUG] Error updating profile: {e}")
+        profiles_logger.error(f"Error patching profile: {e}")
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to update profile: {str(e)}")
+    profiles_logger.debug(f"Profile {profile_id} patched", extra={"fields": changed})
+    return profile
 
 @app.delete("/profiles/{profile_id}", response_model=DeleteResponse)
 def delete_profile(profile_id: int, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
@@ -1429,6 +1452,19 @@ def delete_profile(profile_id: int, current_user: models.User = Depends(get_curr
     db.commit()
     return DeleteResponse(message="Profile deleted")
 
+@app.get("/admin/profiling")
+def list_profiling_results(admin: models.User = Depends(get_admin_user)):
+    """List stored request and ingestion profiling results, newest first"""
+    return profiling.list_results(config.PROFILING_DIR)
+
+@app.get("/admin/profiling/{run_id}/{artifact}")
+def get_profiling_artifact(run_id: str, artifact: str, admin: models.User = Depends(get_admin_user)):
+    """Download a single profiling artifact (profile.prof, profile.txt, sql.json, ...)"""
+    path = profiling.artifact_path(config.PROFILING_DIR, run_id, artifact)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profiling artifact not found")
+    return FileResponse(path)
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=8000) 
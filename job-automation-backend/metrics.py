@@ -0,0 +1,308 @@
+"""
+Prometheus-style metrics for the job automation backend.
+
+A small, dependency-free metrics registry (counters, gauges, histograms)
+rendered in the Prometheus text exposition format by the `/metrics`
+endpoint. Instrumentation covers per-route request latency, DB statement
+timings, scraper fetches per source/company, ingestion lag and LLM calls.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0, float("inf"))
+SLOW_BUCKETS = (0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, float("inf"))
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = []
+    for name, value in pairs:
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        escaped.append(f'{name}="{value}"')
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+    def _render_sample(self, key, value):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._function = None
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount=1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount=1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function):
+        """Compute the (unlabelled) value at scrape time; return None to omit it"""
+        self._function = function
+
+    def render(self):
+        if self._function is not None:
+            value = self._function()
+            if value is not None:
+                with self._lock:
+                    self._values[()] = float(value)
+        return super().render()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        if self.buckets[-1] != float("inf"):
+            self.buckets += (float("inf"),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["counts"][i] += 1
+                    break
+            state["sum"] += value
+            state["count"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _render_sample(self, key, state):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, state["counts"]):
+            cumulative += count
+            labels = _format_labels(self.labelnames, key, [("le", _format_value(bound))])
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(state['sum'])}")
+        lines.append(f"{self.name}_count{labels} {state['count']}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUEST_DURATION = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template",
+    ["method", "route", "status"]))
+HTTP_REQUESTS_IN_PROGRESS = REGISTRY.register(Gauge(
+    "http_requests_in_progress", "HTTP requests currently being handled"))
+DB_QUERY_DURATION = REGISTRY.register(Histogram(
+    "db_query_duration_seconds", "Database statement execution time by statement type",
+    ["operation"], buckets=DB_BUCKETS))
+SCRAPER_REQUESTS = REGISTRY.register(Counter(
+    "scraper_requests_total", "Job board fetches per source and company", ["source", "company"]))
+SCRAPER_ERRORS = REGISTRY.register(Counter(
+    "scraper_errors_total", "Failed job board fetches per source and company", ["source", "company"]))
+SCRAPER_JOBS = REGISTRY.register(Counter(
+    "scraper_jobs_total", "Jobs returned by job board fetches per source and company", ["source", "company"]))
+SCRAPER_DURATION = REGISTRY.register(Histogram(
+    "scraper_fetch_duration_seconds", "Duration of a single company fetch by source",
+    ["source"], buckets=SLOW_BUCKETS))
+INGESTION_LAST_SUCCESS = REGISTRY.register(Gauge(
+    "ingestion_last_success_timestamp_seconds", "Unix time of the last successful ingestion run"))
+INGESTION_LAG = REGISTRY.register(Gauge(
+    "ingestion_lag_seconds", "Seconds since the last successful ingestion run"))
+INGESTION_DURATION = REGISTRY.register(Histogram(
+    "ingestion_run_duration_seconds", "Duration of a full ingestion run", buckets=SLOW_BUCKETS))
+LLM_REQUEST_DURATION = REGISTRY.register(Histogram(
+    "llm_request_duration_seconds", "LLM generation latency", ["operation", "model", "outcome"],
+    buckets=SLOW_BUCKETS))
+LLM_PROMPT_EVAL_TOKENS = REGISTRY.register(Histogram(
+    "llm_prompt_eval_tokens", "Prompt tokens the model actually evaluated per call", ["operation"],
+    buckets=(64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768, float("inf"))))
+LLM_PROMPT_TOKENS_SAVED = REGISTRY.register(Counter(
+    "llm_prompt_tokens_saved_total", "Estimated prompt prefix tokens served from the model's KV cache",
+    ["operation"]))
+LLM_TIME_TO_FIRST_TOKEN = REGISTRY.register(Histogram(
+    "llm_time_to_first_token_seconds", "Time until the first streamed token (mostly prompt prefill)",
+    ["operation"], buckets=SLOW_BUCKETS))
+TEXT_EXTRACTION_DURATION = REGISTRY.register(Histogram(
+    "resume_text_extraction_duration_seconds", "Resume text extraction latency", ["format", "outcome"]))
+RESUME_PROMPT_TOKENS = REGISTRY.register(Histogram(
+    "resume_prompt_tokens", "Resume text size in tokens before and after preprocessing", ["stage"],
+    buckets=(256, 512, 1024, 2048, 4096, 8192, 16384, 32768, float("inf"))))
+PASSWORD_HASH_DURATION = REGISTRY.register(Histogram(
+    "password_hash_duration_seconds", "bcrypt hash and verify time", ["operation"]))
+CACHE_REQUESTS = REGISTRY.register(Counter(
+    "cache_requests_total", "In-memory cache lookups by cache and result", ["cache", "result"]))
+RESUME_CACHE_REQUESTS = REGISTRY.register(Counter(
+    "resume_cache_requests_total", "Resume parse cache lookups by entry kind and result", ["kind", "result"]))
+EVENT_SUBSCRIBERS = REGISTRY.register(Gauge(
+    "event_subscribers", "Open Server-Sent Events streams by kind", ["kind"]))
+EVENTS_DROPPED = REGISTRY.register(Counter(
+    "events_dropped_total", "Events dropped because a subscriber fell behind", ["kind"]))
+
+_last_ingestion_success = None
+
+
+def _ingestion_lag():
+    if _last_ingestion_success is None:
+        return None
+    return time.time() - _last_ingestion_success
+
+
+INGESTION_LAG.set_function(_ingestion_lag)
+
+
+def record_ingestion_success(duration: float):
+    """Mark an ingestion run as finished successfully"""
+    global _last_ingestion_success
+    _last_ingestion_success = time.time()
+    INGESTION_LAST_SUCCESS.set(_last_ingestion_success)
+    INGESTION_DURATION.observe(duration)
+
+
+def instrument_scraper(source: str, fetch_fn):
+    """Wrap a per-company fetch function with request, error and job counters"""
+    def wrapper(company, *args, **kwargs):
+        SCRAPER_REQUESTS.inc(source=source, company=company)
+        start = time.perf_counter()
+        try:
+            jobs = fetch_fn(company, *args, **kwargs)
+        except Exception:
+            SCRAPER_ERRORS.inc(source=source, company=company)
+            raise
+        finally:
+            SCRAPER_DURATION.observe(time.perf_counter() - start, source=source)
+        SCRAPER_JOBS.inc(len(jobs), source=source, company=company)
+        return jobs
+    return wrapper
+
+
+def instrument_engine(engine):
+    """Record the execution time of every statement run on `engine`"""
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info["query_start_time"].pop()
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "UNKNOWN"
+        DB_QUERY_DURATION.observe(time.perf_counter() - start, operation=operation)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency per route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        HTTP_REQUESTS_IN_PROGRESS.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUESTS_IN_PROGRESS.dec()
+            # Label with the route template, not the raw path, to keep cardinality bounded
+            route = scope.get("route")
+            if route is not None:
+                route_label = route.path
+            else:
+                route_label = scope.get("root_path") or "unmatched"
+            HTTP_REQUEST_DURATION.observe(time.perf_counter() - start, method=scope["method"],
+                                          route=route_label, status=status_code)
+
+
+def render_metrics() -> str:
+    return REGISTRY.render()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Migration script to move profile list sections out of JSON columns.
+This script will:
+1. Create the profile_skills, profile_experiences, profile_education,
+   profile_achievements, profile_certificates and profile_preferences tables
+2. Copy each profile's skills, work_experience, education, achievements,
+   certificates and job_preferences JSON into them
+3. Add profiles.null_sections and record the sections whose JSON was null,
+   so they keep reading back as null instead of []
+
+Profiles that already have child rows are skipped, so it is safe to re-run.
+The old JSON columns are left in place (no longer read by the app).
+"""
+
+import json
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import flag_modified
+from database import Base, engine
+from models import Profile, ProfilePreference, coerce_section_item
+
+JSON_SECTIONS = ["skills", "work_experience", "education", "achievements", "certificates", "job_preferences"]
+
+def _load(value):
+    if value is None or value == "":
+        return None
+    if isinstance(value, str):
+        try:
+            return json.loads(value)
+        except json.JSONDecodeError:
+            return None
+    return value
+
+def _items(value, model):
+    """
+    Split list entries into (items, dropped): plain strings are coerced to the
+    child shape, entries that aren't objects or lack a required field are dropped.
+    """
+    if value is None:
+        return [], []
+    if not isinstance(value, list):
+        return [], [value]
+    required = [c.name for c in model.__table__.columns
+                if not c.nullable and c.name in model.fields and c.name != "normalized_name"]
+    items, dropped = [], []
+    for entry in value:
+        item = coerce_section_item(model, entry)
+        if isinstance(item, dict) and all(item.get(f) for f in required):
+            items.append(item)
+        else:
+            dropped.append(entry)
+    return items, dropped
+
+def _keep_updated_at(profile, updated_at):
+    """A migration is not a user edit: write the old updated_at back (flagged, so onupdate doesn't fire)"""
+    profile.updated_at = updated_at
+    flag_modified(profile, "updated_at")
+
+def migrate_profile_tables():
+    """Create the child tables and backfill them from the JSON columns"""
+    Base.metadata.create_all(bind=engine)
+
+    with engine.connect() as connection:
+        existing_columns = [row[1] for row in connection.execute(text("PRAGMA table_info(profiles)"))]
+        if "null_sections" not in existing_columns:
+            connection.execute(text("ALTER TABLE profiles ADD COLUMN null_sections JSON"))
+            connection.commit()
+            print("✓ Added null_sections column")
+        sections = [name for name in JSON_SECTIONS if name in existing_columns]
+        if not sections:
+            print("profiles has no JSON section columns, nothing to migrate")
+            return
+        rows = connection.execute(text(f"SELECT id, {', '.join(sections)} FROM profiles")).mappings().all()
+
+    migrated = skipped = dropped_total = 0
+    with Session(engine) as session:
+        try:
+            for row in rows:
+                profile = session.get(Profile, row["id"])
+                updated_at = profile.updated_at
+                # Sections that were null and are still empty keep reading back as null
+                null_sections = [section for section in sections
+                                 if section in Profile.ITEM_SECTIONS and _load(row[section]) is None
+                                 and not getattr(profile, Profile.ITEM_SECTIONS[section][0])]
+                if null_sections and profile.null_sections is None:
+                    profile.null_sections = null_sections
+                relations = [relation for relation, _ in Profile.ITEM_SECTIONS.values()] + ["preference_rows"]
+                if any(getattr(profile, relation) for relation in relations):
+                    _keep_updated_at(profile, updated_at)
+                    skipped += 1
+                    continue
+                for section in sections:
+                    value = _load(row[section])
+                    if section == "job_preferences":
+                        if isinstance(value, dict):
+                            profile.preference_rows = [ProfilePreference(key=k, value=v)
+                                                       for k, v in value.items() if v is not None]
+                    elif value is not None:
+                        items, dropped = _items(value, Profile.ITEM_SECTIONS[section][1])
+                        for entry in dropped:
+                            print(f"  ! profile {profile.id} {section}: dropped invalid entry {entry!r}")
+                        dropped_total += len(dropped)
+                        profile._set_items(section, items)
+                _keep_updated_at(profile, updated_at)
+                migrated += 1
+            session.commit()
+        except Exception as e:
+            print(f"Error during migration: {e}")
+            session.rollback()
+            raise
+
+    print(f"✓ Migrated {migrated} profiles ({skipped} already had child rows, "
+          f"{dropped_total} invalid section entries dropped)")
+
+if __name__ == "__main__":
+    print("Starting profile tables migration...")
+    migrate_profile_tables()
+    print("Migration completed successfully!")
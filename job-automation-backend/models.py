@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Text, JSON, ForeignKey, DateTime, func
+from sqlalchemy import Column, Integer, String, Text, JSON, ForeignKey, DateTime, Index, UniqueConstraint, func
+from sqlalchemy.orm import relationship, validates
 from database import Base
 
 class User(Base):
@@ -7,6 +8,166 @@ class User(Base):
     email = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
 
+class ApplicationSession(Base):
+    """A job application session handed to the Chrome extension / desktop app"""
+    __tablename__ = "application_sessions"
+    id = Column(String, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    data = Column(JSON, nullable=False)
+    created_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+class Application(Base):
+    """A user's application to a job, with its latest status"""
+    __tablename__ = "applications"
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    job_id = Column(Integer, ForeignKey("jobs.id"), nullable=False, index=True)
+    session_id = Column(String, nullable=True)  # extension session that last reported it
+    status = Column(String(50), nullable=False, default="pending")
+    applied_at = Column(DateTime, nullable=True)
+    cover_letter = Column(Text, nullable=True)
+    notes = Column(Text, nullable=True)
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (UniqueConstraint("user_id", "job_id", name="uq_application_user_job"),)
+
+# Profile list sections live in child tables, one row per item, ordered by `position`.
+# Each child class lists the item fields it stores (the keys of the matching schema);
+# `label_field`, where set, is the field a legacy plain-string item maps to.
+
+class ProfileSkill(Base):
+    __tablename__ = "profile_skills"
+    fields = ("name", "years")
+    label_field = "name"
+    id = Column(Integer, primary_key=True)
+    profile_id = Column(Integer, ForeignKey("profiles.id", ondelete="CASCADE"), nullable=False)
+    position = Column(Integer, nullable=False)
+    name = Column(String, nullable=False)
+    normalized_name = Column(String, nullable=False)  # lower-cased for case-insensitive matching
+    years = Column(Integer, nullable=True)
+
+    __table_args__ = (
+        Index("ix_profile_skills_profile_position", "profile_id", "position"),
+        Index("ix_profile_skills_normalized_name", "normalized_name", "profile_id"),
+    )
+
+    @validates("name")
+    def _set_normalized_name(self, key, name):
+        self.normalized_name = normalize_skill_name(name)
+        return name
+
+class ProfileExperience(Base):
+    __tablename__ = "profile_experiences"
+    fields = ("title", "company", "location", "start_date", "end_date", "description")
+    id = Column(Integer, primary_key=True)
+    profile_id = Column(Integer, ForeignKey("profiles.id", ondelete="CASCADE"), nullable=False)
+    position = Column(Integer, nullable=False)
+    title = Column(String, nullable=False)
+    company = Column(String, nullable=False, index=True)
+    location = Column(String, nullable=True)
+    start_date = Column(String, nullable=True)
+    end_date = Column(String, nullable=True)
+    description = Column(Text, nullable=True)
+
+    __table_args__ = (Index("ix_profile_experiences_profile_position", "profile_id", "position"),)
+
+class ProfileEducation(Base):
+    __tablename__ = "profile_education"
+    fields = ("degree", "school", "start_date", "end_date", "gpa")
+    id = Column(Integer, primary_key=True)
+    profile_id = Column(Integer, ForeignKey("profiles.id", ondelete="CASCADE"), nullable=False)
+    position = Column(Integer, nullable=False)
+    degree = Column(String, nullable=True)
+    school = Column(String, nullable=False)
+    start_date = Column(String, nullable=True)
+    end_date = Column(String, nullable=True)
+    gpa = Column(String, nullable=True)
+
+    __table_args__ = (Index("ix_profile_education_profile_position", "profile_id", "position"),)
+
+class ProfileAchievement(Base):
+    __tablename__ = "profile_achievements"
+    fields = ("title", "issuer", "date", "description")
+    label_field = "title"
+    id = Column(Integer, primary_key=True)
+    profile_id = Column(Integer, ForeignKey("profiles.id", ondelete="CASCADE"), nullable=False)
+    position = Column(Integer, nullable=False)
+    title = Column(String, nullable=False)
+    issuer = Column(String, nullable=True)
+    date = Column(String, nullable=True)
+    description = Column(Text, nullable=True)
+
+    __table_args__ = (Index("ix_profile_achievements_profile_position", "profile_id", "position"),)
+
+class ProfileCertificate(Base):
+    __tablename__ = "profile_certificates"
+    fields = ("name", "organization", "issue_date", "expiry_date", "credential_id", "credential_url")
+    label_field = "name"
+    id = Column(Integer, primary_key=True)
+    profile_id = Column(Integer, ForeignKey("profiles.id", ondelete="CASCADE"), nullable=False)
+    position = Column(Integer, nullable=False)
+    name = Column(String, nullable=False, index=True)
+    organization = Column(String, nullable=True)
+    issue_date = Column(String, nullable=True)
+    expiry_date = Column(String, nullable=True)
+    credential_id = Column(String, nullable=True)
+    credential_url = Column(String, nullable=True)
+
+    __table_args__ = (Index("ix_profile_certificates_profile_position", "profile_id", "position"),)
+
+class ProfilePreference(Base):
+    """One job preference (key/value) of a profile"""
+    __tablename__ = "profile_preferences"
+    id = Column(Integer, primary_key=True)
+    profile_id = Column(Integer, ForeignKey("profiles.id", ondelete="CASCADE"), nullable=False)
+    key = Column(String, nullable=False)
+    value = Column(JSON, nullable=True)  # a string, or a list for companies_to_exclude
+
+    __table_args__ = (
+        UniqueConstraint("profile_id", "key", name="uq_profile_preference_key"),
+        Index("ix_profile_preferences_key_profile", "key", "profile_id"),
+    )
+
+def normalize_skill_name(name) -> str:
+    return (name or "").strip().lower()
+
+def coerce_section_item(model, item):
+    """Map a legacy plain-string item ("Python") to {label_field: item}; other items are returned as is"""
+    label_field = getattr(model, "label_field", None)
+    if isinstance(item, str) and label_field:
+        return {label_field: item}
+    return item
+
+def _as_dict(item) -> dict:
+    return item.model_dump() if hasattr(item, "model_dump") else dict(item)
+
+def _item_rows(model, **options):
+    return relationship(model, order_by=model.position, cascade="all, delete-orphan",
+                        lazy="selectin", **options)
+
+def _sync_items(rows, model, items) -> bool:
+    """
+    Make child `rows` match `items` position by position, updating rows in
+    place and only adding/deleting the difference. Returns True if anything changed.
+    """
+    items = [_as_dict(item) for item in items or []]
+    changed = len(rows) != len(items)
+    for position, item in enumerate(items):
+        if position < len(rows):
+            row = rows[position]
+        else:
+            row = model(position=position)
+            rows.append(row)
+        for field in model.fields:
+            value = item.get(field)
+            if getattr(row, field) != value:
+                setattr(row, field, value)
+                changed = True
+    del rows[len(items):]
+    return changed
+
 class Profile(Base):
     __tablename__ = "profiles"
     id = Column(Integer, primary_key=True, index=True)
@@ -15,10 +176,7 @@ class Profile(Base):
     full_name = Column(String, nullable=True)
     email = Column(String, nullable=True)
     phone = Column(String, nullable=True)
-    skills = Column(JSON, nullable=True)
     languages = Column(JSON, nullable=True)
-    work_experience = Column(JSON, nullable=True)
-    education = Column(JSON, nullable=True)
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
     image_url = Column(String, nullable=True)
@@ -29,6 +187,88 @@ class Profile(Base):
     country = Column(String, nullable=True)
     citizenship = Column(String, nullable=True)
     gender = Column(String, nullable=True)
-    job_preferences = Column(JSON, nullable=True)
-    achievements = Column(JSON, nullable=True)
-    certificates = Column(JSON, nullable=True) 
\ No newline at end of file
+    # List sections stored as null rather than an empty list (they read back as None, not [])
+    null_sections = Column(JSON, nullable=True)
+
+    skill_rows = _item_rows(ProfileSkill)
+    experience_rows = _item_rows(ProfileExperience)
+    education_rows = _item_rows(ProfileEducation)
+    achievement_rows = _item_rows(ProfileAchievement)
+    certificate_rows = _item_rows(ProfileCertificate)
+    preference_rows = relationship(ProfilePreference, cascade="all, delete-orphan", lazy="selectin")
+
+    # Profile field -> (relationship attribute, child model) for the list sections
+    ITEM_SECTIONS = {
+        "skills": ("skill_rows", ProfileSkill),
+        "work_experience": ("experience_rows", ProfileExperience),
+        "education": ("education_rows", ProfileEducation),
+        "achievements": ("achievement_rows", ProfileAchievement),
+        "certificates": ("certificate_rows", ProfileCertificate),
+    }
+
+    def __init__(self, **kwargs):
+        # Like the old JSON columns, sections that aren't given start out null
+        kwargs.setdefault("null_sections", [name for name in self.ITEM_SECTIONS if kwargs.get(name) is None] or None)
+        super().__init__(**kwargs)
+
+    def _get_items(self, section):
+        """The section's items; None only if the section was stored as null"""
+        relation, model = self.ITEM_SECTIONS[section]
+        rows = getattr(self, relation)
+        if not rows and section in (self.null_sections or ()):
+            return None
+        return [{field: getattr(row, field) for field in model.fields} for row in rows]
+
+    def _set_items(self, section, items):
+        relation, model = self.ITEM_SECTIONS[section]
+        changed = _sync_items(getattr(self, relation), model, items)
+        null_sections = [name for name in self.null_sections or () if name != section]
+        if items is None:
+            null_sections.append(section)
+        if sorted(null_sections) != sorted(self.null_sections or ()):
+            self.null_sections = null_sections or None
+            changed = True
+        if changed:
+            self._touch()
+
+    def _touch(self):
+        # Child-only edits don't UPDATE the profile row, so bump updated_at explicitly
+        if self.id is not None:
+            self.updated_at = func.now()
+
+    skills = property(lambda self: self._get_items("skills"),
+                      lambda self, value: self._set_items("skills", value))
+    work_experience = property(lambda self: self._get_items("work_experience"),
+                               lambda self, value: self._set_items("work_experience", value))
+    education = property(lambda self: self._get_items("education"),
+                         lambda self, value: self._set_items("education", value))
+    achievements = property(lambda self: self._get_items("achievements"),
+                            lambda self, value: self._set_items("achievements", value))
+    certificates = property(lambda self: self._get_items("certificates"),
+                            lambda self, value: self._set_items("certificates", value))
+
+    @property
+    def job_preferences(self):
+        if not self.preference_rows:
+            return None
+        return {row.key: row.value for row in self.preference_rows}
+
+    @job_preferences.setter
+    def job_preferences(self, value):
+        """Replace all preferences; unset (None) preferences are not stored"""
+        wanted = {key: v for key, v in _as_dict(value or {}).items() if v is not None}
+        changed = False
+        for row in list(self.preference_rows):
+            if row.key not in wanted:
+                self.preference_rows.remove(row)
+                changed = True
+            elif row.value != wanted[row.key]:
+                row.value = wanted[row.key]
+                changed = True
+        stored = {row.key for row in self.preference_rows}
+        for key, v in wanted.items():
+            if key not in stored:
+                self.preference_rows.append(ProfilePreference(key=key, value=v))
+                changed = True
+        if changed:
+            self._touch()
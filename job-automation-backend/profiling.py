@@ -0,0 +1,254 @@
+"""
+Opt-in profiling for requests and ingestion runs.
+
+When PROFILING_ENABLED is set, a request carrying the `X-Profile` header
+(`cprofile` or `sampling`) is profiled, along with the SQL statements it
+runs. Ingestion runs can be profiled the same way with `profile_run`.
+Results are written to PROFILING_DIR, one directory per run:
+
+- meta.json      request/run metadata and timings
+- sql.json       every SQL statement with its duration
+- profile.prof   raw cProfile data (open with snakeviz or pstats)
+- profile.txt    top functions by cumulative time
+- flamegraph.html  sampling profile (only when pyinstrument is installed)
+"""
+
+import asyncio
+import contextvars
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+import anyio
+from sqlalchemy import event
+from starlette.datastructures import Headers
+
+try:
+    import pyinstrument
+except ImportError:  # sampling mode falls back to cProfile
+    pyinstrument = None
+
+PROFILE_MODES = ("cprofile", "sampling")
+
+_current_session = contextvars.ContextVar("profiling_session", default=None)
+
+
+class ProfilingSession:
+    """Profile data collected for one request or ingestion run"""
+
+    def __init__(self, label: str, mode: str = "cprofile"):
+        self.id = f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        self.label = label
+        if mode == "sampling" and pyinstrument is None:
+            mode = "cprofile"
+        self.mode = mode
+        self.started_at = time.time()
+        self.sql = []
+        self._cprofilers = []
+        self._sampling_profilers = []
+        self._lock = threading.Lock()
+
+    def record_sql(self, statement: str, duration: float):
+        with self._lock:
+            self.sql.append({"statement": statement, "duration_ms": round(duration * 1000, 3)})
+
+    @contextmanager
+    def profile(self, async_mode: bool = False):
+        """Profile the enclosed block in the current thread"""
+        if self.mode == "sampling":
+            profiler = pyinstrument.Profiler(async_mode="enabled" if async_mode else "disabled")
+            profiler.start()
+            try:
+                yield
+            finally:
+                profiler.stop()
+                with self._lock:
+                    self._sampling_profilers.append(profiler)
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                with self._lock:
+                    self._cprofilers.append(profiler)
+
+    def save(self, directory: str, max_results: int = 100, **meta) -> str:
+        """Write collected data to `directory/<id>` and prune old results"""
+        run_dir = os.path.join(directory, self.id)
+        os.makedirs(run_dir, exist_ok=True)
+
+        sql_total = sum(entry["duration_ms"] for entry in self.sql)
+        meta.update({
+            "id": self.id,
+            "label": self.label,
+            "mode": self.mode,
+            "started_at": datetime.utcfromtimestamp(self.started_at).isoformat(),
+            "duration_ms": round((time.time() - self.started_at) * 1000, 3),
+            "sql_statements": len(self.sql),
+            "sql_total_ms": round(sql_total, 3),
+        })
+
+        if self._cprofilers:
+            stats = pstats.Stats(self._cprofilers[0])
+            for profiler in self._cprofilers[1:]:
+                stats.add(profiler)
+            stats.dump_stats(os.path.join(run_dir, "profile.prof"))
+            text = io.StringIO()
+            pstats.Stats(os.path.join(run_dir, "profile.prof"), stream=text).sort_stats("cumulative").print_stats(50)
+            with open(os.path.join(run_dir, "profile.txt"), "w", encoding="utf-8") as f:
+                f.write(text.getvalue())
+        for i, profiler in enumerate(self._sampling_profilers):
+            name = "flamegraph.html" if i == 0 else f"flamegraph_{i}.html"
+            with open(os.path.join(run_dir, name), "w", encoding="utf-8") as f:
+                f.write(profiler.output_html())
+
+        with open(os.path.join(run_dir, "sql.json"), "w", encoding="utf-8") as f:
+            json.dump(self.sql, f, indent=2)
+        with open(os.path.join(run_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+
+        _prune_results(directory, max_results)
+        return run_dir
+
+
+def _prune_results(directory: str, max_results: int):
+    runs = sorted(entry for entry in os.listdir(directory) if os.path.isdir(os.path.join(directory, entry)))
+    for entry in runs[:-max_results] if max_results > 0 else []:
+        shutil.rmtree(os.path.join(directory, entry), ignore_errors=True)
+
+
+def profiled(fn):
+    """
+    Profile an endpoint when the current request asked for it.
+    Sync endpoints run in a worker thread, so profiling has to start there
+    rather than in the middleware.
+    """
+    if asyncio.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            session = _current_session.get()
+            if session is None:
+                return await fn(*args, **kwargs)
+            with session.profile(async_mode=True):
+                return await fn(*args, **kwargs)
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        session = _current_session.get()
+        if session is None:
+            return fn(*args, **kwargs)
+        with session.profile():
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+@contextmanager
+def profile_run(label: str, directory: str, mode: str = "cprofile", max_results: int = 100):
+    """Profile a whole block (e.g. an ingestion run) and save the results"""
+    session = ProfilingSession(label, mode)
+    token = _current_session.set(session)
+    try:
+        with session.profile():
+            yield session
+    finally:
+        _current_session.reset(token)
+        session.save(directory, max_results, kind="run")
+
+
+def instrument_engine(engine):
+    """Record SQL statement timings for the active profiling session, if any"""
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if _current_session.get() is not None:
+            conn.info.setdefault("profiling_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        session = _current_session.get()
+        if session is not None and conn.info.get("profiling_query_start"):
+            session.record_sql(statement, time.perf_counter() - conn.info["profiling_query_start"].pop())
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware starting a profiling session for requests that send the
+    profiling header (and the matching token, when one is configured).
+    """
+
+    def __init__(self, app, directory: str, header: str = "x-profile", token: str = "", max_results: int = 100):
+        self.app = app
+        self.directory = directory
+        self.header = header.lower()
+        self.token = token
+        self.max_results = max_results
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        mode = headers.get(self.header, "").strip().lower()
+        if mode not in PROFILE_MODES or (self.token and headers.get(f"{self.header}-token") != self.token):
+            await self.app(scope, receive, send)
+            return
+
+        session = ProfilingSession(f"{scope['method']} {scope['path']}", mode)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message.setdefault("headers", []).append((b"x-profile-id", session.id.encode()))
+            await send(message)
+
+        token = _current_session.set(session)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_session.reset(token)
+            await anyio.to_thread.run_sync(functools.partial(
+                session.save, self.directory, self.max_results,
+                kind="request", method=scope["method"], path=scope["path"], status=status_code))
+
+
+def list_results(directory: str):
+    """Metadata of stored profiling results, newest first"""
+    if not os.path.isdir(directory):
+        return []
+    results = []
+    for entry in sorted(os.listdir(directory), reverse=True):
+        meta_path = os.path.join(directory, entry, "meta.json")
+        if not os.path.isfile(meta_path):
+            continue
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        meta["artifacts"] = sorted(os.listdir(os.path.join(directory, entry)))
+        results.append(meta)
+    return results
+
+
+def artifact_path(directory: str, run_id: str, artifact: str):
+    """
+    Path of an artifact listed by list_results, or None. Names come from the
+    listing, never from the request, and the path must stay inside `directory`.
+    """
+    for meta in list_results(directory):
+        if meta.get("id") == run_id and artifact in meta["artifacts"]:
+            root = os.path.realpath(directory)
+            path = os.path.realpath(os.path.join(root, run_id, artifact))
+            if os.path.commonpath([root, path]) == root and path != root and os.path.isfile(path):
+                return path
+    return None
@@ -0,0 +1,172 @@
+"""
+Batch resume import.
+
+A batch (a zip archive and/or several uploaded files) is fanned out over a
+bounded worker pool: each resume is parsed independently, parsed profiles
+are written with one bulk insert per chunk, and a status line per file is
+streamed back as NDJSON while the batch runs.
+"""
+
+import asyncio
+import contextvars
+import io
+import json
+import logging
+import os
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from resume_parser import ResumeParseError, validate_resume_filename
+
+llm_logger = logging.getLogger("jobapp.llm")
+
+
+class BatchTooLargeError(Exception):
+    """Raised when a batch has more files than allowed"""
+
+
+UPLOAD_READ_CHUNK = 1024 * 1024
+
+
+async def read_uploads(files, max_files: int, max_file_bytes: int, max_total_bytes: int):
+    """
+    Read UploadFiles into (filename, bytes) pairs, enforcing the limits while
+    reading. A resume larger than `max_file_bytes` is cut at max_file_bytes + 1
+    (expand_uploads then rejects it); zips count towards `max_total_bytes` only.
+    """
+    if len(files) > max_files:
+        raise BatchTooLargeError(f"A batch may contain at most {max_files} resumes")
+    uploads = []
+    total = 0
+    for file in files:
+        filename = file.filename or ""
+        limit = max_total_bytes + 1 if filename.lower().endswith(".zip") else max_file_bytes + 1
+        chunks, size = [], 0
+        while size < limit:
+            chunk = await file.read(min(UPLOAD_READ_CHUNK, limit - size))
+            if not chunk:
+                break
+            chunks.append(chunk)
+            size += len(chunk)
+            total += len(chunk)
+            if total > max_total_bytes:
+                raise BatchTooLargeError(f"A batch upload may be at most {max_total_bytes} bytes")
+        uploads.append((filename, b"".join(chunks)))
+    return uploads
+
+
+def expand_uploads(uploads, max_files: int, max_file_bytes: int):
+    """
+    Turn uploaded (filename, bytes) pairs into resume files, unpacking zips.
+    Returns ([(filename, content), ...], [(filename, error), ...]).
+    """
+    files, rejected = [], []
+
+    def add(filename, content):
+        try:
+            validate_resume_filename(filename)
+        except ResumeParseError as e:
+            rejected.append((filename, e.detail))
+            return
+        if len(content) > max_file_bytes:
+            rejected.append((filename, f"File is larger than {max_file_bytes} bytes"))
+            return
+        files.append((filename, content))
+
+    for filename, content in uploads:
+        if not filename.lower().endswith(".zip"):
+            add(filename, content)
+            continue
+        try:
+            archive = zipfile.ZipFile(io.BytesIO(content))
+        except zipfile.BadZipFile:
+            rejected.append((filename, "Not a valid zip archive"))
+            continue
+        with archive:
+            for info in archive.infolist():
+                name = info.filename
+                if info.is_dir() or name.startswith("__MACOSX/") or os.path.basename(name).startswith("."):
+                    continue
+                if len(files) >= max_files:
+                    raise BatchTooLargeError(f"A batch may contain at most {max_files} resumes")
+                # Never decompress more than the limit, whatever the entry claims its size is
+                with archive.open(info) as entry:
+                    add(name, entry.read(max_file_bytes + 1))
+
+    if len(files) > max_files:
+        raise BatchTooLargeError(f"A batch may contain at most {max_files} resumes")
+    return files, rejected
+
+
+def _line(**data) -> str:
+    return json.dumps(data, default=str) + "\n"
+
+
+def _parse_one(parse, filename, content):
+    """Run `parse` and return (filename, data, error) instead of raising"""
+    try:
+        return filename, parse(filename, content), None
+    except ResumeParseError as e:
+        return filename, None, e.detail
+    except Exception as e:
+        llm_logger.exception(f"Batch import of {filename} failed")
+        return filename, None, str(e)
+
+
+async def import_resumes(files, rejected, parse, save_batch, executor: ThreadPoolExecutor, insert_batch_size: int = 25):
+    """
+    Parse `files` on `executor` and save them in chunks; yields NDJSON status lines.
+
+    `parse(filename, content)` returns a validated profile (raising
+    ResumeParseError on failure) and `save_batch([(filename, data), ...])`
+    bulk-inserts the profiles and returns their ids in the same order. Both
+    run off the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    yield _line(status="accepted", files=len(files), rejected=len(rejected))
+    for filename, error in rejected:
+        yield _line(file=filename, status="failed", error=error)
+
+    futures = [
+        loop.run_in_executor(executor, contextvars.copy_context().run, _parse_one, parse, filename, content)
+        for filename, content in files
+    ]
+
+    pending_rows = []
+    created = 0
+    failed = len(rejected)
+
+    async def flush():
+        nonlocal created, failed
+        rows = list(pending_rows)
+        pending_rows.clear()
+        try:
+            ids = await loop.run_in_executor(None, save_batch, rows)
+        except Exception as e:
+            llm_logger.exception(f"Bulk profile insert failed for {len(rows)} resumes")
+            failed += len(rows)
+            return [_line(file=filename, status="failed", error=f"Failed to save profile: {e}") for filename, _ in rows]
+        created += len(ids)
+        return [_line(file=filename, status="done", profile_id=profile_id)
+                for (filename, _), profile_id in zip(rows, ids)]
+
+    try:
+        for future in asyncio.as_completed(futures):
+            filename, data, error = await future
+            if error is not None:
+                failed += 1
+                yield _line(file=filename, status="failed", error=error)
+                continue
+            yield _line(file=filename, status="parsed")
+            pending_rows.append((filename, data))
+            if len(pending_rows) >= insert_batch_size:
+                for line in await flush():
+                    yield line
+        if pending_rows:
+            for line in await flush():
+                yield line
+        yield _line(status="complete", created=created, failed=failed)
+    finally:
+        # Client went away or the batch failed: don't start resumes nobody will see
+        for future in futures:
+            future.cancel()
@@ -0,0 +1,105 @@
+"""
+Content-addressed cache for resume parsing results.
+
+Users upload the same resume again and again (one profile per job title),
+so both stages of the pipeline are cached on disk:
+
+- extracted text, keyed by the SHA-256 of the uploaded bytes
+- parsed profile JSON, keyed by the document hash plus the LLM model and
+  prompt version, so changing either naturally invalidates old entries
+
+The cache directory is bounded by total size; least recently used entries
+are evicted first.
+"""
+
+import hashlib
+import json
+import os
+import threading
+
+from metrics import RESUME_CACHE_REQUESTS
+
+
+def document_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+class ResumeParseCache:
+    def __init__(self, directory: str, max_bytes: int = 50 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def profile_key(doc_hash: str, model: str, prompt_version: str) -> str:
+        return hashlib.sha256(f"{doc_hash}|{model}|{prompt_version}".encode()).hexdigest()
+
+    def _path(self, kind: str, key: str) -> str:
+        return os.path.join(self.directory, f"{kind}-{key}.json")
+
+    def _get(self, kind: str, key: str):
+        path = self._path(kind, key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            RESUME_CACHE_REQUESTS.inc(kind=kind, result="miss")
+            return None
+        # Bump the access time used for LRU eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        RESUME_CACHE_REQUESTS.inc(kind=kind, result="hit")
+        return value
+
+    def _put(self, kind: str, key: str, value):
+        path = self._path(kind, key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(value, f)
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def get_text(self, doc_hash: str):
+        return self._get("text", doc_hash)
+
+    def put_text(self, doc_hash: str, text: str):
+        self._put("text", doc_hash, text)
+
+    def get_profile(self, doc_hash: str, model: str, prompt_version: str):
+        return self._get("profile", self.profile_key(doc_hash, model, prompt_version))
+
+    def put_profile(self, doc_hash: str, model: str, prompt_version: str, profile_json: dict):
+        self._put("profile", self.profile_key(doc_hash, model, prompt_version), profile_json)
+
+    def _evict(self):
+        with self._lock:
+            entries = []
+            total = 0
+            for name in os.listdir(self.directory):
+                if not name.endswith(".json"):
+                    continue
+                try:
+                    st = os.stat(os.path.join(self.directory, name))
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, name))
+                total += st.st_size
+            if total <= self.max_bytes:
+                return
+            for _, size, name in sorted(entries):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    continue
+                total -= size
+                if total <= self.max_bytes:
+                    break
+
+    def clear(self):
+        with self._lock:
+            for name in os.listdir(self.directory):
+                if name.endswith(".json"):
+                    os.remove(os.path.join(self.directory, name))
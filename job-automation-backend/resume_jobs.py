@@ -0,0 +1,174 @@
+"""
+Background job queue for resume parsing.
+
+Resume uploads are handed to a small, dedicated worker pool instead of
+running on the request threadpool, so slow text extraction and LLM calls
+cannot stall unrelated endpoints. Each job records its progress so clients
+can poll it or follow it over Server-Sent Events.
+"""
+
+import asyncio
+import contextvars
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+TERMINAL_STATUSES = ("done", "failed")
+
+
+class QueueFullError(Exception):
+    """Raised when too many resume jobs are already waiting"""
+
+
+class ResumeJob:
+    """State of a single queued resume parse"""
+
+    def __init__(self, user_id: int, filename: str):
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.filename = filename
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.status_code = None
+        self.created_at = datetime.utcnow()
+        self.updated_at = self.created_at
+        self.finished_monotonic = None
+        self.events = []
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._emit({"status": "queued"})
+
+    @property
+    def finished(self) -> bool:
+        return self.status in TERMINAL_STATUSES
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "filename": self.filename,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "updated_at": self.updated_at.isoformat(),
+        }
+
+    def set_status(self, status: str, **data):
+        self.status = status
+        self.updated_at = datetime.utcnow()
+        if status in TERMINAL_STATUSES:
+            self.finished_monotonic = time.monotonic()
+        self._emit({"status": status, **data})
+
+    def add_section(self, name: str, data):
+        """Publish a partial result (one parsed profile section) while the job runs"""
+        self._emit({"status": self.status, "section": name, "data": data})
+
+    def _emit(self, event: dict):
+        with self._lock:
+            self.events.append(event)
+            listeners = list(self._listeners)
+        for loop, queue in listeners:
+            loop.call_soon_threadsafe(queue.put_nowait, event)
+
+    def subscribe(self) -> asyncio.Queue:
+        """Queue receiving every past and future event; call from the event loop"""
+        queue = asyncio.Queue()
+        with self._lock:
+            for event in self.events:
+                queue.put_nowait(event)
+            self._listeners.append((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        with self._lock:
+            self._listeners = [(loop, q) for loop, q in self._listeners if q is not queue]
+
+    async def wait(self):
+        """Wait for the job to finish without holding a worker thread"""
+        queue = self.subscribe()
+        try:
+            while not self.finished:
+                await queue.get()
+        finally:
+            self.unsubscribe(queue)
+
+    async def sse_events(self):
+        """
+        Yield job events formatted as Server-Sent Events until the job finishes.
+        Status changes use the status as event name; partial results use `section`.
+        """
+        queue = self.subscribe()
+        try:
+            while True:
+                event = await queue.get()
+                name = "section" if "section" in event else event["status"]
+                yield f"event: {name}\ndata: {json.dumps(event, default=str)}\n\n"
+                if event["status"] in TERMINAL_STATUSES:
+                    break
+        finally:
+            self.unsubscribe(queue)
+
+
+class ResumeJobQueue:
+    """Bounded worker pool running resume jobs"""
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 20, ttl_seconds: int = 3600, on_finish=None):
+        """`on_finish(job)` is called on the worker thread once a job is done or failed"""
+        self.max_pending = max_pending
+        self.on_finish = on_finish
+        self.ttl_seconds = ttl_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="resume-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, user_id: int, filename: str, fn, *args) -> ResumeJob:
+        """
+        Queue `fn(job, *args)`. Its return value becomes the job result; a raised
+        exception with `status_code`/`detail` attributes marks the job failed.
+        """
+        self._evict_expired()
+        with self._lock:
+            pending = sum(1 for job in self._jobs.values() if not job.finished)
+            if pending >= self.max_pending:
+                raise QueueFullError("Too many resumes are being processed, please retry shortly")
+            job = ResumeJob(user_id, filename)
+            self._jobs[job.id] = job
+        # Carry request context (e.g. an active profiling session) into the worker
+        context = contextvars.copy_context()
+        self._executor.submit(context.run, self._run, job, fn, args)
+        return job
+
+    def get(self, job_id: str, user_id: int = None):
+        job = self._jobs.get(job_id)
+        if job is None or (user_id is not None and job.user_id != user_id):
+            return None
+        return job
+
+    def _run(self, job: ResumeJob, fn, args):
+        try:
+            result = fn(job, *args)
+        except Exception as e:
+            job.error = getattr(e, "detail", None) or str(e)
+            job.status_code = getattr(e, "status_code", 500)
+            job.set_status("failed", error=job.error)
+        else:
+            job.result = result
+            job.set_status("done", result=result)
+        if self.on_finish is not None:
+            self.on_finish(job)
+
+    def _evict_expired(self):
+        cutoff = time.monotonic() - self.ttl_seconds
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job.finished_monotonic is not None and job.finished_monotonic < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
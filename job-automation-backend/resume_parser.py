@@ -0,0 +1,549 @@
+"""
+Resume parsing pipeline: text extraction, LLM extraction and normalization
+of the model output into the ProfileCreate shape.
+
+These functions have no FastAPI or database dependencies so they can run
+both inside a request and on the background resume job workers.
+"""
+
+import copy
+import logging
+import os
+import re
+import time
+
+import config
+import llm_client
+from incremental_json import SectionStreamParser
+from json_repair import JSONRepairError, repair_loads
+from llm_schema import resume_extraction_schema, section_schema
+from metrics import LLM_REQUEST_DURATION, RESUME_PROMPT_TOKENS
+from resume_cache import document_hash
+from resume_preprocess import preprocess_resume_text
+from resume_sections import SECTION_SYSTEM_PROMPT, extract_sections
+from text_extraction import ExtractionTimeout, get_extraction_service
+
+llm_logger = logging.getLogger("jobapp.llm")
+
+# Bump whenever RESUME_EXTRACTION_PROMPT or the normalization changes, so
+# cached parse results from the old prompt are no longer used
+PROMPT_VERSION = "3"
+
+ALLOWED_EXTENSIONS = {'.pdf', '.doc', '.docx'}
+MIN_RESUME_TEXT_LENGTH = 50
+
+
+class ResumeParseError(Exception):
+    """Raised when an uploaded resume cannot be turned into a profile"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+# Fixed schema and rules, sent as the system prompt so the model server can
+# reuse its KV cache for this prefix across calls
+RESUME_EXTRACTION_INSTRUCTIONS = """
+You are an expert data extraction agent. Your task is to extract structured information from the provided resume and return a **strictly valid JSON** object matching the schema defined below. All keys must always be present, even if values are missing.
+
+## Output Format (MUST MATCH EXACTLY):
+
+{
+  "personal_information": {
+    "full_name": "string",
+    "email": "string",
+    "phone": "string",
+    "image_url": "string or null",
+    "gender": "string or null",
+    "address": "string or null",
+    "city": "string or null",
+    "state": "string or null",
+    "zip_code": "string or null",
+    "country": "string or null",
+    "citizenship": "string or null"
+  },
+  "work_experience": [
+    {
+      "title": "string",
+      "company": "string",
+      "location": "string",
+      "start_date": "string (YYYY-MM or similar)",
+      "end_date": "string or null (use null if current)",
+      "description": "string"
+    }
+  ],
+  "education": [
+    {
+      "degree": "string",
+      "school": "string (institution name)",
+      "start_date": "string (YYYY-MM or similar)",
+      "end_date": "string (YYYY-MM or similar) or null if current",
+      "gpa": "string or null"
+    }
+  ],
+  "skills": [
+    {
+      "name": "string",
+      "years": "integer or null"
+    }
+  ],
+  "languages": ["string", "string", "..."],
+  "job_preferences": {
+    "linkedin": "string",
+    "twitter": "string",
+    "github": "string",
+    "portfolio": "string",
+    "other_url": "string",
+    "notice_period": "string",
+    "total_experience": "string",
+    "default_experience": "string",
+    "highest_education": "string",
+    "companies_to_exclude": "string",
+    "willing_to_relocate": "string",
+    "driving_license": "string",
+    "visa_requirement": "string",
+    "race_ethnicity": "string"
+  },
+  "achievements": [
+    {
+      "title": "string",
+      "issuer": "string or null",
+      "date": "string or null",
+      "description": "string or null"
+    }
+  ],
+  "certificates": [
+    {
+      "name": "string",
+      "organization": "string or null",
+      "issue_date": "string or null",
+      "expiry_date": "string or null",
+      "credential_id": "string or null",
+      "credential_url": "string or null"
+    }
+  ]
+}
+
+## IMPORTANT RULES:
+- Return **only valid JSON**, no additional explanation or text.
+- All fields in `job_preferences` must be **strings**. If a value is numeric, boolean, or a list, convert it to a string. If missing, return an empty string.
+- Dates should be in a consistent format (e.g., `YYYY-MM`). If not available, return `null`.
+- If a field is not mentioned in the resume, fill it with `null`, `""`, or an empty list `[]`, depending on the data type.
+- `skills`, `achievements`, and `certificates` must be returned as structured objects — **not strings**.
+- Assume any structured info (e.g., LinkedIn URLs, GitHub, salary info, visa, notice period) might appear anywhere in the resume — including footers, headers, or sidebars.
+- If the job description is in bullet points, concatenate all bullet points into a single string, separated by newlines. Include all bullet points and narrative text under that job as the description. Do not omit any bullet points, even if there are many.
+
+Example for a work experience:
+
+Software Engineer, Acme Corp
+Jan 2020 – Present
+• Built X
+• Improved Y
+• Led Z
+
+Output:
+{
+  "work_experience": [
+    {
+      "title": "Software Engineer",
+      "company": "Acme Corp",
+      "start_date": "2020-01",
+      "end_date": "",
+      "description": "• Built X\\n• Improved Y\\n• Led Z"
+    }
+  ]
+}
+"""
+
+# Per-resume part of the prompt, kept after the fixed instructions
+RESUME_EXTRACTION_PROMPT = """Now extract the structured data from the following resume:
+{resume_text}
+
+Return only the JSON.
+"""
+
+EMPTY_PROFILE = {
+    "full_name": "",
+    "email": "",
+    "phone": "",
+    "image_url": None,
+    "gender": None,
+    "work_experience": [],
+    "education": [],
+    "skills": [],
+    "languages": [],
+    "job_preferences": {},
+    "achievements": [],
+    "certificates": []
+}
+
+PERSONAL_INFORMATION_FIELDS = [
+    "full_name", "email", "phone", "image_url", "gender", "address",
+    "city", "state", "zip_code", "country", "citizenship"
+]
+
+
+def build_resume_prompt(resume_text: str) -> str:
+    return RESUME_EXTRACTION_PROMPT.format(resume_text=resume_text)
+
+
+def validate_resume_filename(filename: str) -> str:
+    """Return the lower-cased extension, or raise ResumeParseError if unsupported"""
+    file_extension = os.path.splitext(filename or "")[1].lower()
+    if file_extension not in ALLOWED_EXTENSIONS:
+        raise ResumeParseError(400, f"Unsupported file type. Allowed: {', '.join(ALLOWED_EXTENSIONS)}")
+    return file_extension
+
+
+def extract_resume_text(content: bytes, filename: str) -> str:
+    """Extract text from an uploaded resume's bytes"""
+    file_extension = validate_resume_filename(filename)
+    if config.DEBUG_LLM:
+        llm_logger.debug(f"File size: {len(content)} bytes")
+    try:
+        resume_text = get_extraction_service().extract(content, file_extension)
+    except ExtractionTimeout as e:
+        raise ResumeParseError(422, f"Failed to extract text from file: {str(e)}")
+    except Exception as e:
+        if config.DEBUG_LLM:
+            llm_logger.warning(f"Error extracting text: {e}")
+        raise ResumeParseError(500, f"Failed to extract text from file: {str(e)}")
+
+    if not resume_text or len(resume_text.strip()) < MIN_RESUME_TEXT_LENGTH:
+        raise ResumeParseError(400, "Could not extract meaningful text from the uploaded file. Please ensure the file contains readable text.")
+
+    if config.DEBUG_LLM:
+        llm_logger.debug(f"Extracted text length: {len(resume_text)} characters")
+        llm_logger.debug(f"First 200 characters: {resume_text[:200]}...")
+    return resume_text
+
+
+def generate_profile_streaming(prompt: str, on_section=None) -> str:
+    """
+    Stream the completion through SectionStreamParser, reporting each
+    top-level section via `on_section(name, value)` as soon as it is complete.
+    Stops reading as soon as the JSON object is closed. Returns the raw output.
+    """
+    model = llm_client.model_name()
+    parser = SectionStreamParser()
+    raw_chunks = []
+    started = time.perf_counter()
+    outcome = "error"
+    stream = llm_client.stream_generate(prompt, system=RESUME_EXTRACTION_INSTRUCTIONS, schema=extraction_schema())
+    try:
+        for chunk in stream:
+            raw_chunks.append(chunk)
+            for name, value in parser.feed(chunk):
+                if config.DEBUG_LLM:
+                    llm_logger.debug(f"Section complete: {name} after {time.perf_counter() - started:.1f}s")
+                if on_section is not None:
+                    on_section(name, value)
+            if parser.done:
+                break
+        outcome = "ok"
+    finally:
+        stream.close()
+        LLM_REQUEST_DURATION.observe(time.perf_counter() - started, operation="resume_extraction_stream",
+                                     model=model, outcome=outcome)
+    return "".join(raw_chunks)
+
+
+def loads_llm_json(output: str):
+    """Parse the JSON object in raw model output, repairing it where needed; raises ValueError on failure"""
+    repairs = []
+    try:
+        value = repair_loads(output, repairs, expect="object")
+    except JSONRepairError:
+        if config.DEBUG_LLM:
+            llm_logger.debug(f"Unrecoverable output: {output}")
+        raise
+    if repairs:
+        llm_logger.info(f"Repaired LLM JSON output: {', '.join(repairs)}")
+    return value
+
+
+def parse_llm_output(output: str) -> dict:
+    """Turn raw model output into a profile dict, falling back to an empty profile"""
+    try:
+        profile_json = loads_llm_json(output)
+        if not isinstance(profile_json, dict):
+            raise ValueError(f"Expected a JSON object, got {type(profile_json).__name__}")
+        if config.DEBUG_LLM:
+            llm_logger.debug("JSON parsed successfully!")
+            llm_logger.debug(f"Profile keys: {list(profile_json.keys())}")
+    except ValueError as e:
+        if config.DEBUG_LLM:
+            llm_logger.warning(f"JSON parsing failed: {e}")
+        return copy.deepcopy(EMPTY_PROFILE)
+    return flatten_personal_information(profile_json)
+
+
+def flatten_personal_information(profile_json: dict) -> dict:
+    """Lift the `personal_information` wrapper fields to the top level"""
+    if "personal_information" in profile_json:
+        personal_info = profile_json.pop("personal_information") or {}
+        for field in PERSONAL_INFORMATION_FIELDS:
+            default = "" if field in ("full_name", "email", "phone") else None
+            profile_json[field] = personal_info.get(field, default)
+    return profile_json
+
+
+# --- PATCH OLLAMA OUTPUT TO MATCH SCHEMA ---
+def ensure_list_of_dicts(val):
+    if isinstance(val, list):
+        # If it's a list of strings, convert to list of dicts
+        if all(isinstance(x, str) for x in val):
+            return [{"name": x, "years": None} for x in val]
+        if all(isinstance(x, dict) for x in val):
+            # Clean up skills years field - convert strings like "6+" to integers
+            cleaned_skills = []
+            for skill in val:
+                cleaned_skill = skill.copy()
+                if 'years' in cleaned_skill:
+                    years_val = cleaned_skill['years']
+                    if isinstance(years_val, str):
+                        # Extract number from strings like "6+", "4+ years", etc.
+                        match = re.search(r'(\d+)', years_val)
+                        if match:
+                            cleaned_skill['years'] = int(match.group(1))
+                        else:
+                            cleaned_skill['years'] = None
+                    elif years_val is None:
+                        cleaned_skill['years'] = None
+                    else:
+                        # Try to convert to int, fallback to None
+                        try:
+                            cleaned_skill['years'] = int(years_val)
+                        except (ValueError, TypeError):
+                            cleaned_skill['years'] = None
+                cleaned_skills.append(cleaned_skill)
+            return cleaned_skills
+    if isinstance(val, str):
+        items = [x.strip() for x in val.split(",") if x.strip()]
+        return [{"name": x, "years": None} for x in items]
+    return []
+
+
+def ensure_list_of_objs(val, keys):
+    if isinstance(val, list):
+        if all(isinstance(x, dict) for x in val):
+            # Clean up work experience fields - ensure no None values for required fields
+            cleaned_items = []
+            for item in val:
+                cleaned_item = {}
+                for key in keys:
+                    value = item.get(key)
+                    if value is None:
+                        cleaned_item[key] = ""  # Convert None to empty string
+                    else:
+                        cleaned_item[key] = str(value)  # Ensure it's a string
+                cleaned_items.append(cleaned_item)
+            return cleaned_items
+        if all(isinstance(x, str) for x in val):
+            return [{keys[0]: x} for x in val]
+    if isinstance(val, str):
+        items = [x.strip() for x in val.split(",") if x.strip()]
+        return [{keys[0]: x} for x in items]
+    return []
+
+
+def fix_languages(val):
+    if isinstance(val, list):
+        # If it's a list of dicts with 'name', extract the names
+        if all(isinstance(x, dict) and 'name' in x for x in val):
+            return [x['name'] for x in val]
+        if all(isinstance(x, str) for x in val):
+            return val
+    if isinstance(val, str):
+        return [val]
+    return []
+
+
+def normalize_profile_json(profile_json: dict) -> dict:
+    """Coerce model output into the shapes ProfileCreate expects"""
+    profile_json["skills"] = ensure_list_of_dicts(profile_json.get("skills", []))
+    profile_json["achievements"] = ensure_list_of_objs(profile_json.get("achievements", []), ["title"])
+    profile_json["certificates"] = ensure_list_of_objs(profile_json.get("certificates", []), ["name"])
+    profile_json["languages"] = fix_languages(profile_json.get("languages", []))
+
+    # Clean up work experience specifically
+    if "work_experience" in profile_json:
+        work_exp = profile_json["work_experience"]
+        if isinstance(work_exp, list):
+            cleaned_work_exp = []
+            for exp in work_exp:
+                if isinstance(exp, dict):
+                    # Ignore work experience entries without a company value
+                    if not exp.get("company"):
+                        continue
+                    cleaned_exp = {}
+                    for field in ["title", "company", "location", "start_date", "end_date", "description"]:
+                        value = exp.get(field)
+                        if value is None:
+                            cleaned_exp[field] = ""  # Convert None to empty string
+                        else:
+                            cleaned_exp[field] = str(value)  # Ensure it's a string
+                    cleaned_work_exp.append(cleaned_exp)
+            profile_json["work_experience"] = cleaned_work_exp
+
+    # Ensure all required fields exist
+    for field in EMPTY_PROFILE:
+        if field not in profile_json:
+            if field in ["work_experience", "education", "skills", "languages", "achievements", "certificates"]:
+                profile_json[field] = []
+            elif field == "job_preferences":
+                profile_json[field] = {}
+            else:
+                profile_json[field] = None
+    return profile_json
+# --- END PATCH ---
+
+
+def build_profile_data(profile_json: dict, title: str = None) -> dict:
+    """Map normalized model output onto ProfileCreate fields"""
+    return {
+        'title': title or "Resume Profile",
+        'full_name': profile_json.get('full_name', None),
+        'email': profile_json.get('email', None),
+        'phone': profile_json.get('phone', None),
+        'image_url': profile_json.get('image_url', None),
+        'address': profile_json.get('address', None),
+        'city': profile_json.get('city', None),
+        'state': profile_json.get('state', None),
+        'zip_code': profile_json.get('zip_code', None),
+        'country': profile_json.get('country', None),
+        'citizenship': profile_json.get('citizenship', None),
+        'gender': profile_json.get('gender', None),
+        'skills': profile_json.get('skills', []),
+        'languages': profile_json.get('languages', []),
+        'work_experience': profile_json.get('work_experience', []),
+        'education': profile_json.get('education', []),
+        'job_preferences': profile_json.get('job_preferences', {}),
+        'achievements': profile_json.get('achievements', []),
+        'certificates': profile_json.get('certificates', []),
+    }
+
+
+def extract_profile_from_text(resume_text: str, on_section=None) -> dict:
+    """
+    Run the LLM over resume text and return normalized profile JSON.
+    With LLM_STREAMING enabled, `on_section(name, value)` receives each raw
+    top-level section as soon as the model finishes writing it.
+    """
+    if config.DEBUG_LLM:
+        llm_logger.debug("Using Ollama for single-call extraction...")
+        llm_logger.debug(f"Resume text length: {len(resume_text)} characters")
+
+    if config.LLM_EXTRACTION_MODE == "sectioned":
+        return extract_profile_sectioned(resume_text, on_section)
+
+    prompt = build_resume_prompt(resume_text)
+
+    if config.DEBUG_LLM:
+        llm_logger.debug("Single call with Ollama")
+        llm_logger.debug(f"Prompt length: {len(RESUME_EXTRACTION_INSTRUCTIONS)} fixed + {len(prompt)} per-resume characters")
+        llm_logger.debug("Starting LLM generation...")
+
+    try:
+        if config.LLM_STREAMING:
+            output = generate_profile_streaming(prompt, on_section)
+        else:
+            output = llm_client.generate(prompt, system=RESUME_EXTRACTION_INSTRUCTIONS, schema=extraction_schema())
+    except Exception as e:
+        if config.DEBUG_LLM:
+            llm_logger.warning(f"LLM call failed: {e}")
+        raise ResumeParseError(500, f"LLM processing failed: {str(e)}")
+
+    if config.DEBUG_LLM:
+        llm_logger.debug(f"Raw output length: {len(output)} characters")
+        llm_logger.debug(f"Raw output: {output}")
+
+    profile_json = normalize_profile_json(parse_llm_output(output))
+
+    if config.DEBUG_LLM:
+        llm_logger.debug("Final profile contains:")
+        llm_logger.debug(f"- Work experiences: {len(profile_json.get('work_experience', []))}")
+        llm_logger.debug(f"- Education entries: {len(profile_json.get('education', []))}")
+        llm_logger.debug(f"- Skills: {len(profile_json.get('skills', []))}")
+        llm_logger.debug(f"- Languages: {len(profile_json.get('languages', []))}")
+    return profile_json
+
+
+def extract_profile_sectioned(resume_text: str, on_section=None) -> dict:
+    """Run the per-section prompts concurrently (LLM_SECTION_CONCURRENCY calls per process) and normalize the merged result"""
+    if config.DEBUG_LLM:
+        llm_logger.debug(f"Using sectioned extraction with concurrency {config.LLM_SECTION_CONCURRENCY}")
+
+    def generate(prompt, max_tokens, keys):
+        schema = section_schema(keys) if config.LLM_CONSTRAINED_DECODING else None
+        return llm_client.generate(prompt, system=SECTION_SYSTEM_PROMPT, options={"num_predict": max_tokens},
+                                   schema=schema, operation="resume_section")
+
+    merged = extract_sections(
+        resume_text,
+        generate,
+        loads_llm_json,
+        max_workers=config.LLM_SECTION_CONCURRENCY,
+        token_budgets=config.LLM_SECTION_TOKEN_BUDGETS,
+        on_section=on_section,
+    )
+    if not merged:
+        raise ResumeParseError(500, "LLM processing failed: no resume section could be extracted")
+    return normalize_profile_json(flatten_personal_information(merged))
+
+
+def extraction_schema():
+    """JSON schema constraining single-call output, or None when constrained decoding is off"""
+    return resume_extraction_schema() if config.LLM_CONSTRAINED_DECODING else None
+
+
+def cache_prompt_version() -> str:
+    """Prompt version used in cache keys; single-call and sectioned output are cached apart"""
+    preprocess = f"pre{config.RESUME_MAX_PROMPT_TOKENS}" if config.RESUME_PREPROCESS else "raw"
+    decoding = "schema" if config.LLM_CONSTRAINED_DECODING else "free"
+    return f"{PROMPT_VERSION}-{config.LLM_EXTRACTION_MODE}-{preprocess}-{decoding}"
+
+
+def has_profile_content(profile_json: dict) -> bool:
+    """False for the empty fallback profile produced when parsing failed"""
+    return any(profile_json.get(field) for field in ("full_name", "email", "work_experience", "education", "skills"))
+
+
+def parse_resume(content: bytes, filename: str, title: str = None, progress=None, cache=None,
+                 on_section=None) -> dict:
+    """
+    Full pipeline from uploaded bytes to ProfileCreate-ready data.
+    `progress(stage)` is called as each stage starts and `on_section(name, value)`
+    as each streamed LLM section completes. With a ResumeParseCache,
+    previously seen documents skip text extraction and the LLM call.
+    """
+    progress = progress or (lambda stage, **data: None)
+    doc_hash = document_hash(content)
+
+    if cache is not None:
+        profile_json = cache.get_profile(doc_hash, llm_client.model_name(), cache_prompt_version())
+        if profile_json is not None:
+            progress("cached")
+            return build_profile_data(profile_json, title)
+
+    progress("extracting")
+    resume_text = cache.get_text(doc_hash) if cache is not None else None
+    if resume_text is None:
+        resume_text = extract_resume_text(content, filename)
+        if cache is not None:
+            cache.put_text(doc_hash, resume_text)
+
+    if config.RESUME_PREPROCESS:
+        preprocessed = preprocess_resume_text(resume_text, config.RESUME_MAX_PROMPT_TOKENS)
+        resume_text = preprocessed["text"]
+        RESUME_PROMPT_TOKENS.observe(preprocessed["tokens_before"], stage="raw")
+        RESUME_PROMPT_TOKENS.observe(preprocessed["tokens_after"], stage="preprocessed")
+        progress("parsing", tokens_before=preprocessed["tokens_before"], tokens_after=preprocessed["tokens_after"])
+    else:
+        progress("parsing")
+    profile_json = extract_profile_from_text(resume_text, on_section)
+    # Don't cache the empty fallback; a retry may well succeed
+    if cache is not None and has_profile_content(profile_json):
+        cache.put_profile(doc_hash, llm_client.model_name(), cache_prompt_version(), profile_json)
+    return build_profile_data(profile_json, title)
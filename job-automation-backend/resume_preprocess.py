@@ -0,0 +1,212 @@
+"""
+Clean up extracted resume text before it goes into the LLM prompt.
+
+Raw PDF/DOCX text carries a lot of tokens the model does not need: runs of
+spaces, blank lines, page numbers, and the same header/footer (name,
+contact line, "Page 2 of 3") repeated on every page. Removing them and
+enforcing a token budget keeps prompts small, and prefill time scales with
+prompt length.
+
+Token counts use tiktoken's cl100k_base encoding when tiktoken is
+installed, otherwise an estimate of ~4 characters per token. Neither is
+the local model's own tokenizer, so budgets are approximate.
+"""
+
+import logging
+import math
+import re
+import unicodedata
+from collections import Counter
+
+llm_logger = logging.getLogger("jobapp.llm")
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+CHARS_PER_TOKEN = 4
+PAGE_BREAK = "\f"
+
+# How many lines at the top and bottom of each page are header/footer candidates
+HEADER_FOOTER_LINES = 3
+
+_SPACES = re.compile(r"[ \t\u00a0\u2000-\u200b]+")
+_BLANK_LINES = re.compile(r"\n{3,}")
+# Explicit page markers only: "Page 2", "Page 2 of 3", "Page 2/3", "2 of 3", "- 2 -".
+# A bare number is content (a year, zip code or phone number), never a marker.
+_PAGE_MARKER = re.compile(
+    r"^(page\s*\d+(\s*(of|/)\s*\d+)?|\d+\s+of\s+\d+|[-–—]\s*\d+\s*[-–—])$", re.IGNORECASE)
+_DIGITS = re.compile(r"\d+")
+
+SECTION_HEADINGS = {
+    "summary": ("summary", "profile", "about me", "objective", "professional summary"),
+    "experience": ("experience", "work experience", "professional experience", "employment", "employment history",
+                   "work history", "career history"),
+    "education": ("education", "academic background", "qualifications"),
+    "skills": ("skills", "technical skills", "core competencies", "competencies", "technologies", "tools"),
+    "languages": ("languages",),
+    "certifications": ("certifications", "certificates", "licenses", "courses", "training"),
+    "achievements": ("achievements", "awards", "honors", "accomplishments"),
+    "projects": ("projects", "personal projects"),
+    "publications": ("publications",),
+    "volunteering": ("volunteering", "volunteer experience"),
+    "interests": ("interests", "hobbies", "hobbies and interests"),
+    "references": ("references", "referees"),
+}
+_HEADING_LOOKUP = {alias: name for name, aliases in SECTION_HEADINGS.items() for alias in aliases}
+
+# Sections dropped first, in this order, when the text is over budget
+LOW_PRIORITY_SECTIONS = ("references", "interests", "publications", "volunteering", "projects")
+
+_encoding = None
+
+
+def _get_encoding():
+    global _encoding
+    if _encoding is None and tiktoken is not None:
+        _encoding = tiktoken.get_encoding("cl100k_base")
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut `text` to at most `max_tokens`, preferably at a line break"""
+    if count_tokens(text) <= max_tokens:
+        return text
+    encoding = _get_encoding()
+    if encoding is not None:
+        cut = encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens])
+    else:
+        cut = text[:max_tokens * CHARS_PER_TOKEN]
+    newline = cut.rfind("\n")
+    # Only back off to the line break if that doesn't throw away too much
+    if newline > len(cut) * 0.8:
+        cut = cut[:newline]
+    return cut.rstrip()
+
+
+def normalize_whitespace(text: str) -> str:
+    """NFKC-normalize, collapse spaces, strip lines, drop page markers and squeeze blank lines"""
+    pages = []
+    for page in unicodedata.normalize("NFKC", text).replace("\r\n", "\n").replace("\r", "\n").split(PAGE_BREAK):
+        lines = [_SPACES.sub(" ", line).strip() for line in page.split("\n")]
+        edge = _edge_indexes(lines)
+        lines = [line for i, line in enumerate(lines) if not (i in edge and _PAGE_MARKER.match(line))]
+        pages.append(_BLANK_LINES.sub("\n\n", "\n".join(lines)).strip())
+    return PAGE_BREAK.join(page for page in pages if page)
+
+
+def _edge_indexes(lines) -> set:
+    """Indexes of the first and last HEADER_FOOTER_LINES non-blank lines of a page"""
+    non_blank = [i for i, line in enumerate(lines) if line]
+    return set(non_blank[:HEADER_FOOTER_LINES] + non_blank[-HEADER_FOOTER_LINES:])
+
+
+def _line_key(line: str) -> str:
+    # "Page 2 of 3" and "Page 3 of 3" count as the same footer; any other line
+    # must repeat exactly, so different date ranges are never merged
+    if _PAGE_MARKER.match(line):
+        return _DIGITS.sub("#", line.lower())
+    return line
+
+
+def remove_repeated_headers(text: str) -> str:
+    """Drop lines repeated at the top or bottom of most pages (running headers and footers)"""
+    pages = text.split(PAGE_BREAK)
+    if len(pages) < 2:
+        return text
+    counts = Counter()
+    for page in pages:
+        lines = [line for line in page.split("\n") if line]
+        edge = lines[:HEADER_FOOTER_LINES] + lines[-HEADER_FOOTER_LINES:]
+        counts.update({_line_key(line) for line in edge})
+    threshold = max(2, math.ceil(len(pages) / 2))
+    repeated = {key for key, count in counts.items() if count >= threshold}
+    if not repeated:
+        return text
+
+    kept_pages = []
+    for index, page in enumerate(pages):
+        lines = page.split("\n")
+        edge = _edge_indexes(lines)
+        # Keep the first occurrence: the header on page one usually holds the name and contact details
+        lines = [line for i, line in enumerate(lines)
+                 if not (index > 0 and i in edge and _line_key(line) in repeated)]
+        kept_pages.append("\n".join(lines).strip())
+    return PAGE_BREAK.join(page for page in kept_pages if page)
+
+
+def _heading_name(line: str):
+    if not line or len(line) > 40:
+        return None
+    key = line.strip(" :-|•").lower()
+    return _HEADING_LOOKUP.get(key)
+
+
+def segment_sections(text: str) -> list:
+    """
+    Split text into [(section, text), ...] at recognised headings. Text before
+    the first heading (name, contact details) is the "header" section.
+    """
+    sections = []
+    current, lines = "header", []
+    for line in text.replace(PAGE_BREAK, "\n").split("\n"):
+        name = _heading_name(line.strip())
+        if name is not None:
+            if any(lines):
+                sections.append((current, "\n".join(lines).strip()))
+            current, lines = name, [line]
+        else:
+            lines.append(line)
+    if any(lines):
+        sections.append((current, "\n".join(lines).strip()))
+    return sections
+
+
+def preprocess_resume_text(text: str, max_tokens: int = None) -> dict:
+    """
+    Clean `text` and fit it into `max_tokens`. Over budget, low-priority
+    sections (references, interests, ...) are dropped first, then the text
+    is truncated from the end.
+
+    Returns {"text", "tokens_before", "tokens_after", "sections", "dropped_sections", "truncated"}.
+    """
+    tokens_before = count_tokens(text)
+    cleaned = remove_repeated_headers(normalize_whitespace(text))
+    sections = segment_sections(cleaned)
+    result_text = "\n\n".join(section_text for _, section_text in sections)
+    dropped = []
+    truncated = False
+
+    if max_tokens and count_tokens(result_text) > max_tokens:
+        for low_priority in LOW_PRIORITY_SECTIONS:
+            if not any(name == low_priority for name, _ in sections):
+                continue
+            sections = [(name, section_text) for name, section_text in sections if name != low_priority]
+            dropped.append(low_priority)
+            result_text = "\n\n".join(section_text for _, section_text in sections)
+            if count_tokens(result_text) <= max_tokens:
+                break
+        if count_tokens(result_text) > max_tokens:
+            result_text = truncate_to_tokens(result_text, max_tokens)
+            truncated = True
+
+    tokens_after = count_tokens(result_text)
+    llm_logger.info(f"Resume text preprocessed: {tokens_before} -> {tokens_after} tokens"
+                    + (f", dropped {', '.join(dropped)}" if dropped else "")
+                    + (", truncated" if truncated else ""))
+    return {
+        "text": result_text,
+        "tokens_before": tokens_before,
+        "tokens_after": tokens_after,
+        "sections": [name for name, _ in sections],
+        "dropped_sections": dropped,
+        "truncated": truncated,
+    }
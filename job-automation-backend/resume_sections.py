@@ -0,0 +1,181 @@
+"""
+Sectioned resume extraction.
+
+Instead of one large prompt, each part of the profile (personal info, work
+experience, education, ...) is requested with its own short prompt and its
+own token budget. The section prompts run concurrently against the model
+server, which pays off when it serves several requests in parallel
+(e.g. Ollama with OLLAMA_NUM_PARALLEL > 1). The concurrency limit is shared
+by all resumes parsed in the process, not applied per resume. The merged
+result has the same shape as the single-call output, so it goes through the
+same normalization.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+llm_logger = logging.getLogger("jobapp.llm")
+
+# max_workers -> semaphore shared by every extract_sections call in the process
+_call_slots = {}
+_call_slots_lock = threading.Lock()
+
+
+def _shared_slots(limit: int) -> threading.BoundedSemaphore:
+    with _call_slots_lock:
+        if limit not in _call_slots:
+            _call_slots[limit] = threading.BoundedSemaphore(limit)
+        return _call_slots[limit]
+
+# section name -> (fields the section must return, JSON shape shown to the model)
+SECTIONS = {
+    "personal_information": (["personal_information"], """{
+  "personal_information": {
+    "full_name": "string",
+    "email": "string",
+    "phone": "string",
+    "image_url": "string or null",
+    "gender": "string or null",
+    "address": "string or null",
+    "city": "string or null",
+    "state": "string or null",
+    "zip_code": "string or null",
+    "country": "string or null",
+    "citizenship": "string or null"
+  }
+}"""),
+    "job_preferences": (["job_preferences"], """{
+  "job_preferences": {
+    "linkedin": "string",
+    "twitter": "string",
+    "github": "string",
+    "portfolio": "string",
+    "other_url": "string",
+    "notice_period": "string",
+    "total_experience": "string",
+    "default_experience": "string",
+    "highest_education": "string",
+    "companies_to_exclude": "string",
+    "willing_to_relocate": "string",
+    "driving_license": "string",
+    "visa_requirement": "string",
+    "race_ethnicity": "string"
+  }
+}"""),
+    "work_experience": (["work_experience"], """{
+  "work_experience": [
+    {
+      "title": "string",
+      "company": "string",
+      "location": "string",
+      "start_date": "string (YYYY-MM or similar)",
+      "end_date": "string or null (use null if current)",
+      "description": "string (all bullet points joined with newlines)"
+    }
+  ]
+}"""),
+    "education": (["education"], """{
+  "education": [
+    {
+      "degree": "string",
+      "school": "string (institution name)",
+      "start_date": "string (YYYY-MM or similar)",
+      "end_date": "string (YYYY-MM or similar) or null if current",
+      "gpa": "string or null"
+    }
+  ]
+}"""),
+    "skills": (["skills"], """{
+  "skills": [
+    {"name": "string", "years": "integer or null"}
+  ]
+}"""),
+    "languages": (["languages"], """{
+  "languages": ["string"]
+}"""),
+    "achievements_certificates": (["achievements", "certificates"], """{
+  "achievements": [
+    {"title": "string", "issuer": "string or null", "date": "string or null", "description": "string or null"}
+  ],
+  "certificates": [
+    {"name": "string", "organization": "string or null", "issue_date": "string or null", "expiry_date": "string or null", "credential_id": "string or null", "credential_url": "string or null"}
+  ]
+}"""),
+}
+
+# Default max tokens generated per section; work experience needs the most room
+DEFAULT_SECTION_TOKEN_BUDGETS = {
+    "personal_information": 256,
+    "job_preferences": 384,
+    "work_experience": 3072,
+    "education": 768,
+    "skills": 768,
+    "languages": 128,
+    "achievements_certificates": 1024,
+}
+
+
+# Shared by every section call. The resume text comes right after it and the
+# section-specific shape last, so all section calls share the same prefix
+# (system prompt + resume) and the model server only prefills it once.
+SECTION_SYSTEM_PROMPT = """You are an expert data extraction agent. You will be given a resume followed by the part of it to extract. Return **strictly valid JSON** matching the requested shape exactly.
+
+## IMPORTANT RULES:
+- Return **only valid JSON**, no additional explanation or text.
+- If a field is not mentioned in the resume, use `null`, `""`, or `[]` depending on the data type.
+- Dates should be in a consistent format (e.g., `YYYY-MM`).
+"""
+
+
+def build_section_prompt(section: str, resume_text: str) -> str:
+    _, shape = SECTIONS[section]
+    return f"""Resume:
+{resume_text}
+
+Extract only this part of the resume, matching this shape exactly:
+
+{shape}
+
+Return only the JSON.
+"""
+
+
+def extract_sections(resume_text: str, generate, loads_json, max_workers: int = 4,
+                     token_budgets=None, on_section=None) -> dict:
+    """
+    Run every section prompt concurrently and merge the results. At most
+    `max_workers` section calls are in flight across all concurrent resumes.
+
+    `generate(prompt, max_tokens, keys)` performs one LLM call for a section
+    returning `keys` and returns raw text;
+    `loads_json(text)` parses it (raising on failure). A failed section is
+    logged and left out, so the remaining sections are still returned.
+    """
+    budgets = {**DEFAULT_SECTION_TOKEN_BUDGETS, **(token_budgets or {})}
+    merged = {}
+    limit = max(1, max_workers)
+    slots = _shared_slots(limit)
+
+    def run_section(section):
+        with slots:
+            output = generate(build_section_prompt(section, resume_text), budgets[section], SECTIONS[section][0])
+        return loads_json(output)
+
+    with ThreadPoolExecutor(max_workers=limit, thread_name_prefix="llm-section") as executor:
+        futures = {executor.submit(run_section, section): section for section in SECTIONS}
+        for future in as_completed(futures):
+            section = futures[future]
+            try:
+                data = future.result()
+            except Exception as e:
+                llm_logger.warning(f"Section {section} extraction failed: {e}")
+                continue
+            if not isinstance(data, dict):
+                continue
+            for key in SECTIONS[section][0]:
+                if key in data:
+                    merged[key] = data[key]
+                    if on_section is not None:
+                        on_section(key, data[key])
+    return merged
@@ -126,4 +126,28 @@ class ProfileResponse(ProfileCreate):
         from_attributes = True
         json_encoders = {
             datetime: lambda v: v.isoformat() if v else None
-        } 
\ No newline at end of file
+        } 
+
+class PersonalInformation(BaseModel):
+    full_name: str | None
+    email: str | None
+    phone: str | None
+    image_url: str | None
+    gender: str | None
+    address: str | None
+    city: str | None
+    state: str | None
+    zip_code: str | None
+    country: str | None
+    citizenship: str | None
+
+class ResumeExtraction(BaseModel):
+    """Shape the LLM must produce when extracting a resume (same key order as the prompt)"""
+    personal_information: PersonalInformation
+    work_experience: list[WorkExperienceItem]
+    education: list[Education]
+    skills: list[SkillWithYears]
+    languages: list[str]
+    job_preferences: JobPreference
+    achievements: list[Achievement]
+    certificates: list[Certificate]
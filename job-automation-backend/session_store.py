@@ -0,0 +1,155 @@
+"""
+Storage for Chrome extension / desktop app application sessions.
+
+Sessions are small JSON documents with a TTL. They live in the
+`application_sessions` table by default, so they survive restarts and are
+shared by every uvicorn worker using the same database; a Redis-compatible
+server can be used instead. Expired rows are removed by a background sweeper
+(Redis expires keys by itself).
+"""
+
+import json
+import logging
+import threading
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete
+
+from models import ApplicationSession
+
+extension_logger = logging.getLogger("jobapp.extension")
+
+
+class SessionStore:
+    """Interface shared by the session backends"""
+
+    def create(self, user_id: int, data: dict) -> str:
+        """Store a new session and return its id"""
+        raise NotImplementedError
+
+    def get(self, session_id: str):
+        """Session data (including user_id and created_at), or None if missing or expired"""
+        raise NotImplementedError
+
+    def update(self, session_id: str, data: dict) -> bool:
+        """Merge `data` into a live session; False if it no longer exists"""
+        raise NotImplementedError
+
+    def delete(self, session_id: str):
+        raise NotImplementedError
+
+    def sweep(self) -> int:
+        """Remove expired sessions; returns how many were removed"""
+        return 0
+
+
+class SQLSessionStore(SessionStore):
+    def __init__(self, session_factory, ttl_seconds: float):
+        self.session_factory = session_factory
+        self.ttl = timedelta(seconds=ttl_seconds)
+
+    def create(self, user_id: int, data: dict) -> str:
+        now = datetime.utcnow()
+        session_id = str(uuid.uuid4())
+        with self.session_factory() as db:
+            db.add(ApplicationSession(id=session_id, user_id=user_id, data=data,
+                                      created_at=now, expires_at=now + self.ttl))
+            db.commit()
+        return session_id
+
+    def get(self, session_id: str):
+        with self.session_factory() as db:
+            row = db.get(ApplicationSession, session_id)
+            if row is None or row.expires_at <= datetime.utcnow():
+                return None
+            return {**row.data, "user_id": row.user_id, "created_at": row.created_at.isoformat()}
+
+    def update(self, session_id: str, data: dict) -> bool:
+        with self.session_factory() as db:
+            row = db.get(ApplicationSession, session_id)
+            if row is None or row.expires_at <= datetime.utcnow():
+                return False
+            row.data = {**row.data, **data}
+            db.commit()
+            return True
+
+    def delete(self, session_id: str):
+        with self.session_factory() as db:
+            db.execute(delete(ApplicationSession).where(ApplicationSession.id == session_id))
+            db.commit()
+
+    def sweep(self) -> int:
+        with self.session_factory() as db:
+            result = db.execute(delete(ApplicationSession).where(ApplicationSession.expires_at <= datetime.utcnow()))
+            db.commit()
+            return result.rowcount
+
+
+class RedisSessionStore(SessionStore):
+    """Sessions as JSON strings under `prefix`; needs the optional `redis` package"""
+
+    def __init__(self, url: str, ttl_seconds: float, prefix: str = "jobapp:session:"):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.ttl_seconds = int(ttl_seconds)
+        self.prefix = prefix
+
+    def create(self, user_id: int, data: dict) -> str:
+        session_id = str(uuid.uuid4())
+        value = {**data, "user_id": user_id, "created_at": datetime.utcnow().isoformat()}
+        self.client.set(self.prefix + session_id, json.dumps(value), ex=self.ttl_seconds)
+        return session_id
+
+    def get(self, session_id: str):
+        value = self.client.get(self.prefix + session_id)
+        return json.loads(value) if value is not None else None
+
+    def update(self, session_id: str, data: dict) -> bool:
+        key = self.prefix + session_id
+        value = self.client.get(key)
+        if value is None:
+            return False
+        # Keep the remaining TTL rather than extending it
+        self.client.set(key, json.dumps({**json.loads(value), **data}), keepttl=True)
+        return True
+
+    def delete(self, session_id: str):
+        self.client.delete(self.prefix + session_id)
+
+
+class SessionSweeper:
+    """Daemon thread calling `store.sweep()` every `interval_seconds`"""
+
+    def __init__(self, store: SessionStore, interval_seconds: float):
+        self.store = store
+        self.interval_seconds = interval_seconds
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None and self.interval_seconds > 0:
+            self._thread = threading.Thread(target=self._run, name="session-sweeper", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                removed = self.store.sweep()
+            except Exception:
+                extension_logger.exception("Sweeping expired sessions failed")
+                continue
+            if removed:
+                extension_logger.debug(f"Removed {removed} expired application sessions")
+
+    def stop(self):
+        self._stop.set()
+
+
+def create_session_store(backend: str, session_factory, ttl_seconds: float, redis_url: str = "") -> SessionStore:
+    if backend == "redis":
+        return RedisSessionStore(redis_url, ttl_seconds)
+    if backend == "sql":
+        return SQLSessionStore(session_factory, ttl_seconds)
+    raise ValueError(f"Unknown session store backend: {backend!r}")
@@ -0,0 +1,218 @@
+"""
+Resume text extraction service.
+
+Uploaded files are parsed from memory (no temporary files) in a small
+process pool, so a large PDF keeps a worker process busy instead of
+pinning a request thread and the GIL. At most one document per worker is
+submitted at a time (other callers wait for a free slot), so the timeout
+measures extraction, not time spent queued. A worker that overruns it is
+killed and the pool is rebuilt. Killing the pool
+also fails the other extractions it was running, so those are resubmitted
+once to the fresh pool.
+
+PDFs use the fastest installed backend: pypdfium2, then PyMuPDF, with
+pdfminer (always installed, pure Python, slowest) as fallback. Only the
+first `max_pages` pages are read. Pages are joined with form feeds, like
+pdfminer does.
+
+`config` is only imported lazily, so worker processes started with the
+spawn method (Windows, macOS) can import this module cheaply.
+"""
+
+import io
+import logging
+import threading
+import time
+import weakref
+from concurrent.futures import CancelledError, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from metrics import TEXT_EXTRACTION_DURATION
+
+llm_logger = logging.getLogger("jobapp.llm")
+
+PAGE_BREAK = "\f"
+
+
+class ExtractionTimeout(Exception):
+    """Raised when a document takes longer than the configured timeout to extract"""
+
+
+def _pdf_text_pdfium(content: bytes, max_pages: int) -> str:
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(content)
+    pages = []
+    try:
+        for index in range(min(len(pdf), max_pages)):
+            page = pdf[index]
+            textpage = page.get_textpage()
+            pages.append(textpage.get_text_range())
+            textpage.close()
+            page.close()
+    finally:
+        pdf.close()
+    return PAGE_BREAK.join(pages)
+
+
+def _pdf_text_pymupdf(content: bytes, max_pages: int) -> str:
+    import fitz
+
+    with fitz.open(stream=content, filetype="pdf") as pdf:
+        return PAGE_BREAK.join(pdf[index].get_text() for index in range(min(pdf.page_count, max_pages)))
+
+
+def _pdf_text_pdfminer(content: bytes, max_pages: int) -> str:
+    from pdfminer.high_level import extract_text
+
+    return extract_text(io.BytesIO(content), maxpages=max_pages)
+
+
+PDF_BACKENDS = {
+    "pdfium": _pdf_text_pdfium,
+    "pymupdf": _pdf_text_pymupdf,
+    "pdfminer": _pdf_text_pdfminer,
+}
+
+
+def extract_pdf_text(content: bytes, max_pages: int, backend: str = "auto") -> str:
+    """
+    Extract PDF text with `backend`, or with the first installed fast backend
+    when "auto". Falls back to pdfminer if a fast backend fails or finds no text.
+    """
+    candidates = list(PDF_BACKENDS) if backend == "auto" else [backend, "pdfminer"]
+    for name in dict.fromkeys(candidates):
+        try:
+            text = PDF_BACKENDS[name](content, max_pages)
+        except ImportError:
+            continue
+        except Exception as e:
+            if name == "pdfminer":
+                raise
+            llm_logger.warning(f"PDF backend {name} failed, falling back: {e}")
+            continue
+        if text.strip() or name == "pdfminer":
+            return text
+    return ""
+
+
+def extract_text_bytes(content: bytes, extension: str, max_pages: int = 10, pdf_backend: str = "auto") -> str:
+    """Extract text from an in-memory document; `extension` includes the dot"""
+    extension = extension.lower()
+    if extension == ".pdf":
+        return extract_pdf_text(content, max_pages, pdf_backend)
+    if extension in (".doc", ".docx"):
+        import docx
+
+        document = docx.Document(io.BytesIO(content))
+        return "\n".join(p.text for p in document.paragraphs)
+    if extension == ".txt":
+        return content.decode("utf-8", errors="replace")
+    return ""
+
+
+class TextExtractionService:
+    """
+    Runs extract_text_bytes in a process pool with a per-document timeout.
+    With `max_workers=0` extraction runs inline in the calling thread.
+    """
+
+    def __init__(self, max_workers: int = 2, timeout: float = 30, max_pages: int = 10, pdf_backend: str = "auto"):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.max_pages = max_pages
+        self.pdf_backend = pdf_backend
+        self._executor = None
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max(1, max_workers))
+        # Pools killed after a timeout; their other tasks failed through no fault of their own
+        self._terminated = weakref.WeakSet()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+
+    def _reset_pool(self, executor):
+        """Kill the workers of `executor` (one of them may be stuck) so the next call gets a fresh pool"""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+            self._terminated.add(executor)
+        # ProcessPoolExecutor cannot cancel a running task; terminating its workers is the only way
+        for process in list((getattr(executor, "_processes", None) or {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def extract(self, content: bytes, extension: str) -> str:
+        started = time.perf_counter()
+        fmt = extension.lower().lstrip(".")
+        outcome = "error"
+        try:
+            if self.max_workers <= 0:
+                text = extract_text_bytes(content, extension, self.max_pages, self.pdf_backend)
+            else:
+                text = self._extract_in_pool(content, extension)
+            outcome = "ok"
+            return text
+        except ExtractionTimeout:
+            outcome = "timeout"
+            raise
+        finally:
+            TEXT_EXTRACTION_DURATION.observe(time.perf_counter() - started, format=fmt, outcome=outcome)
+
+    def _extract_in_pool(self, content: bytes, extension: str, retry: bool = True) -> str:
+        with self._slots:
+            executor = self._pool()
+            try:
+                try:
+                    future = executor.submit(extract_text_bytes, content, extension, self.max_pages, self.pdf_backend)
+                except RuntimeError as e:
+                    # The pool was shut down by a reset in the meantime
+                    raise BrokenProcessPool(str(e)) from e
+                return future.result(timeout=self.timeout)
+            except FutureTimeoutError:
+                self._reset_pool(executor)
+                raise ExtractionTimeout(f"Text extraction took longer than {self.timeout}s")
+            except (BrokenProcessPool, CancelledError):
+                collateral = executor in self._terminated
+                self._reset_pool(executor)
+                if not (collateral and retry):
+                    raise
+        llm_logger.info("Extraction pool was reset by another document's timeout, retrying")
+        return self._extract_in_pool(content, extension, retry=False)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_extraction_service() -> TextExtractionService:
+    """The service configured in config.py, created on first use"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            import config
+
+            _service = TextExtractionService(
+                max_workers=config.TEXT_EXTRACTION_WORKERS,
+                timeout=config.TEXT_EXTRACTION_TIMEOUT_SECONDS,
+                max_pages=config.RESUME_MAX_PAGES,
+                pdf_backend=config.PDF_TEXT_BACKEND,
+            )
+        return _service
+
+
+def shutdown_extraction_service():
+    global _service
+    with _service_lock:
+        service, _service = _service, None
+    if service is not None:
+        service.shutdown()